@@ -0,0 +1,41 @@
+"""
+ASGI config for the admin panel.
+
+Serves the whole API like wsgi.py does, optionally with the list and
+detail reads running as coroutines (API_ASYNC_VIEWS=1, api/asyncviews.py;
+on one CPU the sync views measured faster), plus the Server-Sent Events
+change feed (api/changefeed.py), which needs a long-lived connection per
+client and so only runs here. Streaming responses must hand Django an
+async iterator here, or it reads them whole before sending (see
+api.exporters.iterate_in_thread). Serve it with, e.g.:
+
+    gunicorn admin_panel.asgi:application -k uvicorn.workers.UvicornWorker
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+from django.core.exceptions import ImproperlyConfigured
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'admin_panel.settings')
+# Sync code runs on a pool of threads here, and Django 4.2 only closes a
+# persistent connection in the thread of the request it served: every pool
+# thread would hold its own connection open. Connect per request instead.
+os.environ.setdefault('DATABASE_CONN_MAX_AGE', '0')
+if os.environ['DATABASE_CONN_MAX_AGE'] != '0':
+    raise ImproperlyConfigured(
+        'DATABASE_CONN_MAX_AGE=%s: under ASGI each thread of the sync pool would keep its own database '
+        'connection open. Unset it or set it to 0 for asgi.py.' % os.environ['DATABASE_CONN_MAX_AGE']
+    )
+
+django_application = get_asgi_application()
+
+# Imported once Django is set up.
+from api.changefeed import CHANGE_FEED_PATH, change_feed  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'] == CHANGE_FEED_PATH:
+        await change_feed(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
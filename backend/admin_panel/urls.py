@@ -11,7 +11,10 @@ urlpatterns = [
 from django.contrib import admin
 from django.urls import path, include
 
+from api.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
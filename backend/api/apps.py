@@ -0,0 +1,22 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
+
+
+class ApiConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'api'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .instrumentation import install_query_recorder
+
+        post_migrate.connect(repair_search_index, sender=self)
+        connection_created.connect(install_query_recorder)
+
+
+def repair_search_index(using, **kwargs):
+    from django.db import connections
+    from .search import repair
+
+    repair(connections[using])
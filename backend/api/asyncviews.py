@@ -0,0 +1,173 @@
+"""
+Async variants of the list and detail views, named as in views.py and
+routed instead of them when API_ASYNC_VIEWS is on (only useful under
+admin_panel/asgi.py).
+
+Under WSGI a slow query holds a whole worker. Here it holds one coroutine:
+rows are read with the async ORM, and the CPU-bound steps (token checks,
+which may touch the cache or database, and serialization) run in the
+request's worker thread, so the event loop keeps serving other requests.
+Writes keep their sync implementations and run in that thread as well.
+"""
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import views
+from .caching import cached_payload
+from .conditional import conditional
+from .fieldsets import requested_fields, sparse_queryset
+from .models import Warehouse, Announcement, Category, SubCategory
+from .pagination import KeysetPagination
+from .serializers import (
+    WarehouseSerializer, AnnouncementSerializer, AnnouncementListSerializer, AnnouncementFilterSerializer,
+    CategorySerializer, SubCategorySerializer,
+)
+from .sync import delta_response, is_delta_request
+
+
+def _in_thread(handler):
+    @wraps(handler)
+    async def run(self, request, *args, **kwargs):
+        return await sync_to_async(handler)(self, request, *args, **kwargs)
+    return run
+
+
+def _serialize(serializer_class, instance, **kwargs):
+    return serializer_class(instance, **kwargs).data
+
+
+async def serialize(serializer_class, instance, **kwargs):
+    """``serializer_class(instance, **kwargs).data``, built off the event loop."""
+    return await sync_to_async(_serialize)(serializer_class, instance, **kwargs)
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView whose handlers are coroutines.
+
+    Authentication, permission and throttle checks run in a worker thread.
+    Handlers inherited as plain functions (the writes of the sync view this
+    one extends) are wrapped to run there too.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for method in cls.http_method_names:
+            handler = getattr(cls, method, None)
+            if handler is not None and method != 'options' and not iscoroutinefunction(handler):
+                setattr(cls, method, _in_thread(handler))
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # APIView.as_view() wraps the view in csrf_exempt(), whose wrapper
+        # hides the coroutine from Django before 5.0; exempt it directly.
+        view = super(APIView, cls).as_view(**initkwargs)
+        view.cls = cls
+        view.initkwargs = initkwargs
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+async def list_response(view, request, queryset, serializer_class):
+    """A keyset-paginated (or ``?updated_since=``) list page, read and serialized without blocking."""
+    if is_delta_request(request):
+        return await sync_to_async(delta_response)(request, queryset, serializer_class)
+    paginator = KeysetPagination()
+    queryset, fields = sparse_queryset(request, queryset, serializer_class, paginator.cursor_fields)
+    rows = await paginator.apaginate_queryset(queryset, request, view=view)
+    return paginator.get_paginated_response(await serialize(serializer_class, rows, many=True, fields=fields))
+
+
+async def detail_response(request, queryset, serializer_class, pk):
+    queryset, fields = sparse_queryset(request, queryset, serializer_class)
+    instance = await queryset.filter(pk=pk).afirst()
+    if instance is None:
+        return Response(status=status.HTTP_404_NOT_FOUND)
+    return Response(await serialize(serializer_class, instance, fields=fields))
+
+
+class WarehouseAPIView(AsyncAPIView, views.WarehouseAPIView):
+    @conditional(Warehouse)
+    @cached_payload(Warehouse)
+    async def get(self, request):
+        return await list_response(self, request, Warehouse.objects.all(), WarehouseSerializer)
+
+
+class WarehouseDetailAPIView(AsyncAPIView, views.WarehouseDetailAPIView):
+    @conditional(Warehouse)
+    @cached_payload(Warehouse)
+    async def get(self, request, pk):
+        return await detail_response(request, self.get_queryset(), WarehouseSerializer, pk)
+
+
+class AnnouncementAPIView(AsyncAPIView, views.AnnouncementAPIView):
+    @conditional(Announcement)
+    async def get(self, request):
+        filters = AnnouncementFilterSerializer(data=request.query_params)
+        if not filters.is_valid():
+            return Response(filters.errors, status=status.HTTP_400_BAD_REQUEST)
+        queryset = AnnouncementListSerializer.with_preview(
+            filters.filter(Announcement.objects.select_related('created_by')), requested_fields(request)
+        )
+        return await list_response(self, request, queryset, AnnouncementListSerializer)
+
+
+class AnnouncementDetailAPIView(AsyncAPIView, views.AnnouncementDetailAPIView):
+    @conditional(Announcement)
+    async def get(self, request, pk):
+        return await detail_response(request, self.get_queryset(), AnnouncementSerializer, pk)
+
+
+class CategoryAPIView(AsyncAPIView, views.CategoryAPIView):
+    @conditional(Category)
+    @cached_payload(Category)
+    async def get(self, request):
+        return await list_response(self, request, Category.objects.all(), CategorySerializer)
+
+
+class CategoryDetailAPIView(AsyncAPIView, views.CategoryDetailAPIView):
+    @conditional(Category)
+    @cached_payload(Category)
+    async def get(self, request, pk):
+        return await detail_response(request, self.get_queryset(), CategorySerializer, pk)
+
+
+class SubCategoryAPIView(AsyncAPIView, views.SubCategoryAPIView):
+    @conditional(SubCategory)
+    @cached_payload(SubCategory)
+    async def get(self, request):
+        return await list_response(self, request, SubCategory.objects.select_related('category'), SubCategorySerializer)
+
+
+class SubCategoryDetailAPIView(AsyncAPIView, views.SubCategoryDetailAPIView):
+    @conditional(SubCategory)
+    @cached_payload(SubCategory)
+    async def get(self, request, pk):
+        return await detail_response(request, self.get_queryset(), SubCategorySerializer, pk)
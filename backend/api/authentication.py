@@ -0,0 +1,155 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken, Token
+
+from .models import User
+from .revocation import get_revocation_list
+
+# With a per-process cache, AUTH_CACHE_TTL bounds how long another worker's
+# change to a user can go unnoticed; AUTH_CACHE_URL shares the cache.
+CACHE_ALIAS = 'default'
+AUTH_CACHE_TTL = getattr(settings, 'AUTH_CACHE_TTL', 30)
+
+VERSION_CLAIM = 'ver'
+CLAIMS = ('role', 'name', VERSION_CLAIM)
+
+
+def issue_token(user):
+    refresh = RefreshToken.for_user(user)
+    refresh['role'] = user.role
+    refresh['name'] = user.name
+    refresh[VERSION_CLAIM] = user.token_version
+    return refresh
+
+
+class StreamTicket(Token):
+    """Opens the change feed, whose EventSource cannot send an Authorization header."""
+    token_type = 'stream'
+    lifetime = timedelta(seconds=getattr(settings, 'CHANGE_FEED_TICKET_LIFETIME', 30))
+
+
+ACCESS_JTI_CLAIM = 'access_jti'
+ACCESS_EXP_CLAIM = 'access_exp'
+
+
+def issue_stream_ticket(access_token):
+    ticket = StreamTicket()
+    for claim in (api_settings.USER_ID_CLAIM, *CLAIMS):
+        if claim in access_token:
+            ticket[claim] = access_token[claim]
+    ticket[ACCESS_JTI_CLAIM] = access_token[api_settings.JTI_CLAIM]
+    ticket[ACCESS_EXP_CLAIM] = access_token['exp']
+    return ticket
+
+
+def validate_stream_ticket(raw_ticket):
+    try:
+        ticket = StreamTicket(raw_ticket)
+    except TokenError as exc:
+        raise InvalidToken(exc.args[0])
+    if is_revoked(ticket):
+        raise AuthenticationFailed(_('Token has been revoked'), code='token_revoked')
+    return ticket
+
+
+def is_revoked(token):
+    jti = token.get(ACCESS_JTI_CLAIM, token.get(api_settings.JTI_CLAIM))
+    return jti is not None and get_revocation_list().is_revoked(jti)
+
+
+def revoke_token(token):
+    get_revocation_list().revoke(token[api_settings.JTI_CLAIM], token['exp'])
+
+
+def _version_key(user_id):
+    return 'auth:version:%s' % user_id
+
+
+def _user_key(user_id, version):
+    return 'auth:user:%s:%s' % (user_id, version)
+
+
+def remember_user(user):
+    version = user.token_version if user.is_active else None
+    caches[CACHE_ALIAS].set(_version_key(user.pk), version, AUTH_CACHE_TTL)
+
+
+def forget_user(user_id):
+    caches[CACHE_ALIAS].delete(_version_key(user_id))
+
+
+def forget_users(user_ids):
+    caches[CACHE_ALIAS].delete_many([_version_key(user_id) for user_id in user_ids])
+
+
+def current_token_version(user_id):
+    cache = caches[CACHE_ALIAS]
+    key = _version_key(user_id)
+    # Sentinel so a cached None (inactive) is not mistaken for a miss.
+    version = cache.get(key, cache)
+    if version is cache:
+        row = User.objects.filter(pk=user_id).values_list('token_version', 'is_active').first()
+        version = row[0] if row is not None and row[1] else None
+        cache.set(key, version, AUTH_CACHE_TTL)
+    return version
+
+
+def full_user(user):
+    """The User row behind a ClaimsUser, cached per token_version."""
+    if isinstance(user, User):
+        return user
+    cache = caches[CACHE_ALIAS]
+    key = _user_key(user.id, user.token_version)
+    instance = cache.get(key)
+    if instance is None:
+        try:
+            instance = User.objects.get(pk=user.id)
+        except User.DoesNotExist:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        cache.set(key, instance, AUTH_CACHE_TTL)
+    return instance
+
+
+class ClaimsUser(TokenUser):
+    @property
+    def role(self):
+        return self.token.get('role', '')
+
+    @property
+    def name(self):
+        return self.token.get('name', '')
+
+    @property
+    def token_version(self):
+        return self.token.get(VERSION_CLAIM)
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    """JWT authentication from the token's claims, checked against the user's token_version."""
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        jti = validated_token.get(api_settings.JTI_CLAIM)
+        if jti is not None and get_revocation_list().is_revoked(jti):
+            raise AuthenticationFailed(_('Token has been revoked'), code='token_revoked')
+        return validated_token
+
+    def get_user(self, validated_token):
+        if any(claim not in validated_token for claim in CLAIMS):
+            # Issued before claims were embedded; fall back to the row.
+            return JWTAuthentication.get_user(self, validated_token)
+
+        user = ClaimsUser(validated_token)
+        current = current_token_version(user.id)
+        if current is None:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if current != user.token_version:
+            raise AuthenticationFailed(_('Token has been revoked'), code='token_revoked')
+        return user
@@ -0,0 +1,57 @@
+"""
+Django's SQLite backend, plus per-connection PRAGMAs and a choice of
+transaction mode, both of which Django itself only gained in 5.1.
+"""
+import re
+from urllib.request import pathname2url
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+PRAGMA_NAME_RE = re.compile(r'^[a-z_]+$')
+PRAGMA_VALUE_RE = re.compile(r'^[A-Za-z0-9_-]+$')
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Runs the SQLITE_PRAGMAS setting on every new connection, and opens
+    transaction.atomic() blocks with OPTIONS['transaction_mode'].
+
+    IMMEDIATE takes the write lock at BEGIN, so concurrent writers queue on
+    busy_timeout. Under the default DEFERRED, a transaction that reads
+    before it writes fails with "database is locked" the moment another
+    process has written since its read, without waiting at all.
+
+    OPTIONS['read_only'] = '1' opens the file read-only, and fails instead
+    of creating it when it is missing; local stand-in replicas use it (see
+    api/replicas.py).
+    """
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.transaction_mode = (params.pop('transaction_mode', None) or 'DEFERRED').upper()
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured('transaction_mode must be one of: %s.' % ', '.join(TRANSACTION_MODES))
+        self.read_only = params.pop('read_only', '0') in ('1', 'true')
+        if self.read_only:
+            # Django opens every SQLite database with uri=True.
+            params['database'] = 'file:%s?mode=ro' % pathname2url(str(params['database']))
+            self.transaction_mode = 'DEFERRED'
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            # PRAGMA takes no parameters, so names and values are checked instead.
+            if not PRAGMA_NAME_RE.match(name) or not PRAGMA_VALUE_RE.match(str(value)):
+                raise ImproperlyConfigured('Invalid SQLite pragma %s=%r' % (name, value))
+            # The journal mode belongs to the file, which only a writer can change.
+            if name == 'journal_mode' and (self.is_in_memory_db() or self.read_only):
+                continue
+            connection.execute('PRAGMA %s = %s' % (name, value))
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN %s' % self.transaction_mode)
@@ -0,0 +1,53 @@
+import time
+from contextlib import contextmanager
+from importlib import import_module
+
+from django.db import connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+# Benchmark name -> module exposing DEFAULT_ROWS and run(rows, stdout),
+# which returns a list of result dicts.
+BENCHMARKS = {
+    'bulk': 'api.benchmarks.bulk',
+    'spatial': 'api.benchmarks.spatial',
+    'search': 'api.benchmarks.search',
+    'revocation': 'api.benchmarks.revocation',
+    'login': 'api.benchmarks.login',
+    'encoding': 'api.benchmarks.encoding',
+    'endpoints': 'api.benchmarks.endpoints',
+    'changefeed': 'api.benchmarks.changefeed',
+}
+
+
+def load(name):
+    return import_module(BENCHMARKS[name])
+
+
+@contextmanager
+def test_database(sqlite_file=None):
+    """
+    Run the body against freshly created, migrated test databases.
+
+    ``sqlite_file`` puts the default SQLite test database in that file
+    instead of in memory, so other processes (a local gunicorn) can use it.
+    """
+    if sqlite_file is not None:
+        connections['default'].settings_dict.setdefault('TEST', {})['NAME'] = sqlite_file
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0, interactive=False)
+    old_config = runner.setup_databases()
+    try:
+        yield
+    finally:
+        runner.teardown_databases(old_config)
+        teardown_test_environment()
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed = time.perf_counter() - self.start
@@ -0,0 +1,57 @@
+import json
+
+from django.urls import reverse
+
+from api.models import Warehouse, Category, SubCategory
+from api.querybudget import authenticated_client
+from api.views import BulkAPIView
+
+from . import Timer
+
+DEFAULT_ROWS = 1000
+
+
+def _payloads(model, rows, category_ids):
+    if model is Warehouse:
+        return [{'city': 'City %d' % i, 'latitude': i % 90, 'longitude': i % 180} for i in range(rows)]
+    if model is Category:
+        return [{'name': 'Category %d' % i} for i in range(rows)]
+    return [{'name': 'Sub %d' % i, 'category': category_ids[i % len(category_ids)]} for i in range(rows)]
+
+
+def _post(client, url, payload):
+    return client.post(url, json.dumps(payload), content_type='application/json')
+
+
+def run(rows, stdout):
+    """Create ``rows`` objects of each model per-row and in bulk, and compare."""
+    client = authenticated_client()
+    parents = Category.objects.bulk_create([Category(name='Parent %d' % i) for i in range(10)])
+    category_ids = [category.pk for category in parents]
+    batch = BulkAPIView.max_items
+
+    results = []
+    for model, prefix in ((Warehouse, 'warehouse'), (Category, 'category'), (SubCategory, 'subcategory')):
+        payloads = _payloads(model, rows, category_ids)
+
+        with Timer() as per_row:
+            for payload in payloads:
+                response = _post(client, reverse('%s-list' % prefix), payload)
+                assert response.status_code == 201, response.content
+
+        with Timer() as bulk:
+            for start in range(0, rows, batch):
+                response = _post(client, reverse('%s-bulk' % prefix), payloads[start:start + batch])
+                assert response.status_code == 201, response.content
+
+        results.append({
+            'model': model.__name__,
+            'rows': rows,
+            'per_row_seconds': per_row.elapsed,
+            'bulk_seconds': bulk.elapsed,
+            'speedup': per_row.elapsed / bulk.elapsed if bulk.elapsed else None,
+        })
+        stdout.write('%-12s %7d rows  per-row %8.3fs  bulk %8.3fs  x%.1f' % (
+            model.__name__, rows, per_row.elapsed, bulk.elapsed, results[-1]['speedup'] or 0,
+        ))
+    return results
@@ -0,0 +1,113 @@
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+from api import changefeed
+from api.authentication import issue_token
+from api.models import Announcement, ChangeEvent, User
+
+from .endpoints import _percentile
+
+DEFAULT_ROWS = 2000
+BURSTS = (1, 10, 100)
+
+
+class Connection:
+    """A subscribed client without a socket: records when each event reached it."""
+
+    def __init__(self, token):
+        self.scope = {
+            'type': 'http', 'method': 'GET', 'path': changefeed.CHANGE_FEED_PATH, 'headers': [],
+            'query_string': ('token=%s' % token).encode(),
+        }
+        self.disconnect = asyncio.Event()
+        self.received = 0
+        self.expected = 0
+        self.done = asyncio.Event()
+        self.finished_at = None
+
+    async def receive(self):
+        await self.disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        self.received += message.get('body', b'').count(b'event: change')
+        if self.expected and self.received >= self.expected and not self.done.is_set():
+            self.finished_at = time.perf_counter()
+            self.done.set()
+
+    def expect(self, count):
+        self.expected, self.received, self.finished_at = count, 0, None
+        self.done.clear()
+
+
+def _write(author, count):
+    with transaction.atomic():
+        announcements = Announcement.objects.bulk_create([
+            Announcement(title='Feed benchmark %d' % i, content='Fan-out.', created_by=author) for i in range(count)
+        ])
+        changefeed.record_changes(Announcement, [announcement.pk for announcement in announcements], ChangeEvent.CREATE)
+
+
+async def _measure(connections, author):
+    results = []
+    for burst in BURSTS:
+        for connection in connections:
+            connection.expect(burst)
+        start = time.perf_counter()
+        await sync_to_async(_write)(author, burst)
+        await asyncio.gather(*(connection.done.wait() for connection in connections))
+        latencies = [(connection.finished_at - start) * 1000 for connection in connections]
+        results.append({
+            'subscribers': len(connections),
+            'events': burst,
+            'p50_ms': round(statistics.median(latencies), 1),
+            'p99_ms': round(_percentile(latencies, 99), 1),
+            'max_ms': round(max(latencies), 1),
+        })
+    return results
+
+
+async def _run(rows, token, author):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    connections = [Connection(token) for _ in range(rows)]
+    tasks = [
+        asyncio.ensure_future(changefeed.change_feed(connection.scope, connection.receive, connection.send))
+        for connection in connections
+    ]
+    while len(changefeed.broker.subscribers) < rows:
+        await asyncio.sleep(0.05)
+    per_connection = (tracemalloc.get_traced_memory()[0] - before) / rows
+    tracemalloc.stop()
+    # Idle: one poll per interval for the whole process, whatever the subscriber count.
+    await asyncio.sleep(1)
+    results = await _measure(connections, author)
+    for connection in connections:
+        connection.disconnect.set()
+    await asyncio.gather(*tasks)
+    for result in results:
+        result['bytes_per_idle_connection'] = round(per_connection)
+    return results
+
+
+def run(rows, stdout):
+    """
+    Open ``rows`` in-process change feed subscriptions, then time how long
+    bursts of events take from commit to reaching every subscriber.
+    """
+    author = User.objects.create_user(
+        'feed-benchmark@example.com', password='unused', name='Feed Benchmark', role=User.PLATFORM_ADMIN,
+    )
+    token = str(issue_token(author).access_token)
+    results = asyncio.run(_run(rows, token, author))
+    for result in results:
+        stdout.write('%5d subscribers  %4d events  p50 %7.1f  p99 %7.1f  max %7.1f ms  %6d B/idle connection' % (
+            result['subscribers'], result['events'], result['p50_ms'], result['p99_ms'], result['max_ms'],
+            result['bytes_per_idle_connection'],
+        ))
+    return results
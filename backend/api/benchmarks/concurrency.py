@@ -0,0 +1,146 @@
+import os
+import random
+import statistics
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from api.authentication import issue_token
+from api.models import Announcement, User
+from api.seeding import SEED_PASSWORD, seed_dataset
+
+from . import Timer, test_database
+from .endpoints import GunicornServer, HTTPTransport, _json, _percentile
+
+DEFAULT_ROWS = 5000
+DEFAULT_REQUESTS = 400
+DEFAULT_WORKERS = (1, 2, 4)
+DEFAULT_CONCURRENCY = 8
+
+# Server configurations compared, as (environment, DATABASE_URL query).
+# 'untuned' is what Django does out of the box: a connection per request,
+# deferred transactions and SQLite's rollback journal with synchronous=FULL.
+# 'tuned' is this project's default configuration.
+CONFIGURATIONS = {
+    'untuned': ({
+        'DATABASE_CONN_MAX_AGE': '0',
+        'SQLITE_PRAGMAS': 'journal_mode=delete,synchronous=full,mmap_size=0,temp_store=default',
+    }, '?transaction_mode=deferred'),
+    'tuned': ({}, ''),
+}
+
+# (share of requests, kind) of the mixed workload; reads dominate, as they do in production.
+MIX = (
+    (0.45, 'list'),
+    (0.25, 'detail'),
+    (0.10, 'categories'),
+    (0.10, 'warehouses'),
+    (0.10, 'create'),
+)
+
+
+def _pragmas(environment):
+    """SQLITE_PRAGMAS setting matching ``environment``, for the seeding connection."""
+    pragmas = dict(settings.SQLITE_PRAGMAS)
+    for item in environment.get('SQLITE_PRAGMAS', '').split(','):
+        if '=' in item:
+            name, value = item.split('=', 1)
+            pragmas[name] = value
+    return pragmas
+
+
+def workload(count, announcement_ids, seed=0):
+    """``count`` (kind, method, path, body, content_type, headers) requests drawn from MIX."""
+    rng = random.Random(seed)
+    kinds = [kind for _, kind in MIX]
+    weights = [share for share, _ in MIX]
+    requests = []
+    for i, kind in enumerate(rng.choices(kinds, weights, k=count)):
+        if kind == 'create':
+            path, body, content_type, headers = _json(reverse('announcement-list'), {
+                'title': 'Concurrent announcement %d' % i, 'content': 'Written under load.',
+            })
+            requests.append((kind, 'POST', path, body, content_type, headers))
+            continue
+        if kind == 'list':
+            path = reverse('announcement-list')
+        elif kind == 'detail':
+            path = reverse('announcement-detail', kwargs={'pk': rng.choice(announcement_ids)})
+        elif kind == 'categories':
+            path = reverse('category-list')
+        else:
+            path = reverse('warehouse-list')
+        requests.append((kind, 'GET', path, b'', None, {}))
+    return requests
+
+
+def measure(server, token, requests, concurrency):
+    transport = HTTPTransport(token, '127.0.0.1', server.port, server)
+
+    def send(request):
+        kind, method, path, body, content_type, headers = request
+        with Timer() as timer:
+            try:
+                status, _ = transport.request(method, path, body, content_type, headers)
+            except OSError:
+                status = None
+        return kind, timer.elapsed * 1000, status
+
+    with Timer() as total:
+        with ThreadPoolExecutor(concurrency) as pool:
+            outcomes = list(pool.map(send, requests))
+
+    samples = [elapsed for _, elapsed, _ in outcomes]
+    writes = [elapsed for kind, elapsed, _ in outcomes if kind == 'create'] or [0.0]
+    return {
+        'requests': len(outcomes),
+        'rps': round(len(outcomes) / total.elapsed, 1),
+        'p50_ms': round(statistics.median(samples), 2),
+        'p95_ms': round(_percentile(samples, 95), 2),
+        'p99_ms': round(_percentile(samples, 99), 2),
+        'write_p95_ms': round(_percentile(writes, 95), 2),
+        'errors': sum(status is None or status >= 500 for _, _, status in outcomes),
+        'peak_rss_mb': round((server.peak_rss() or 0) / 2 ** 20, 1),
+    }
+
+
+def run_matrix(rows=DEFAULT_ROWS, requests=DEFAULT_REQUESTS, workers=DEFAULT_WORKERS,
+               concurrency=DEFAULT_CONCURRENCY, configurations=CONFIGURATIONS, stdout=None):
+    """
+    Throughput and latency of a mixed read/write workload against gunicorn
+    with each worker count, once per server configuration. Every
+    configuration gets its own freshly seeded SQLite file.
+    """
+    results = []
+    for name, (environment, url_query) in configurations.items():
+        database = os.path.join(tempfile.gettempdir(), 'concurrency-benchmark-%d-%s.sqlite3' % (os.getpid(), name))
+        with override_settings(SQLITE_PRAGMAS=_pragmas(environment)), test_database(sqlite_file=database):
+            seed_dataset(users=20, warehouses=max(rows // 10, 10), announcements=rows)
+            admin = User.objects.create_user(
+                'concurrency-admin@example.com', password=SEED_PASSWORD, name='Concurrency Admin',
+                role=User.PLATFORM_ADMIN,
+            )
+            token = str(issue_token(admin).access_token)
+            announcement_ids = list(Announcement.objects.values_list('id', flat=True)[:1000])
+            for count in workers:
+                with GunicornServer(database, count, env=environment, url_query=url_query) as server:
+                    # One untimed pass warms every worker's connection and caches.
+                    measure(server, token, workload(count * 4, announcement_ids, seed=-1), concurrency)
+                    result = {
+                        'configuration': name, 'workers': count, 'concurrency': concurrency,
+                        **measure(server, token, workload(requests, announcement_ids), concurrency),
+                    }
+                results.append(result)
+                if stdout is not None:
+                    stdout.write(format_result(result))
+    return results
+
+
+def format_result(result):
+    return '%-8s %2d workers  %7.1f req/s  p50 %7.2f  p95 %7.2f  p99 %7.2f ms  writes p95 %7.2f ms  %3d errors  %6.1f MB' % (
+        result['configuration'], result['workers'], result['rps'], result['p50_ms'], result['p95_ms'],
+        result['p99_ms'], result['write_p95_ms'], result['errors'], result['peak_rss_mb'],
+    )
@@ -0,0 +1,133 @@
+import os
+import random
+import statistics
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.urls import reverse
+
+from api.authentication import issue_token
+from api.models import Announcement, Category, User
+from api.seeding import SEED_PASSWORD, seed_dataset
+
+from . import Timer, test_database
+from .endpoints import GunicornServer, HTTPTransport, _percentile
+
+DEFAULT_ROWS = 5000
+DEFAULT_REQUESTS = 600
+DEFAULT_WORKERS = 2
+DEFAULT_CONCURRENCY = 32
+
+ASGI = {'application': 'admin_panel.asgi:application', 'worker_class': 'uvicorn.workers.UvicornWorker'}
+
+# Deployments compared, as GunicornServer keyword arguments. 'wsgi' is the
+# sync worker of gunicorn.conf.py; 'wsgi-threads' gives each worker a few
+# threads; 'asgi' is admin_panel.asgi with the async read views and
+# 'asgi-sync-views' the same server running the views of views.py.
+DEPLOYMENTS = {
+    'wsgi': {},
+    'wsgi-threads': {'threads': 4, 'worker_class': 'gthread'},
+    'asgi': {**ASGI, 'env': {'API_ASYNC_VIEWS': '1'}},
+    'asgi-sync-views': ASGI,
+}
+
+# (share of requests, kind): a few large list pages among many small reads.
+MIX = (
+    (0.15, 'slow'),
+    (0.45, 'detail'),
+    (0.25, 'categories'),
+    (0.15, 'category'),
+)
+
+
+def workload(count, announcement_ids, category_ids, seed=0):
+    """``count`` (kind, path) GET requests drawn from MIX."""
+    rng = random.Random(seed)
+    kinds = [kind for _, kind in MIX]
+    weights = [share for share, _ in MIX]
+    requests = []
+    for kind in rng.choices(kinds, weights, k=count):
+        if kind == 'slow':
+            # The largest page, with the whole content of each announcement.
+            path = '%s?page_size=500&fields=id,title,content,created_by_name,updated_at' % reverse('announcement-list')
+        elif kind == 'detail':
+            path = reverse('announcement-detail', kwargs={'pk': rng.choice(announcement_ids)})
+        elif kind == 'categories':
+            path = reverse('category-list')
+        else:
+            path = reverse('category-detail', kwargs={'pk': rng.choice(category_ids)})
+        requests.append((kind, path))
+    return requests
+
+
+def measure(server, token, requests, concurrency):
+    transport = HTTPTransport(token, '127.0.0.1', server.port, server)
+
+    def send(request):
+        kind, path = request
+        with Timer() as timer:
+            try:
+                status, _ = transport.request('GET', path, b'', None, {})
+            except OSError:
+                status = None
+        return kind, timer.elapsed * 1000, status
+
+    with Timer() as total:
+        with ThreadPoolExecutor(concurrency) as pool:
+            outcomes = list(pool.map(send, requests))
+
+    slow = [elapsed for kind, elapsed, _ in outcomes if kind == 'slow'] or [0.0]
+    fast = [elapsed for kind, elapsed, _ in outcomes if kind != 'slow'] or [0.0]
+    return {
+        'requests': len(outcomes),
+        'rps': round(len(outcomes) / total.elapsed, 1),
+        'fast_p50_ms': round(statistics.median(fast), 2),
+        'fast_p95_ms': round(_percentile(fast, 95), 2),
+        'fast_p99_ms': round(_percentile(fast, 99), 2),
+        'slow_p50_ms': round(statistics.median(slow), 2),
+        'slow_p99_ms': round(_percentile(slow, 99), 2),
+        'errors': sum(status is None or status >= 400 for _, _, status in outcomes),
+        'peak_rss_mb': round((server.peak_rss() or 0) / 2 ** 20, 1),
+    }
+
+
+def run_matrix(rows=DEFAULT_ROWS, requests=DEFAULT_REQUESTS, workers=DEFAULT_WORKERS,
+               concurrency=DEFAULT_CONCURRENCY, deployments=DEPLOYMENTS, stdout=None):
+    """
+    Throughput and latency of small reads queued behind large list pages,
+    against the same number of gunicorn workers in each deployment.
+    """
+    results = []
+    database = os.path.join(tempfile.gettempdir(), 'deployment-benchmark-%d.sqlite3' % os.getpid())
+    with test_database(sqlite_file=database):
+        seed_dataset(users=20, warehouses=max(rows // 10, 10), announcements=rows)
+        admin = User.objects.create_user(
+            'deployment-admin@example.com', password=SEED_PASSWORD, name='Deployment Admin',
+            role=User.PLATFORM_ADMIN,
+        )
+        token = str(issue_token(admin).access_token)
+        announcement_ids = list(Announcement.objects.values_list('id', flat=True)[:1000])
+        category_ids = list(Category.objects.values_list('id', flat=True))
+        for name, options in deployments.items():
+            with GunicornServer(database, workers, **options) as server:
+                # One untimed pass warms every worker's connection and caches.
+                measure(server, token, workload(workers * 8, announcement_ids, category_ids, seed=-1), concurrency)
+                result = {
+                    'deployment': name, 'workers': workers, 'concurrency': concurrency,
+                    **measure(server, token, workload(requests, announcement_ids, category_ids), concurrency),
+                }
+            results.append(result)
+            if stdout is not None:
+                stdout.write(format_result(result))
+    return results
+
+
+def format_result(result):
+    return (
+        '%-15s %2d workers  %7.1f req/s  fast p50 %7.2f  p95 %7.2f  p99 %7.2f ms  '
+        'slow p50 %7.2f  p99 %7.2f ms  %3d errors  %6.1f MB'
+    ) % (
+        result['deployment'], result['workers'], result['rps'], result['fast_p50_ms'], result['fast_p95_ms'],
+        result['fast_p99_ms'], result['slow_p50_ms'], result['slow_p99_ms'], result['errors'],
+        result['peak_rss_mb'],
+    )
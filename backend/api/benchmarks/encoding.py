@@ -0,0 +1,64 @@
+from rest_framework.renderers import JSONRenderer
+
+from api import compression
+from api.models import Announcement, User
+from api.renderers import FastJSONRenderer, orjson
+from api.serializers import AnnouncementListSerializer, AnnouncementSerializer
+
+from . import Timer
+
+DEFAULT_ROWS = 10000
+REPEATS = 5
+
+
+def _best(function):
+    best = None
+    for _ in range(REPEATS):
+        with Timer() as timer:
+            result = function()
+        best = timer.elapsed if best is None else min(best, timer.elapsed)
+    return best * 1000, result
+
+
+def run(rows, stdout):
+    """Encode a ``rows``-long announcement list with each renderer and codec."""
+    author = User.objects.create_user('encoding-bench@example.com', name='Bench Author')
+    paragraph = 'Warehouse schedules change on Monday; please review the updated rota. '
+    Announcement.objects.bulk_create([
+        Announcement(title='Announcement %d' % i, content=paragraph * (1 + i % 8), created_by=author)
+        for i in range(rows)
+    ])
+    queryset = Announcement.objects.select_related('created_by').order_by('-created_at', '-id')
+    payloads = {
+        'full': AnnouncementSerializer(queryset, many=True).data,
+        'preview': AnnouncementListSerializer(AnnouncementListSerializer.with_preview(queryset), many=True).data,
+    }
+
+    results = []
+    for representation, data in payloads.items():
+        stdlib_ms, body = _best(lambda: JSONRenderer().render(data))
+        fast_ms, fast_body = _best(lambda: FastJSONRenderer().render(data))
+        assert len(fast_body) == len(body)
+        gzip_ms, gzipped = _best(lambda: compression.compress(body, 'gzip'))
+        result = {
+            'representation': representation,
+            'rows': rows,
+            'json_ms': stdlib_ms,
+            'orjson_ms': fast_ms if orjson is not None else None,
+            'bytes': len(body),
+            'gzip_ms': gzip_ms,
+            'gzip_bytes': len(gzipped),
+        }
+        if compression.brotli is not None:
+            result['br_ms'], brotlied = _best(lambda: compression.compress(body, 'br'))
+            result['br_bytes'] = len(brotlied)
+        results.append(result)
+
+        stdout.write('%s list (%d rows)' % (representation, rows))
+        stdout.write('  json     %8.1f ms  %10d bytes' % (stdlib_ms, len(body)))
+        if orjson is not None:
+            stdout.write('  orjson   %8.1f ms' % fast_ms)
+        stdout.write('  + gzip   %8.1f ms  %10d bytes' % (gzip_ms, len(gzipped)))
+        if compression.brotli is not None:
+            stdout.write('  + br     %8.1f ms  %10d bytes' % (result['br_ms'], result['br_bytes']))
+    return results
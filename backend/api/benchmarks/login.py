@@ -0,0 +1,122 @@
+import json
+import logging
+import statistics
+import threading
+
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from api.models import User, Warehouse
+from api.querybudget import authenticated_client
+from api.ratelimit import LoginRateThrottle, get_bucket_store
+from api.views import login_view
+
+from . import Timer
+
+DEFAULT_ROWS = 200
+FLOOD_THREADS = 8
+# Aggregate attempts per second the attackers aim for (open loop: they do
+# not slow down because the server does).
+FLOOD_RATE = 100
+
+
+def _percentile(samples, percent):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+FLOOD_IP = '203.0.113.7'
+
+
+def _flood(stop, counts, index):
+    client = Client(REMOTE_ADDR=FLOOD_IP)
+    url = reverse('login')
+    interval = FLOOD_THREADS / FLOOD_RATE
+    attempt = 0
+    try:
+        while not stop.wait(interval):
+            payload = {'email': 'victim-%d-%d@example.com' % (index, attempt % 50), 'password': 'wrong'}
+            response = client.post(url, json.dumps(payload), content_type='application/json')
+            counts[response.status_code] = counts.get(response.status_code, 0) + 1
+            attempt += 1
+    finally:
+        connection.close()
+
+
+def _phase(name, client, url, rows, flood):
+    stop = threading.Event()
+    counts = {}
+    threads = [
+        threading.Thread(target=_flood, args=(stop, counts, i)) for i in range(FLOOD_THREADS if flood else 0)
+    ]
+    for thread in threads:
+        thread.start()
+    samples = []
+    try:
+        with Timer() as total:
+            for _ in range(rows):
+                with Timer() as timer:
+                    response = client.get(url)
+                assert response.status_code == 200, response.status_code
+                samples.append(timer.elapsed * 1000)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    return {
+        'phase': name,
+        'p50_ms': statistics.median(samples),
+        'p95_ms': _percentile(samples, 95),
+        'p99_ms': _percentile(samples, 99),
+        'login_attempts_per_s': sum(counts.values()) / total.elapsed,
+        'login_throttled': counts.get(429, 0),
+    }
+
+
+def run(rows, stdout):
+    """
+    Latency of an ordinary API read while threads hammer login with bad
+    passwords, with and without the login limiter.
+    """
+    # Every rejected login would otherwise log a warning.
+    request_logger = logging.getLogger('django.request')
+    level = request_logger.level
+    request_logger.setLevel(logging.ERROR)
+    try:
+        return _run(rows, stdout)
+    finally:
+        request_logger.setLevel(level)
+
+
+def _run(rows, stdout):
+    User.objects.create_user('victim@example.com', password='correct horse', name='Victim')
+    Warehouse.objects.bulk_create([Warehouse(city='City %d' % i, latitude=i % 90, longitude=i % 180) for i in range(50)])
+    client = authenticated_client()
+    url = reverse('warehouse-list')
+
+    view_class = login_view.cls
+    results = [_phase('idle', client, url, rows, flood=False)]
+    view_class.throttle_classes = []
+    try:
+        results.append(_phase('flood, no limiter', client, url, rows, flood=True))
+    finally:
+        view_class.throttle_classes = [LoginRateThrottle]
+    # Measure the steady state of a sustained flood: the IP bucket is already empty.
+    get_bucket_store().clear()
+    flooder = Client(REMOTE_ADDR=FLOOD_IP)
+    attempt = 0
+    while True:
+        payload = json.dumps({'email': 'warm-up-%d@example.com' % attempt, 'password': 'wrong'})
+        if flooder.post(reverse('login'), payload, content_type='application/json').status_code == 429:
+            break
+        attempt += 1
+    results.append(_phase('flood, limiter', client, url, rows, flood=True))
+    get_bucket_store().clear()
+
+    for result in results:
+        stdout.write('%-18s p50 %7.2f ms  p95 %7.2f ms  p99 %7.2f ms  logins %8.1f/s  throttled %d' % (
+            result['phase'], result['p50_ms'], result['p95_ms'], result['p99_ms'],
+            result['login_attempts_per_s'], result['login_throttled'],
+        ))
+    return results
@@ -0,0 +1,58 @@
+import os
+import tempfile
+import time
+import uuid
+
+from api.revocation import RevocationList
+
+from . import Timer
+
+DEFAULT_ROWS = 1000000
+CHECKS = 100000
+BATCH = 10000
+
+
+def run(rows, stdout):
+    """Revoke ``rows`` token ids, then time is_revoked() for live and revoked tokens."""
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'revoked.sqlite3')
+    revocations = RevocationList(path, capacity=max(rows, 1))
+    expires_at = time.time() + 3600
+    revoked = []
+    with Timer() as revoking:
+        for start in range(0, rows, BATCH):
+            batch = [uuid.uuid4().hex for _ in range(start, min(rows, start + BATCH))]
+            revocations.revoke_many((jti, expires_at) for jti in batch)
+            if len(revoked) < CHECKS:
+                revoked.extend(batch[:CHECKS - len(revoked)])
+
+    # A second process's view: starts empty and loads everything from the file.
+    other_worker = RevocationList(path, capacity=max(rows, 1))
+    with Timer() as loading:
+        other_worker.is_revoked('warm-up')
+
+    live = [uuid.uuid4().hex for _ in range(CHECKS)]
+    false_positives = sum(jti in other_worker._bloom for jti in live)
+    with Timer() as live_timer:
+        assert not any(other_worker.is_revoked(jti) for jti in live)
+    with Timer() as revoked_timer:
+        assert all(other_worker.is_revoked(jti) for jti in revoked)
+
+    result = {
+        'rows': rows,
+        'revoke_us': revoking.elapsed / max(rows, 1) * 1e6,
+        'load_s': loading.elapsed,
+        'live_check_us': live_timer.elapsed / len(live) * 1e6,
+        'revoked_check_us': revoked_timer.elapsed / max(len(revoked), 1) * 1e6,
+        'false_positive_rate': false_positives / len(live),
+        'bloom_bytes': other_worker.memory_bytes(),
+        'store_bytes': sum(os.path.getsize(name) for name in (path, path + '-wal') if os.path.exists(name)),
+    }
+    stdout.write('revoke           %8.2f us/token' % result['revoke_us'])
+    stdout.write('worker load      %8.2f s' % result['load_s'])
+    stdout.write('live check       %8.2f us (filter only)' % result['live_check_us'])
+    stdout.write('revoked check    %8.2f us (filter + store)' % result['revoked_check_us'])
+    stdout.write('false positives  %8.4f %%' % (result['false_positive_rate'] * 100))
+    stdout.write('bloom filter     %8.2f MB' % (result['bloom_bytes'] / 1e6))
+    stdout.write('store file       %8.2f MB' % (result['store_bytes'] / 1e6))
+    return [result]
@@ -0,0 +1,61 @@
+import random
+
+from django.db import connection
+from django.db.models import Q
+
+from api.models import Announcement, User
+from api.search import search_announcements
+
+from . import Timer
+
+DEFAULT_ROWS = 200000
+QUERIES = 50
+SEED = 10
+VOCABULARY = 20000
+
+
+def make_words(rng):
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    return [''.join(rng.choices(letters, k=rng.randint(4, 9))) for _ in range(VOCABULARY)]
+
+
+def run(rows, stdout):
+    """Time ranked full-text search against an icontains scan."""
+    rng = random.Random(SEED)
+    words = make_words(rng)
+    author = User.objects.create_user('search-bench@example.com', name='Bench')
+    batch = 5000
+    for start in range(0, rows, batch):
+        Announcement.objects.bulk_create([
+            Announcement(
+                title=' '.join(rng.choices(words, k=4)),
+                content=' '.join(rng.choices(words, k=60)),
+                created_by=author,
+            )
+            for _ in range(start, min(rows, start + batch))
+        ])
+
+    # Two words drawn from a real row, so every query has at least one hit.
+    pks = list(Announcement.objects.values_list('pk', flat=True)[:QUERIES * 10])
+    terms = [
+        ' '.join(rng.sample(Announcement.objects.get(pk=rng.choice(pks)).content.split(), 2))
+        for _ in range(QUERIES)
+    ]
+    with Timer() as ranked:
+        for term in terms:
+            search_announcements(connection, term, 20)
+    with Timer() as scan:
+        for term in terms:
+            query = Q()
+            for word in term.split():
+                query &= Q(title__icontains=word) | Q(content__icontains=word)
+            list(Announcement.objects.filter(query).order_by('-created_at')[:20])
+
+    result = {
+        'rows': rows,
+        'search_ms': ranked.elapsed / QUERIES * 1000,
+        'icontains_ms': scan.elapsed / QUERIES * 1000,
+    }
+    stdout.write('full-text search %8.2f ms/query' % result['search_ms'])
+    stdout.write('icontains scan   %8.2f ms/query' % result['icontains_ms'])
+    return [result]
@@ -0,0 +1,61 @@
+import random
+
+from api import geo
+from api.models import Warehouse
+
+from . import Timer
+
+DEFAULT_ROWS = 1000000
+QUERIES = 200
+FULL_SCAN_QUERIES = 3
+K = 10
+SEED = 9
+
+
+def seed(rows, rng):
+    batch = 10000
+    for start in range(0, rows, batch):
+        Warehouse.objects.bulk_create([
+            Warehouse(city='City %d' % i, latitude=rng.uniform(-60, 70), longitude=rng.uniform(-180, 180))
+            for i in range(start, min(rows, start + batch))
+        ])
+
+
+def full_scan_nearest(latitude, longitude, k):
+    rows = Warehouse.objects.values_list('pk', 'latitude', 'longitude')
+    return sorted((geo.haversine_km(latitude, longitude, lat, lng), pk) for pk, lat, lng in rows)[:k]
+
+
+def run(rows, stdout):
+    """Time nearest()/within() through the geohash index against a full scan."""
+    rng = random.Random(SEED)
+    with Timer() as seeding:
+        seed(rows, rng)
+    stdout.write('seeded %d warehouses in %.1fs' % (rows, seeding.elapsed))
+
+    points = [(rng.uniform(-60, 70), rng.uniform(-180, 180)) for _ in range(QUERIES)]
+    boxes = []
+    for lat, lng in points:
+        boxes.append((lng, lat, min(180.0, lng + 0.5), min(90.0, lat + 0.5)))
+
+    with Timer() as nearest:
+        results = [Warehouse.objects.nearest(lat, lng, K) for lat, lng in points]
+    with Timer() as within:
+        for box in boxes:
+            list(Warehouse.objects.within(*box))
+    with Timer() as full_scan:
+        expected = [full_scan_nearest(lat, lng, K) for lat, lng in points[:FULL_SCAN_QUERIES]]
+
+    for got, want in zip(results, expected):
+        assert [w.pk for w in got] == [pk for _, pk in want], 'nearest() disagrees with a full scan'
+
+    result = {
+        'rows': rows,
+        'nearest_ms': nearest.elapsed / QUERIES * 1000,
+        'within_ms': within.elapsed / QUERIES * 1000,
+        'full_scan_nearest_ms': full_scan.elapsed / FULL_SCAN_QUERIES * 1000,
+    }
+    stdout.write('nearest k=%d     %8.2f ms/query' % (K, result['nearest_ms']))
+    stdout.write('within 0.5deg    %8.2f ms/query' % result['within_ms'])
+    stdout.write('full scan k=%d   %8.2f ms/query' % (K, result['full_scan_nearest_ms']))
+    return [result]
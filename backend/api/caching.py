@@ -0,0 +1,124 @@
+import hashlib
+import threading
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from .metrics import record_cache_lookup
+from .replicas import may_cache, note_write
+
+CACHE_ALIAS = 'api'
+
+# Models whose payloads embed fields of the key model (e.g. category_name).
+DEPENDENTS = {
+    'category': ('subcategory',),
+}
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def _record(counter):
+    with _stats_lock:
+        _stats[counter] += 1
+
+
+def cache_stats():
+    """Hit/miss counters of this process."""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+    return stats
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        for counter in _stats:
+            _stats[counter] = 0
+
+
+def _generation_key(label):
+    return 'generation:%s' % label
+
+
+def get_generation(label):
+    return get_cache().get_or_set(_generation_key(label), 1, timeout=None)
+
+
+def invalidate(model):
+    """Drop the cached payloads of ``model`` and its dependents by bumping their generation."""
+    cache = get_cache()
+    labels = (model._meta.model_name,) + DEPENDENTS.get(model._meta.model_name, ())
+    for label in labels:
+        key = _generation_key(label)
+        cache.add(key, 1, timeout=None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr(); any fresh value invalidates.
+            cache.set(key, 2, timeout=None)
+        note_write(label)
+    _record('invalidations')
+
+
+def payload_key(request, model):
+    label = model._meta.model_name
+    role = getattr(request.user, 'role', '')
+    # Includes the host, which pagination links embed.
+    uri = hashlib.md5(request.build_absolute_uri().encode('utf-8')).hexdigest()
+    return 'payload:%s:%s:%s:%s' % (label, role, get_generation(label), uri)
+
+
+def cached_payload(model):
+    """Cache a GET handler's response data per model generation, role and URI."""
+    def hit(data):
+        _record('hits')
+        record_cache_lookup(model, hit=True)
+        response = Response(data)
+        response['X-Cache'] = 'HIT'
+        return response
+
+    def decorator(method):
+        if iscoroutinefunction(method):
+            @wraps(method)
+            async def async_wrapper(view, request, *args, **kwargs):
+                cache = get_cache()
+                # payload_key() reads the generation with a blocking cache call.
+                key = await sync_to_async(payload_key)(request, model)
+                data = await cache.aget(key)
+                if data is not None:
+                    return hit(data)
+
+                _record('misses')
+                record_cache_lookup(model, hit=False)
+                response = await method(view, request, *args, **kwargs)
+                if response.status_code == 200 and await sync_to_async(may_cache)(model._meta.model_name):
+                    await cache.aset(key, response.data)
+                response['X-Cache'] = 'MISS'
+                return response
+            return async_wrapper
+
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            cache = get_cache()
+            key = payload_key(request, model)
+            data = cache.get(key)
+            if data is not None:
+                return hit(data)
+
+            _record('misses')
+            record_cache_lookup(model, hit=False)
+            response = method(view, request, *args, **kwargs)
+            if response.status_code == 200 and may_cache(model._meta.model_name):
+                cache.set(key, response.data)
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,404 @@
+"""
+Server-Sent Events change feed at CHANGE_FEED_PATH, served by
+admin_panel/asgi.py. One Broker per process polls ChangeEvent and fans each
+encoded event out to its subscribers; reconnecting clients are replayed
+what they missed after Last-Event-ID, or sent ``reset`` to delta-sync.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import timedelta
+from types import SimpleNamespace
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+from django.urls import resolve, reverse
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+
+from .authentication import ACCESS_EXP_CLAIM, StatelessJWTAuthentication, is_revoked, validate_stream_ticket
+from .models import ChangeEvent, Warehouse, Announcement, Category, SubCategory
+from .permissions import IsAdminUser
+from .renderers import FastJSONRenderer
+from .serializers import AnnouncementListSerializer, CategorySerializer, SubCategorySerializer, WarehouseSerializer
+
+logger = logging.getLogger(__name__)
+
+CHANGE_FEED_PATH = '/api/events/'
+
+DEFAULT_POLL_INTERVAL = 0.5
+DEFAULT_HEARTBEAT = 15
+DEFAULT_RETENTION = timedelta(days=1)
+DEFAULT_REPLAY_LIMIT = 1000
+# Events a subscriber may have waiting before it is disconnected.
+DEFAULT_BACKLOG = 5000
+BATCH_SIZE = 500
+# How long an id missing from the sequence is waited for: a transaction that
+# took its id before another one may commit after it (Postgres).
+GAP_TIMEOUT = 5
+MAX_GAPS = 1000
+RETRY_MS = 3000
+
+# Each event carries the row as the model's list endpoint returns it.
+FEEDS = {
+    'announcement': (
+        lambda: AnnouncementListSerializer.with_preview(Announcement.objects.select_related('created_by')),
+        AnnouncementListSerializer,
+    ),
+    'category': (lambda: Category.objects.all(), CategorySerializer),
+    'subcategory': (lambda: SubCategory.objects.select_related('category'), SubCategorySerializer),
+    'warehouse': (lambda: Warehouse.objects.all(), WarehouseSerializer),
+}
+
+def _setting(name, default):
+    return getattr(settings, 'CHANGE_FEED_%s' % name, default)
+
+
+def record_changes(model, pks, action):
+    """Publish ``action`` on the ``model`` rows ``pks``; call inside the writing transaction."""
+    label = model._meta.model_name
+    if label not in FEEDS:
+        return
+    now = timezone.now()
+    ChangeEvent.objects.bulk_create([
+        ChangeEvent(model=label, object_id=pk, action=action, created_at=now) for pk in pks if pk is not None
+    ])
+
+
+def record_change(instance, action):
+    record_changes(type(instance), [instance.pk], action)
+
+
+def prune_events(now=None):
+    cutoff = (now or timezone.now()) - _setting('RETENTION', DEFAULT_RETENTION)
+    deleted, _ = ChangeEvent.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+def allowed_models(user):
+    """The published models whose list views ``user`` may read."""
+    request = SimpleNamespace(user=user)
+    allowed = set()
+    for label in FEEDS:
+        view = resolve(reverse('%s-list' % label)).func.view_class()
+        if all(permission().has_permission(request, view) for permission in view.permission_classes):
+            allowed.add(label)
+    return frozenset(allowed)
+
+
+def encode(events):
+    """``[(model, event id, SSE bytes)]``."""
+    rows = {}
+    for label in {event.model for event in events if event.action != ChangeEvent.DELETE}:
+        queryset, _ = FEEDS[label]
+        pks = {event.object_id for event in events if event.model == label}
+        rows[label] = queryset().in_bulk(pks)
+    payloads = {}
+    for label, instances in rows.items():
+        _, serializer_class = FEEDS[label]
+        for pk, instance in instances.items():
+            payloads[label, pk] = serializer_class(instance).data
+
+    renderer = FastJSONRenderer()
+    messages = []
+    for event in events:
+        data = renderer.render({
+            'model': event.model,
+            'action': event.action,
+            'id': event.object_id,
+            # None when the row was deleted again before the event went out.
+            'data': payloads.get((event.model, event.object_id)),
+        })
+        messages.append((event.model, event.id, b'id: %d\nevent: change\ndata: %s\n\n' % (event.id, data)))
+    return messages
+
+
+def _fetch(after, gaps):
+    close_old_connections()
+    condition = Q(id__gt=after)
+    if gaps:
+        condition |= Q(id__in=list(gaps))
+    events = list(ChangeEvent.objects.filter(condition).order_by('id')[:BATCH_SIZE])
+    return events, encode(events)
+
+
+def _latest_id():
+    close_old_connections()
+    return ChangeEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def _replay(last_event_id, models, limit):
+    """Messages after ``last_event_id``, or None when some may be gone already."""
+    close_old_connections()
+    if not ChangeEvent.objects.filter(id__lte=last_event_id).exists():
+        return None
+    events = list(
+        ChangeEvent.objects.filter(id__gt=last_event_id, model__in=models).order_by('id')[:limit + 1]
+    )
+    if len(events) > limit:
+        return None
+    return encode(events)
+
+
+class Subscriber:
+    def __init__(self, models, backlog):
+        self.models = models
+        self.backlog = backlog
+        self.pending = deque()
+        self.size = 0
+        self.wake = asyncio.Event()
+        self.closed = False
+
+    def push(self, chunk, count):
+        self.pending.append(chunk)
+        self.size += count
+        if self.size > self.backlog:
+            self.closed = True
+        self.wake.set()
+
+    def close(self):
+        self.closed = True
+        self.wake.set()
+
+    def drain(self):
+        chunks, self.pending, self.size = self.pending, deque(), 0
+        self.wake.clear()
+        return b''.join(chunks)
+
+
+class Broker:
+    """Polls ChangeEvent for this process while it has subscribers and fans events out."""
+
+    def __init__(self):
+        self.subscribers = set()
+        self.task = None
+        self.last_id = None
+        # Missing event ids below last_id -> when they were first missed.
+        self.gaps = {}
+
+    def subscribe(self, subscriber):
+        self.subscribers.add(subscriber)
+        if self.task is None:
+            self.task = asyncio.get_running_loop().create_task(self.run())
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+
+    async def run(self):
+        try:
+            self.last_id = await sync_to_async(_latest_id)()
+            while self.subscribers:
+                try:
+                    more = await self.poll()
+                except Exception:
+                    logger.exception('Change feed poll failed')
+                    more = False
+                if not more:
+                    await asyncio.sleep(_setting('POLL_INTERVAL', DEFAULT_POLL_INTERVAL))
+        finally:
+            # Started again by the next subscriber, from the events after it.
+            self.task = None
+            self.gaps.clear()
+
+    async def poll(self):
+        events, messages = await sync_to_async(_fetch)(self.last_id, self.gaps)
+        now = time.monotonic()
+        for event in events:
+            self.gaps.pop(event.id, None)
+            if event.id > self.last_id:
+                for missing in range(self.last_id + 1, min(event.id, self.last_id + 1 + MAX_GAPS)):
+                    self.gaps[missing] = now
+                self.last_id = event.id
+        for missing, since in list(self.gaps.items()):
+            if now - since > GAP_TIMEOUT or len(self.gaps) > MAX_GAPS:
+                del self.gaps[missing]
+        if messages:
+            self.publish(messages)
+        return len(events) == BATCH_SIZE
+
+    def publish(self, messages):
+        # Subscribers share a handful of model sets; join each set's chunk once.
+        chunks = {}
+        for subscriber in list(self.subscribers):
+            key = subscriber.models
+            if key not in chunks:
+                selected = [message for model, _, message in messages if model in key]
+                chunks[key] = (b''.join(selected), len(selected))
+            chunk, count = chunks[key]
+            if count:
+                subscriber.push(chunk, count)
+
+
+broker = Broker()
+
+
+def _authenticate(raw_token, ticket):
+    authentication = StatelessJWTAuthentication()
+    token = validate_stream_ticket(raw_token) if ticket else authentication.get_validated_token(raw_token)
+    return authentication.get_user(token), token
+
+
+def _still_authorized(token):
+    if is_revoked(token):
+        return False
+    try:
+        user = StatelessJWTAuthentication().get_user(token)
+    except APIException:
+        return False
+    return IsAdminUser().has_permission(SimpleNamespace(user=user), None)
+
+
+def _cors_headers(request_headers):
+    origin = request_headers.get(b'origin')
+    if origin is None:
+        return []
+    if getattr(settings, 'CORS_ALLOW_ALL_ORIGINS', False):
+        return [(b'access-control-allow-origin', b'*')]
+    if origin.decode('latin-1') in getattr(settings, 'CORS_ALLOWED_ORIGINS', ()):
+        return [(b'access-control-allow-origin', origin), (b'vary', b'Origin')]
+    return []
+
+
+async def _respond(send, status, headers, body=b''):
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _error(send, status, detail, headers):
+    # Shaped like DRF's exception handler output.
+    body = FastJSONRenderer().render(detail if isinstance(detail, dict) else {'detail': detail})
+    await _respond(send, status, headers + [(b'content-type', b'application/json')], body)
+
+
+async def change_feed(scope, receive, send):
+    """
+    ASGI app streaming change events::
+
+        id: 42
+        event: change
+        data: {"model": "announcement", "action": "update", "id": 7, "data": {...}}
+
+    Authenticated by a Bearer header or a ``?ticket=`` from
+    POST /api/events/ticket/; the stream ends when the token expires or is
+    revoked.
+    """
+    headers = dict(scope['headers'])
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    cors = _cors_headers(headers)
+    if scope['method'] == 'OPTIONS':
+        await _respond(send, 200, cors + [
+            (b'access-control-allow-methods', b'GET, OPTIONS'),
+            (b'access-control-allow-headers', b'authorization, last-event-id, cache-control'),
+        ])
+        return
+    if scope['method'] != 'GET':
+        await _error(send, 405, 'Method "%s" not allowed.' % scope['method'], cors + [(b'allow', b'GET, OPTIONS')])
+        return
+
+    authorization = headers.get(b'authorization', b'').decode('latin-1').split()
+    if len(authorization) == 2 and authorization[0].lower() == 'bearer':
+        raw_token, ticket = authorization[1], False
+    else:
+        raw_token, ticket = query.get('ticket', [None])[0], True
+    if not raw_token:
+        await _error(send, 401, 'Authentication credentials were not provided.', cors)
+        return
+    try:
+        user, token = await sync_to_async(_authenticate)(raw_token, ticket)
+    except APIException as exc:
+        await _error(send, exc.status_code, exc.detail, cors)
+        return
+    if not IsAdminUser().has_permission(SimpleNamespace(user=user), None):
+        await _error(send, 403, 'You do not have permission to perform this action.', cors)
+        return
+
+    models = await sync_to_async(allowed_models)(user)
+    if 'models' in query:
+        models = models & frozenset(','.join(query['models']).split(','))
+    last_event_id = headers.get(b'last-event-id', b'').decode('latin-1') or query.get('last_event_id', [''])[0]
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        await _error(send, 400, 'Last-Event-ID must be an event id.', cors)
+        return
+
+    subscriber = Subscriber(models, _setting('BACKLOG', DEFAULT_BACKLOG))
+    # Subscribe before replaying so nothing falls between the two; events
+    # delivered by both are skipped the second time.
+    broker.subscribe(subscriber)
+
+    async def watch_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        subscriber.close()
+
+    watcher = asyncio.get_running_loop().create_task(watch_disconnect())
+    try:
+        await send({'type': 'http.response.start', 'status': 200, 'headers': cors + [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            # Tells nginx not to buffer the stream.
+            (b'x-accel-buffering', b'no'),
+        ]})
+        opening = b'retry: %d\n\n' % RETRY_MS
+        replayed = set()
+        if last_event_id is not None:
+            messages = await sync_to_async(_replay)(
+                last_event_id, models, _setting('REPLAY_LIMIT', DEFAULT_REPLAY_LIMIT)
+            )
+            if messages is None:
+                opening += b'event: reset\ndata: {}\n\n'
+            else:
+                opening += b''.join(message for _, _, message in messages)
+                replayed = {event_id for _, event_id, _ in messages}
+        await send({'type': 'http.response.body', 'body': opening, 'more_body': True})
+
+        heartbeat = _setting('HEARTBEAT', DEFAULT_HEARTBEAT)
+        expires_at = token.get(ACCESS_EXP_CLAIM, token['exp'])
+        checked_at = time.monotonic()
+        # The broker delivers a replayed event again at most until it has
+        # given up waiting for the gaps it saw around subscription time.
+        replay_overlap_until = checked_at + GAP_TIMEOUT + 2 * _setting('POLL_INTERVAL', DEFAULT_POLL_INTERVAL)
+        while not subscriber.closed:
+            remaining = expires_at - time.time()
+            if remaining <= 0:
+                break
+            if time.monotonic() - checked_at >= heartbeat:
+                if not await sync_to_async(_still_authorized)(token):
+                    break
+                checked_at = time.monotonic()
+            try:
+                await asyncio.wait_for(subscriber.wake.wait(), min(heartbeat, remaining))
+            except asyncio.TimeoutError:
+                await send({'type': 'http.response.body', 'body': b': ping\n\n', 'more_body': True})
+                continue
+            chunk = subscriber.drain()
+            if replayed and time.monotonic() < replay_overlap_until:
+                chunk = _skip_replayed(chunk, replayed)
+            if chunk and not subscriber.closed:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        broker.unsubscribe(subscriber)
+        watcher.cancel()
+
+
+def _skip_replayed(chunk, replayed):
+    """
+    ``chunk`` without the events in ``replayed``, which are discarded once
+    skipped. Ids, not a watermark: a late commit may have a lower id.
+    """
+    kept = []
+    for message in chunk.split(b'\n\n'):
+        if not message:
+            continue
+        event_id = int(message[4:message.index(b'\n')])
+        if event_id in replayed:
+            replayed.discard(event_id)
+        else:
+            kept.append(message + b'\n\n')
+    return b''.join(kept)
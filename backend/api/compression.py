@@ -0,0 +1,162 @@
+import gzip
+import re
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Responses smaller than this are sent as is: compressing a few hundred
+# bytes costs more CPU than it saves on the wire.
+DEFAULT_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+# Brotli's default quality (11) is meant for static assets; 4-5 compresses
+# dynamic JSON better than gzip -6 at a similar speed.
+BROTLI_QUALITY = 4
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/')
+
+ACCEPT_ENCODING_RE = re.compile(r'\s*([^\s;,]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?')
+
+
+def accepted_encodings(header):
+    """``{coding: q}`` from an Accept-Encoding header."""
+    encodings = {}
+    for part in header.split(','):
+        match = ACCEPT_ENCODING_RE.match(part)
+        if not match:
+            continue
+        try:
+            quality = float(match.group(2)) if match.group(2) is not None else 1.0
+        except ValueError:
+            continue
+        encodings[match.group(1).lower()] = quality
+    return encodings
+
+
+def choose_encoding(header):
+    """The best coding we support that the client accepts, or None."""
+    encodings = accepted_encodings(header or '')
+    wildcard = encodings.get('*', 0.0)
+    candidates = (['br'] if brotli is not None else []) + ['gzip']
+    best, best_quality = None, 0.0
+    for coding in candidates:
+        quality = encodings.get(coding, wildcard)
+        # Ties go to the earlier (denser) coding.
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress(data, coding):
+    if coding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _stream_compressor(coding):
+    """``(process, finish)`` of an incremental compressor for ``coding``."""
+    if coding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        return compressor.process, compressor.finish
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress, compressor.flush
+
+
+def compress_stream(chunks, coding):
+    process, finish = _stream_compressor(coding)
+    for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+async def acompress_stream(chunks, coding):
+    process, finish = _stream_compressor(coding)
+    # Each chunk is hundreds of rows; compress it off the event loop.
+    process = sync_to_async(process, thread_sensitive=False)
+    async for chunk in chunks:
+        data = await process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+class CompressionMiddleware:
+    """
+    Negotiated brotli/gzip compression of API responses.
+
+    Like django.middleware.gzip.GZipMiddleware, but with brotli when the
+    client and server both support it, a configurable size threshold
+    (API_COMPRESSION_MIN_SIZE) and only for text and JSON bodies. Streaming
+    responses are compressed chunk by chunk.
+
+    ETags are left strong, unlike GZipMiddleware: the validators in
+    conditional.py describe the data, not the bytes, and If-Match uses
+    strong comparison. Vary: Accept-Encoding keeps shared caches from mixing
+    up the encodings.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, 'API_COMPRESSION_MIN_SIZE', DEFAULT_MIN_SIZE)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        coding = self.choose_coding(request, response)
+        if coding is None:
+            return response
+        if response.streaming:
+            return self.compress_streaming(response, coding)
+        return self.replace_content(response, compress(response.content, coding), coding)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        coding = self.choose_coding(request, response)
+        if coding is None:
+            return response
+        if response.streaming:
+            return self.compress_streaming(response, coding)
+        # Compressing a large body takes milliseconds of CPU; not on the event loop.
+        compressed = await sync_to_async(compress, thread_sensitive=False)(response.content, coding)
+        return self.replace_content(response, compressed, coding)
+
+    def choose_coding(self, request, response):
+        """The encoding to compress ``response`` with, or None to leave it as it is."""
+        if response.has_header('Content-Encoding') or response.status_code == 206:
+            return None
+        content_type = response.get('Content-Type', '')
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return None
+        if not response.streaming and len(response.content) < self.min_size:
+            return None
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING'))
+
+    def compress_streaming(self, response, coding):
+        stream = acompress_stream if response.is_async else compress_stream
+        response.streaming_content = stream(response.streaming_content, coding)
+        del response['Content-Length']
+        response['Content-Encoding'] = coding
+        return response
+
+    def replace_content(self, response, compressed, coding):
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = coding
+        return response
@@ -0,0 +1,156 @@
+import hashlib
+from calendar import timegm
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import Announcement, SubCategory
+
+# Relations whose updated_at leaks into a model's serialized payload, e.g.
+# SubCategorySerializer.category_name. Their timestamps are folded into
+# detail validators so renaming a category changes its subcategories'
+# ETags. Collections rely on api.sync.touch_embedding_rows() instead, which
+# bumps the dependent rows' own updated_at, so their aggregate needs no join.
+EMBEDDED_RELATIONS = {
+    SubCategory: ('category',),
+    Announcement: ('created_by',),
+}
+
+
+def _validator(request, model, parts, timestamps):
+    timestamps = [ts for ts in timestamps if ts is not None]
+    last_modified = max(timestamps) if timestamps else None
+    role = getattr(request.user, 'role', '')
+    raw = '%s:%s:%s' % (model._meta.label_lower, role, ':'.join(str(part) for part in parts))
+    etag = '"%s"' % hashlib.md5(raw.encode('utf-8')).hexdigest()
+    return etag, last_modified
+
+
+LIST_AGGREGATES = {'count': Count('pk'), 'updated_at': Max('updated_at')}
+
+
+def _list_validator(request, model, values):
+    etag, _ = _validator(request, model, [values['count'], values['updated_at']], [values['updated_at']])
+    # No Last-Modified: deleting a row does not move Max(updated_at), so an
+    # If-Modified-Since check would answer 304 with the row still listed.
+    # The ETag covers deletions through the row count.
+    return etag, None
+
+
+def list_validator(request, model):
+    """ETag of a whole collection from one aggregate query; collections carry no Last-Modified."""
+    return _list_validator(request, model, model.objects.aggregate(**LIST_AGGREGATES))
+
+
+async def alist_validator(request, model):
+    return _list_validator(request, model, await model.objects.aaggregate(**LIST_AGGREGATES))
+
+
+def _detail_fields(model):
+    return ['updated_at'] + ['%s__updated_at' % relation for relation in EMBEDDED_RELATIONS.get(model, ())]
+
+
+def _detail_validator(request, model, pk, row):
+    if row is None:
+        return None, None
+    return _validator(request, model, [pk] + list(row), row)
+
+
+def detail_validator(request, model, pk, lock=False):
+    """ETag and Last-Modified of one row, or (None, None) when it does not exist."""
+    queryset = model.objects.filter(pk=pk)
+    if lock:
+        queryset = queryset.select_for_update(of=('self',))
+    row = queryset.values_list(*_detail_fields(model)).first()
+    return _detail_validator(request, model, pk, row)
+
+
+async def adetail_validator(request, model, pk):
+    row = await model.objects.filter(pk=pk).values_list(*_detail_fields(model)).afirst()
+    return _detail_validator(request, model, pk, row)
+
+
+def set_validator_headers(response, etag, last_modified):
+    if etag is not None:
+        response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(timegm(last_modified.utctimetuple()))
+
+
+def conditional(model):
+    """
+    Answer If-None-Match/If-Modified-Since with 304 and enforce
+    If-Match/If-Unmodified-Since before the wrapped handler runs.
+
+    Works for list handlers and for detail handlers taking a ``pk`` kwarg.
+    The validator is computed from updated_at without loading or
+    serializing any rows; successful responses carry ETag (and, for
+    details, Last-Modified) so clients can revalidate next time. Coroutine handlers
+    get their validator from the async ORM.
+    """
+    def compute(request, kwargs, lock=False):
+        if 'pk' in kwargs:
+            return detail_validator(request, model, kwargs['pk'], lock=lock)
+        return list_validator(request, model)
+
+    async def acompute(request, kwargs):
+        if 'pk' in kwargs:
+            return await adetail_validator(request, model, kwargs['pk'])
+        return await alist_validator(request, model)
+
+    def precondition_response(request, etag, last_modified):
+        if etag is None:
+            return None
+        precondition = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=timegm(last_modified.utctimetuple()) if last_modified else None,
+        )
+        if precondition is not None and precondition.status_code == 304:
+            set_validator_headers(precondition, etag, last_modified)
+        return precondition
+
+    def decorator(method):
+        if iscoroutinefunction(method):
+            @wraps(method)
+            async def async_wrapper(view, request, *args, **kwargs):
+                etag, last_modified = await acompute(request, kwargs)
+                precondition = precondition_response(request, etag, last_modified)
+                if precondition is not None:
+                    return precondition
+                response = await method(view, request, *args, **kwargs)
+                if response.status_code == 200:
+                    if request.method not in ('GET', 'HEAD'):
+                        etag, last_modified = await acompute(request, kwargs)
+                    set_validator_headers(response, etag, last_modified)
+                return response
+            return async_wrapper
+
+        def handle(view, request, *args, lock=False, **kwargs):
+            etag, last_modified = compute(request, kwargs, lock=lock)
+            precondition = precondition_response(request, etag, last_modified)
+            if precondition is not None:
+                return precondition
+
+            response = method(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                if request.method not in ('GET', 'HEAD'):
+                    # The write changed updated_at; hand back the new validator.
+                    etag, last_modified = compute(request, kwargs)
+                set_validator_headers(response, etag, last_modified)
+            return response
+
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            if request.method in ('GET', 'HEAD') or 'pk' not in kwargs:
+                return handle(view, request, *args, **kwargs)
+            # Check and write under one row lock, or two writers holding the
+            # same ETag could both pass If-Match and the second would win.
+            with transaction.atomic():
+                return handle(view, request, *args, lock=True, **kwargs)
+        return wrapper
+    return decorator
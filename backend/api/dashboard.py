@@ -0,0 +1,181 @@
+"""
+Dashboard statistics kept in DashboardCounter by signals and the bulk
+paths; rebuild() (``manage.py rebuild_dashboard_stats``) recounts them.
+"""
+from collections import Counter
+
+from django.apps import apps as global_apps
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import Announcement, DashboardCounter
+
+TOTAL = 'total'
+DEFAULT_TOP = 10
+
+# Model label -> (total bucket, {dimension: field}). Foreign keys are
+# bucketed by id; NULL is the '' bucket.
+COUNTED = {
+    'api.User': ('users', {'users_by_role': 'role'}),
+    'api.Warehouse': ('warehouses', {'warehouses_by_city': 'city'}),
+    'api.Category': ('categories', {}),
+    'api.SubCategory': ('subcategories', {}),
+    'api.Announcement': ('announcements', {
+        'announcements_by_category': 'category',
+        'announcements_by_subcategory': 'subcategory',
+        'announcements_by_author': 'created_by',
+    }),
+}
+
+
+def _bucket(value):
+    return '' if value is None else str(value)
+
+
+def _attnames(model):
+    _, dimensions = COUNTED[model._meta.label]
+    return {dimension: model._meta.get_field(field).attname for dimension, field in dimensions.items()}
+
+
+def buckets(instance):
+    name, _ = COUNTED[instance._meta.label]
+    return [(TOTAL, name)] + [
+        (dimension, _bucket(getattr(instance, attname)))
+        for dimension, attname in _attnames(type(instance)).items()
+    ]
+
+
+def adjust(deltas):
+    with transaction.atomic():
+        # A fixed order keeps concurrent writers from deadlocking on the rows.
+        for (dimension, bucket), delta in sorted(deltas.items()):
+            if not delta:
+                continue
+            rows = DashboardCounter.objects.filter(dimension=dimension, bucket=bucket)
+            if not rows.update(count=F('count') + delta):
+                DashboardCounter.objects.get_or_create(dimension=dimension, bucket=bucket)
+                rows.update(count=F('count') + delta)
+
+
+def count_created(model, instances, sign=1):
+    if model._meta.label not in COUNTED:
+        return
+    deltas = Counter()
+    for instance in instances:
+        for key in buckets(instance):
+            deltas[key] += sign
+    adjust(deltas)
+
+
+def snapshot(model, instances):
+    if model._meta.label not in COUNTED or not _attnames(model):
+        return {}
+    return {instance.pk: buckets(instance) for instance in instances}
+
+
+def count_updated(model, before, instances):
+    """Move ``instances`` out of their snapshot() buckets into their current ones."""
+    deltas = Counter()
+    for instance in instances:
+        if instance.pk not in before:
+            continue
+        for key in before[instance.pk]:
+            deltas[key] -= 1
+        for key in buckets(instance):
+            deltas[key] += 1
+    adjust(deltas)
+
+
+def remember_buckets(instance, update_fields=None):
+    """pre_save: remember the buckets the stored row is counted in, for count_saved()."""
+    attnames = _attnames(type(instance))
+    instance._dashboard_buckets = None
+    if instance._state.adding or not attnames:
+        return
+    fields = set(COUNTED[instance._meta.label][1].values()) | set(attnames.values())
+    if update_fields is not None and not fields & set(update_fields):
+        return
+    row = type(instance)._base_manager.filter(pk=instance.pk).values_list(*attnames.values()).first()
+    if row is not None:
+        name, _ = COUNTED[instance._meta.label]
+        instance._dashboard_buckets = [(TOTAL, name)] + [
+            (dimension, _bucket(value)) for dimension, value in zip(attnames, row)
+        ]
+
+
+def count_saved(instance, created):
+    if created:
+        count_created(type(instance), [instance])
+        return
+    before = getattr(instance, '_dashboard_buckets', None)
+    if before and before != buckets(instance):
+        count_updated(type(instance), {instance.pk: before}, [instance])
+
+
+def count_deleted(instance):
+    count_created(type(instance), [instance], sign=-1)
+    # on_delete=SET_NULL moves the announcements of a deleted category or
+    # subcategory to the '' bucket without sending signals.
+    for dimension, field in COUNTED['api.Announcement'][1].items():
+        if Announcement._meta.get_field(field).related_model is type(instance):
+            _empty_bucket(dimension, _bucket(instance.pk), on_delete_set_null=field != 'created_by')
+
+
+def _empty_bucket(dimension, bucket, on_delete_set_null):
+    with transaction.atomic():
+        row = DashboardCounter.objects.select_for_update().filter(dimension=dimension, bucket=bucket).first()
+        if row is None:
+            return
+        row.delete()
+        if on_delete_set_null and row.count:
+            adjust({(dimension, ''): row.count})
+
+
+def rebuild(apps=global_apps):
+    counter_model = apps.get_model('api', 'DashboardCounter')
+    with transaction.atomic():
+        counters = []
+        for label, (name, dimensions) in COUNTED.items():
+            model = apps.get_model(label)
+            counters.append(counter_model(dimension=TOTAL, bucket=name, count=model._base_manager.count()))
+            for dimension, field in dimensions.items():
+                attname = model._meta.get_field(field).attname
+                rows = model._base_manager.values_list(attname).annotate(rows=Count('pk')).order_by()
+                counters.extend(
+                    counter_model(dimension=dimension, bucket=_bucket(value), count=count) for value, count in rows
+                )
+        counter_model.objects.all().delete()
+        counter_model.objects.bulk_create(counters, batch_size=1000)
+    return len(counters)
+
+
+def _top(dimension, top):
+    return list(
+        DashboardCounter.objects.filter(dimension=dimension, count__gt=0)
+        .order_by('-count', 'bucket').values_list('bucket', 'count')[:top]
+    )
+
+
+def stats(top=DEFAULT_TOP):
+    """Every total, and the ``top`` largest buckets of each dimension."""
+    totals = dict.fromkeys((name for name, _ in COUNTED.values()), 0)
+    totals.update(DashboardCounter.objects.filter(dimension=TOTAL).values_list('bucket', 'count'))
+    result = {'totals': totals}
+    for label, (_, dimensions) in COUNTED.items():
+        model = global_apps.get_model(label)
+        for dimension, field_name in dimensions.items():
+            field = model._meta.get_field(field_name)
+            rows = _top(dimension, top)
+            if not field.is_relation:
+                result[dimension] = [{field.name: bucket, 'count': count} for bucket, count in rows]
+                continue
+            names = dict(
+                field.related_model._base_manager.filter(pk__in=[int(bucket) for bucket, _ in rows if bucket])
+                .values_list('pk', 'name')
+            )
+            result[dimension] = [
+                {'id': int(bucket) if bucket else None, 'name': names.get(int(bucket)) if bucket else None,
+                 'count': count}
+                for bucket, count in rows
+            ]
+    return result
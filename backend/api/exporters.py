@@ -0,0 +1,77 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+
+ANNOUNCEMENT_EXPORT_FIELDS = (
+    ('id', 'id'),
+    ('title', 'title'),
+    ('content', 'content'),
+    ('created_by', 'created_by_id'),
+    ('created_by_name', 'created_by__name'),
+    ('category', 'category_id'),
+    ('category_name', 'category__name'),
+    ('subcategory', 'subcategory_id'),
+    ('subcategory_name', 'subcategory__name'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+)
+
+CHUNK_SIZE = 2000
+# Rows are buffered into one write of roughly this many rows, which keeps
+# the per-yield overhead of StreamingHttpResponse off the hot loop.
+ROWS_PER_WRITE = 500
+
+
+async def iterate_in_thread(iterator):
+    """
+    ``iterator`` as an async iterator whose items are produced in the
+    request's worker thread, where its database cursor lives. Under ASGI,
+    Django reads a sync streaming iterator to the end before sending
+    anything, so a sync export would be held in memory whole.
+    """
+    iterator = iter(iterator)
+    done = object()
+    next_item = sync_to_async(next)
+    while True:
+        item = await next_item(iterator, done)
+        if item is done:
+            return
+        yield item
+
+
+def export_rows(queryset, fields=ANNOUNCEMENT_EXPORT_FIELDS, chunk_size=CHUNK_SIZE):
+    """
+    Yield plain tuples, joining related names in SQL and never caching the
+    queryset. Datetimes come out as ISO 8601 strings, the same as the API.
+    """
+    rows = queryset.values_list(*(lookup for _, lookup in fields)).iterator(chunk_size=chunk_size)
+    for row in rows:
+        yield tuple(value.isoformat() if isinstance(value, datetime) else value for value in row)
+
+
+def stream_csv(rows, fields=ANNOUNCEMENT_EXPORT_FIELDS):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in fields])
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % ROWS_PER_WRITE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream_ndjson(rows, fields=ANNOUNCEMENT_EXPORT_FIELDS):
+    names = [name for name, _ in fields]
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(names, row))))
+        if len(lines) == ROWS_PER_WRITE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
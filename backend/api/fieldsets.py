@@ -0,0 +1,89 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+FIELDS_PARAM = 'fields'
+
+
+def requested_fields(request):
+    """The field names listed in ``?fields=``, or None when absent."""
+    value = request.query_params.get(FIELDS_PARAM)
+    if value is None:
+        return None
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin that keeps only the fields named by a ``fields`` kwarg,
+    falling back to ``default_fields`` (all fields when None).
+
+        AnnouncementSerializer(rows, many=True, fields=['id', 'title'])
+    """
+
+    default_fields = None
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is None:
+            fields = self.default_fields
+        if fields is not None:
+            unknown = [name for name in fields if name not in self.fields]
+            if unknown:
+                raise serializers.ValidationError({
+                    FIELDS_PARAM: ['Unknown field(s): %s. Expected any of: %s.' % (
+                        ', '.join(unknown), ', '.join(self.fields)
+                    )]
+                })
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+def narrow_queryset(queryset, serializer, always=('id',)):
+    """
+    Restrict ``queryset`` with only() to the columns ``serializer`` reads,
+    and select_related() to the relations it traverses.
+
+    Fields whose source is an annotation on the queryset are left alone. If
+    any field reads something that is neither a model field nor an
+    annotation (a property, a method), the queryset is returned unchanged
+    rather than risk a deferred-field query per row.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    model = queryset.model
+    annotations = queryset.query.annotations
+    columns = set(always)
+    relations = set()
+    for field in serializer.fields.values():
+        if field.source == '*':
+            return queryset
+        attrs = field.source_attrs
+        if attrs[0] in annotations:
+            continue
+        current = model
+        path = []
+        for index, attr in enumerate(attrs):
+            try:
+                model_field = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                return queryset
+            path.append(attr)
+            if model_field.is_relation and index < len(attrs) - 1:
+                if not (model_field.many_to_one or model_field.one_to_one):
+                    return queryset
+                relations.add('__'.join(path))
+                current = model_field.related_model
+        columns.add('__'.join(path))
+    queryset = queryset.select_related(None)
+    if relations:
+        queryset = queryset.select_related(*relations)
+    return queryset.only(*columns)
+
+
+def sparse_queryset(request, queryset, serializer_class, always=('id',)):
+    """
+    ``(queryset, fields)`` for a read endpoint: the fields requested with
+    ``?fields=`` and the queryset narrowed to what serializing them reads.
+    """
+    fields = requested_fields(request)
+    return narrow_queryset(queryset, serializer_class(fields=fields), always), fields
@@ -0,0 +1,184 @@
+import math
+
+from django.db import models
+from django.db.models import Q
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+MAX_PRECISION = 12
+EARTH_RADIUS_KM = 6371.0088
+
+# Upper bound on the number of geohash cells one lookup may OR together;
+# each cell is one index range scan.
+MAX_CELLS = 32
+
+
+def encode(latitude, longitude, precision=MAX_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_range[0] + lng_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lng_range[0] = mid
+            else:
+                bits <<= 1
+                lng_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """(height, width) in degrees of a geohash cell of the given precision."""
+    bits = 5 * precision
+    lng_bits = (bits + 1) // 2
+    lat_bits = bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def wrap_longitude(longitude):
+    return (longitude + 180.0) % 360.0 - 180.0
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def neighbourhood(latitude, longitude, precision):
+    """The cell containing the point plus its (up to) eight neighbours."""
+    height, width = cell_size(precision)
+    cells = set()
+    for d_lat in (-height, 0, height):
+        lat = latitude + d_lat
+        if lat < -90.0 or lat > 90.0:
+            continue
+        for d_lng in (-width, 0, width):
+            cells.add(encode(lat, wrap_longitude(longitude + d_lng), precision))
+    return cells
+
+
+def covered_radius_km(latitude, precision):
+    """
+    Radius around a point guaranteed to lie inside its 3x3 neighbourhood:
+    at least one full cell in every direction.
+    """
+    height, width = cell_size(precision)
+    if height >= 180.0:
+        return math.inf
+    # Cells narrow towards the poles; use the width at the worse edge.
+    edge_lat = min(90.0, abs(latitude) + height)
+    width_km = math.radians(width) * EARTH_RADIUS_KM * math.cos(math.radians(edge_lat))
+    height_km = math.radians(height) * EARTH_RADIUS_KM
+    return min(width_km, height_km)
+
+
+def _split_antimeridian(min_lng, min_lat, max_lng, max_lat):
+    if min_lng <= max_lng:
+        return [(min_lng, min_lat, max_lng, max_lat)]
+    return [(min_lng, min_lat, 180.0, max_lat), (-180.0, min_lat, max_lng, max_lat)]
+
+
+def bbox_cells(min_lng, min_lat, max_lng, max_lat, max_cells=MAX_CELLS):
+    """
+    The geohash cells covering a bounding box, at the finest precision
+    that needs no more than ``max_cells`` of them. A single empty prefix
+    means the box is too large for any cell to help.
+    """
+    boxes = _split_antimeridian(min_lng, min_lat, max_lng, max_lat)
+    best = {''}
+    for precision in range(1, MAX_PRECISION + 1):
+        height, width = cell_size(precision)
+        grids = [
+            (box, int((box[3] - box[1]) / height) + 2, int((box[2] - box[0]) / width) + 2)
+            for box in boxes
+        ]
+        if sum(rows * columns for _, rows, columns in grids) > max_cells:
+            break
+        # Sample points one cell apart, plus the far edges, so every cell
+        # the box overlaps is hit at least once.
+        cells = set()
+        for (box_min_lng, box_min_lat, box_max_lng, box_max_lat), rows, columns in grids:
+            for row in range(rows):
+                lat = min(box_min_lat + row * height, box_max_lat)
+                for column in range(columns):
+                    lng = min(box_min_lng + column * width, box_max_lng)
+                    cells.add(encode(lat, lng, precision))
+        best = cells
+    return best
+
+
+def cells_q(cells, field='geohash'):
+    """
+    OR of prefix matches written as ranges, which use a plain B-tree index
+    on both SQLite and Postgres (LIKE 'abc%' does not, by default).
+    """
+    query = Q()
+    for cell in cells:
+        if not cell:
+            return Q()
+        # '~' sorts after every character of the geohash alphabet.
+        query |= Q(**{'%s__gte' % field: cell, '%s__lt' % field: cell + '~'})
+    return query
+
+
+def bbox_q(min_lng, min_lat, max_lng, max_lat):
+    """Exact bounding box filter on latitude/longitude."""
+    query = Q()
+    for box_min_lng, box_min_lat, box_max_lng, box_max_lat in _split_antimeridian(min_lng, min_lat, max_lng, max_lat):
+        query |= Q(
+            latitude__gte=box_min_lat, latitude__lte=box_max_lat,
+            longitude__gte=box_min_lng, longitude__lte=box_max_lng,
+        )
+    return query
+
+
+class GeohashField(models.CharField):
+    """
+    Geohash of the instance's latitude/longitude, recomputed on every save
+    (including bulk_create, which also calls pre_save()).
+    """
+
+    def __init__(self, *args, latitude_field='latitude', longitude_field='longitude', **kwargs):
+        self.latitude_field = latitude_field
+        self.longitude_field = longitude_field
+        kwargs.setdefault('max_length', MAX_PRECISION)
+        kwargs.setdefault('editable', False)
+        kwargs.setdefault('db_index', True)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.latitude_field != 'latitude':
+            kwargs['latitude_field'] = self.latitude_field
+        if self.longitude_field != 'longitude':
+            kwargs['longitude_field'] = self.longitude_field
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        latitude = getattr(model_instance, self.latitude_field)
+        longitude = getattr(model_instance, self.longitude_field)
+        value = '' if latitude is None or longitude is None else encode(float(latitude), float(longitude))
+        setattr(model_instance, self.attname, value)
+        return value
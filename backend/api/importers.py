@@ -0,0 +1,188 @@
+import csv
+import json
+from itertools import islice
+
+from django.db import transaction
+from rest_framework import serializers
+
+from .caching import invalidate
+from .changefeed import record_changes
+from .dashboard import count_created
+from .models import ChangeEvent, Warehouse
+from .serializers import WarehouseSerializer
+
+WAREHOUSE_FIELDS = ('city', 'latitude', 'longitude')
+FORMATS = ('csv', 'ndjson')
+
+DEFAULT_CHUNK_SIZE = 1000
+# Only the first errors are kept verbatim so a bad multi-million row file
+# cannot grow the report without bound; the rest are only counted.
+MAX_REPORTED_ERRORS = 100
+
+
+def guess_format(filename, default='csv'):
+    name = (filename or '').lower()
+    if name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    if name.endswith('.csv'):
+        return 'csv'
+    return default
+
+
+class ImportFileError(ValueError):
+    """The file as a whole cannot be read, e.g. it is not UTF-8 text; nothing was imported."""
+
+
+class DecodedLines:
+    """
+    Lines of a binary stream decoded as UTF-8, one at a time so a bad line
+    is known exactly. A line that is not UTF-8 is passed on with
+    replacement characters and its error kept in ``error`` for the caller
+    to report; a first line that is not UTF-8 means the file is not text.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.error = None
+
+    def __iter__(self):
+        for line_num, raw in enumerate(self.stream, start=1):
+            try:
+                yield raw.decode('utf-8-sig' if line_num == 1 else 'utf-8')
+            except UnicodeDecodeError as exc:
+                if line_num == 1:
+                    raise ImportFileError(
+                        'The file is not UTF-8 text (%s on line 1). Export it as UTF-8 CSV or NDJSON.' % exc.reason
+                    )
+                self.error = ValueError(
+                    'Not valid UTF-8 (byte 0x%02x at column %d); save the file as UTF-8.'
+                    % (exc.object[exc.start], exc.start + 1)
+                )
+                yield raw.decode('utf-8', 'replace')
+
+    def pop_error(self):
+        error, self.error = self.error, None
+        return error
+
+
+def read_csv(stream):
+    lines = DecodedLines(stream)
+    reader = csv.DictReader(iter(lines))
+    try:
+        reader.fieldnames
+    except csv.Error as exc:
+        raise ImportFileError('The CSV header cannot be read: %s.' % exc)
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as exc:
+            lines.pop_error()
+            yield reader.line_num, ValueError('Malformed CSV: %s.' % exc)
+            continue
+        error = lines.pop_error()
+        if error is not None:
+            yield reader.line_num, error
+            continue
+        # Header is line 1, so the first data row is line 2.
+        yield reader.line_num, {field: row.get(field) for field in WAREHOUSE_FIELDS}
+
+
+def read_ndjson(stream):
+    lines = DecodedLines(stream)
+    for line_num, line in enumerate(lines, start=1):
+        error = lines.pop_error()
+        if error is not None:
+            yield line_num, error
+            continue
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_num, exc
+            continue
+        if not isinstance(row, dict):
+            yield line_num, ValueError('Expected a JSON object.')
+            continue
+        yield line_num, {field: row.get(field) for field in WAREHOUSE_FIELDS}
+
+
+def read_rows(stream, fmt):
+    """
+    Lazily yield ``(line_number, row)`` from a UTF-8 encoded binary stream.
+
+    ``row`` is a dict of the warehouse fields, or an exception when the line
+    itself could not be parsed (malformed CSV or JSON, not UTF-8). A file
+    that cannot be read at all raises ImportFileError before any row.
+    """
+    if fmt == 'csv':
+        return read_csv(stream)
+    if fmt == 'ndjson':
+        return read_ndjson(stream)
+    raise ValueError('Unknown format %r, expected one of %s' % (fmt, ', '.join(FORMATS)))
+
+
+class ImportReport:
+    def __init__(self):
+        self.processed = 0
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, line, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'processed': self.processed,
+            'created': self.created,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
+
+
+def import_warehouses(rows, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Validate and insert warehouses from ``read_rows()`` output chunk by chunk.
+
+    Only one chunk is held in memory at a time. Each chunk's valid rows are
+    inserted with a single bulk_create in their own transaction; invalid rows
+    are reported by line number and skipped. ``progress`` is called with the
+    report after every chunk.
+    """
+    validator = WarehouseSerializer()
+    report = ImportReport()
+    rows = iter(rows)
+    try:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            warehouses = []
+            for line, row in chunk:
+                report.processed += 1
+                if isinstance(row, Exception):
+                    report.add_error(line, {'non_field_errors': [str(row)]})
+                    continue
+                try:
+                    attrs = validator.run_validation(row)
+                except serializers.ValidationError as exc:
+                    report.add_error(line, exc.detail)
+                    continue
+                warehouses.append(Warehouse(**attrs))
+            with transaction.atomic():
+                Warehouse.objects.bulk_create(warehouses)
+                record_changes(Warehouse, [warehouse.pk for warehouse in warehouses], ChangeEvent.CREATE)
+                count_created(Warehouse, warehouses)
+            report.created += len(warehouses)
+            if progress is not None:
+                progress(report)
+    finally:
+        if report.created:
+            # bulk_create() sends no post_save.
+            invalidate(Warehouse)
+    return report
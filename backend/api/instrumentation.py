@@ -0,0 +1,238 @@
+import cProfile
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger('api.slow_requests')
+
+DEFAULT_SLOW_REQUEST_MS = 500
+# Bounds on what one request keeps for the slow log.
+MAX_RECORDED_QUERIES = 200
+MAX_LOGGED_QUERIES = 20
+MAX_SQL_LENGTH = 2000
+
+_current = ContextVar('api_request_timing', default=None)
+
+
+class RequestTiming:
+    """Where the time of one request went."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.wall = 0.0
+        self.db_time = 0.0
+        self.query_count = 0
+        self.queries = []
+        self.phases = {}
+        self._open_phases = set()
+        self.response_size = None
+
+    def record_query(self, sql, duration):
+        self.query_count += 1
+        self.db_time += duration
+        if len(self.queries) < MAX_RECORDED_QUERIES:
+            self.queries.append((duration, sql))
+
+    def finish(self):
+        self.wall = time.perf_counter() - self.started
+
+    def server_timing(self):
+        metrics = [
+            'db;dur=%.2f;desc="%d queries"' % (self.db_time * 1000, self.query_count),
+        ]
+        for name, duration in self.phases.items():
+            metrics.append('%s;dur=%.2f' % (name, duration * 1000))
+        if self.response_size is not None:
+            metrics.append('size;desc="%d bytes"' % self.response_size)
+        metrics.append('total;dur=%.2f' % (self.wall * 1000))
+        return ', '.join(metrics)
+
+    def as_dict(self):
+        return {
+            'wall_ms': round(self.wall * 1000, 2),
+            'db_ms': round(self.db_time * 1000, 2),
+            'queries': self.query_count,
+            'phases_ms': {name: round(duration * 1000, 2) for name, duration in self.phases.items()},
+            'response_bytes': self.response_size,
+        }
+
+
+def current_timing():
+    return _current.get()
+
+
+def record_query(execute, sql, params, many, context):
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.record_query(sql, time.perf_counter() - started)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """
+    connection_created receiver: charge the connection's queries to the
+    request being timed. Installed on the connection itself because under
+    ASGI a request's queries run on connections of worker threads; the
+    request's timing follows them there in the context.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+@contextmanager
+def measure(phase):
+    """
+    Charge the time spent in the block to ``phase`` of the current request,
+    minus any database time inside it (which is already counted as db).
+    Nested blocks of the same phase are counted once.
+    """
+    timing = _current.get()
+    if timing is None or phase in timing._open_phases:
+        yield
+        return
+    timing._open_phases.add(phase)
+    started = time.perf_counter()
+    db_before = timing.db_time
+    try:
+        yield
+    finally:
+        timing._open_phases.discard(phase)
+        elapsed = time.perf_counter() - started - (timing.db_time - db_before)
+        timing.phases[phase] = timing.phases.get(phase, 0.0) + max(elapsed, 0.0)
+
+
+class TimedSerializerMixin:
+    """Serializer mixin charging the time spent building ``.data`` to the 'serialize' phase."""
+
+    @property
+    def data(self):
+        with measure('serialize'):
+            return super().data
+
+
+def profile_sample_rate(request, view_func):
+    """
+    Sampling rate for cProfile capture of this request's view: the
+    API_PROFILE_SAMPLE_RATES setting (by URL name) wins over the view's
+    ``profile_sample_rate`` attribute.
+    """
+    rates = getattr(settings, 'API_PROFILE_SAMPLE_RATES', {})
+    match = request.resolver_match
+    if match is not None and match.url_name in rates:
+        return rates[match.url_name]
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    return getattr(view_class, 'profile_sample_rate', 0.0)
+
+
+def save_profile(profiler, request):
+    directory = getattr(settings, 'API_PROFILE_DIR', None) or os.path.join(tempfile.gettempdir(), 'api-profiles')
+    os.makedirs(directory, exist_ok=True)
+    name = request.resolver_match.url_name if request.resolver_match else 'unresolved'
+    path = os.path.join(directory, '%s-%d-%d.prof' % (name, time.time() * 1000, os.getpid()))
+    profiler.dump_stats(path)
+    return path
+
+
+class TimingMiddleware:
+    """
+    Measure wall time, query count, DB time, serializer time and response
+    size of every request.
+
+    The numbers go out in a Server-Timing header (API_SERVER_TIMING) and,
+    for requests slower than API_SLOW_REQUEST_MS, into a JSON line on the
+    ``api.slow_requests`` logger together with the slowest SQL statements.
+    Views with a non-zero ``profile_sample_rate`` (or an entry in
+    API_PROFILE_SAMPLE_RATES) have that fraction of requests run under
+    cProfile, the stats written to API_PROFILE_DIR.
+
+    Keep it first in MIDDLEWARE so the timings cover the whole stack. Under
+    ASGI requests are not profiled: cProfile follows one thread, while an
+    async request hops between the event loop and worker threads.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'API_SERVER_TIMING', True)
+        self.slow_request_ms = getattr(settings, 'API_SLOW_REQUEST_MS', DEFAULT_SLOW_REQUEST_MS)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timing = RequestTiming()
+        token = _current.set(timing)
+        request._profiler = None
+        try:
+            response = self.get_response(request)
+        finally:
+            self.stop_profiler(request)
+            _current.reset(token)
+        return self.finish(request, response, timing)
+
+    async def __acall__(self, request):
+        timing = RequestTiming()
+        token = _current.set(timing)
+        request._profiler = None
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.stop_profiler(request)
+            _current.reset(token)
+        return self.finish(request, response, timing)
+
+    def stop_profiler(self, request):
+        if request._profiler is not None:
+            request._profiler.disable()
+
+    def finish(self, request, response, timing):
+        if not response.streaming:
+            timing.response_size = len(response.content)
+        timing.finish()
+        if self.server_timing:
+            response['Server-Timing'] = timing.server_timing()
+        if request._profiler is not None:
+            path = save_profile(request._profiler, request)
+            logger.info('Profiled %s %s to %s', request.method, request.path, path)
+        if timing.wall * 1000 >= self.slow_request_ms:
+            self.log_slow_request(request, response, timing)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if iscoroutinefunction(self):
+            return None
+        rate = profile_sample_rate(request, view_func)
+        if rate and random.random() < rate:
+            request._profiler = cProfile.Profile()
+            request._profiler.enable()
+        return None
+
+    def log_slow_request(self, request, response, timing):
+        slowest = sorted(timing.queries, key=lambda query: query[0], reverse=True)[:MAX_LOGGED_QUERIES]
+        record = {
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': request.resolver_match.view_name if request.resolver_match else None,
+            'status': response.status_code,
+            **timing.as_dict(),
+            'sql': [
+                {'ms': round(duration * 1000, 2), 'sql': sql[:MAX_SQL_LENGTH]}
+                for duration, sql in slowest
+            ],
+        }
+        logger.warning(json.dumps(record), extra={'timing': record})
@@ -0,0 +1,32 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks import BENCHMARKS, load, test_database
+
+
+class Command(BaseCommand):
+    help = 'Run one or more benchmarks from api/benchmarks against a throwaway test database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='Benchmarks to run (default: all). Choices: %s.' % ', '.join(BENCHMARKS))
+        parser.add_argument('--rows', type=int, help="Row count to benchmark with (default: each benchmark's own).")
+        parser.add_argument('--json', dest='json_path', help='Also write the results to this JSON file.')
+
+    def handle(self, *args, **options):
+        names = options['names'] or list(BENCHMARKS)
+        unknown = [name for name in names if name not in BENCHMARKS]
+        if unknown:
+            raise CommandError('Unknown benchmark(s): %s' % ', '.join(unknown))
+
+        report = {}
+        for name in names:
+            module = load(name)
+            rows = options['rows'] or module.DEFAULT_ROWS
+            self.stdout.write(self.style.MIGRATE_HEADING('%s (%d rows)' % (name, rows)))
+            with test_database():
+                report[name] = module.run(rows, self.stdout)
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as fh:
+                json.dump(report, fh, indent=2)
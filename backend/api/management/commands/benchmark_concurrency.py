@@ -0,0 +1,49 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from api.benchmarks.concurrency import (
+    CONFIGURATIONS, DEFAULT_CONCURRENCY, DEFAULT_REQUESTS, DEFAULT_ROWS, DEFAULT_WORKERS, run_matrix,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare throughput and tail latency of a mixed read/write workload against gunicorn with 1..N workers, '
+        'with and without persistent connections and the SQLite pragmas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=DEFAULT_ROWS, help='Announcements to seed (default: %(default)s).')
+        parser.add_argument('--requests', type=int, default=DEFAULT_REQUESTS, help='Requests per run.')
+        parser.add_argument(
+            '--workers', default=','.join(str(count) for count in DEFAULT_WORKERS),
+            help='Comma separated gunicorn worker counts (default: %(default)s).',
+        )
+        parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Requests in flight at once.')
+        parser.add_argument(
+            '--configurations', default=','.join(CONFIGURATIONS),
+            help='Comma separated server configurations (default: %(default)s).',
+        )
+        parser.add_argument('--json', dest='json_path', help='Also write the results to this JSON file.')
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('The workers share the test database through a SQLite file.')
+        try:
+            workers = [int(count) for count in options['workers'].split(',')]
+        except ValueError:
+            raise CommandError('--workers must be a comma separated list of integers')
+        names = options['configurations'].split(',')
+        unknown = [name for name in names if name not in CONFIGURATIONS]
+        if unknown:
+            raise CommandError('Unknown configuration(s): %s' % ', '.join(unknown))
+
+        results = run_matrix(
+            options['rows'], options['requests'], workers, options['concurrency'],
+            {name: CONFIGURATIONS[name] for name in names}, self.stdout,
+        )
+        if options['json_path']:
+            with open(options['json_path'], 'w') as fh:
+                json.dump(results, fh, indent=2)
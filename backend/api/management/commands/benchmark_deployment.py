@@ -0,0 +1,42 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from api.benchmarks.deployment import (
+    DEFAULT_CONCURRENCY, DEFAULT_REQUESTS, DEFAULT_ROWS, DEFAULT_WORKERS, DEPLOYMENTS, run_matrix,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare throughput and tail latency of small reads mixed with large list pages under the WSGI '
+        '(sync and threaded workers) and ASGI (uvicorn workers, async read views) deployments.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=DEFAULT_ROWS, help='Announcements to seed (default: %(default)s).')
+        parser.add_argument('--requests', type=int, default=DEFAULT_REQUESTS, help='Requests per run.')
+        parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='gunicorn workers per deployment.')
+        parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Requests in flight at once.')
+        parser.add_argument(
+            '--deployments', default=','.join(DEPLOYMENTS),
+            help='Comma separated deployments (default: %(default)s).',
+        )
+        parser.add_argument('--json', dest='json_path', help='Also write the results to this JSON file.')
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('The workers share the test database through a SQLite file.')
+        names = options['deployments'].split(',')
+        unknown = [name for name in names if name not in DEPLOYMENTS]
+        if unknown:
+            raise CommandError('Unknown deployment(s): %s' % ', '.join(unknown))
+
+        results = run_matrix(
+            options['rows'], options['requests'], options['workers'], options['concurrency'],
+            {name: DEPLOYMENTS[name] for name in names}, self.stdout,
+        )
+        if options['json_path']:
+            with open(options['json_path'], 'w') as fh:
+                json.dump(results, fh, indent=2)
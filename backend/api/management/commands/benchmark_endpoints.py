@@ -0,0 +1,91 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from api.benchmarks import test_database
+from api.benchmarks.endpoints import (
+    DEFAULT_ITERATIONS, DEFAULT_ROWS, DEFAULT_TOLERANCE, GunicornServer, benchmark, compare,
+)
+
+# Committed results of the default run; refresh with --save-baseline after
+# an intended change in performance.
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, 'benchmarks', 'baseline.json')
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway database and measure p50/p95/p99 latency, throughput, query count and peak RSS '
+        'of every API route, in process or through a local gunicorn, and compare them with the committed baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=DEFAULT_ROWS, help='Announcements to seed (default: %(default)s).')
+        parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS, help='Requests per scenario.')
+        parser.add_argument('--gunicorn', action='store_true', help='Serve the requests from a local gunicorn.')
+        parser.add_argument('--workers', type=int, default=2, help='gunicorn workers (default: %(default)s).')
+        parser.add_argument('--concurrency', type=int, default=1, help='Requests in flight at once with --gunicorn.')
+        parser.add_argument('--json', dest='json_path', help='Write the results to this JSON file.')
+        parser.add_argument(
+            '--baseline', default=DEFAULT_BASELINE,
+            help='Fail on regressions against the results in this JSON file (default: %(default)s).',
+        )
+        parser.add_argument('--no-baseline', action='store_true', help='Do not compare against any baseline.')
+        parser.add_argument(
+            '--save-baseline', nargs='?', const=DEFAULT_BASELINE,
+            help='Write the results to this JSON file as the new baseline (default: %s).' % DEFAULT_BASELINE,
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=DEFAULT_TOLERANCE,
+            help='Allowed p95 slowdown against the baseline, as a fraction (default: %(default)s).',
+        )
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1 or options['iterations'] < 1:
+            raise CommandError('--rows and --iterations must be positive.')
+        run = {
+            'rows': options['rows'],
+            'iterations': options['iterations'],
+            'transport': 'gunicorn' if options['gunicorn'] else 'client',
+            'workers': options['workers'] if options['gunicorn'] else None,
+            'concurrency': options['concurrency'] if options['gunicorn'] else 1,
+        }
+        baseline = None
+        if not options['no_baseline'] and not options['save_baseline']:
+            try:
+                with open(options['baseline']) as fh:
+                    baseline = json.load(fh)
+                baseline_run = {key: baseline[key] for key in run}
+            except (OSError, ValueError, KeyError) as exc:
+                raise CommandError('Cannot read baseline %s: %s' % (options['baseline'], exc))
+            if run != baseline_run:
+                raise CommandError(
+                    'Baseline %s was measured with %s, this run uses %s; pass the same options, '
+                    '--save-baseline or --no-baseline.' % (options['baseline'], baseline_run, run)
+                )
+
+        if options['gunicorn']:
+            if connections['default'].vendor != 'sqlite':
+                raise CommandError('--gunicorn shares the test database through a SQLite file.')
+            database = os.path.abspath('endpoint-benchmark-%d.sqlite3' % os.getpid())
+            with test_database(sqlite_file=database), GunicornServer(database, options['workers']) as server:
+                results = benchmark(
+                    options['rows'], options['iterations'], server, options['concurrency'], self.stdout,
+                )
+        else:
+            with test_database():
+                results = benchmark(options['rows'], options['iterations'], stdout=self.stdout)
+
+        report = dict(run, results=results)
+        for path in (options['json_path'], options['save_baseline']):
+            if path:
+                with open(path, 'w') as fh:
+                    json.dump(report, fh, indent=2)
+
+        if baseline is not None:
+            regressions = compare(results, baseline['results'], options['tolerance'])
+            if regressions:
+                raise CommandError('Regressions against %s:\n  %s' % (options['baseline'], '\n  '.join(regressions)))
+            self.stdout.write(self.style.SUCCESS('No regressions against %s.' % options['baseline']))
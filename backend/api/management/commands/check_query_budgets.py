@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks import test_database
+from api.querybudget import DEFAULT_SIZES, check_budgets
+
+
+class Command(BaseCommand):
+    help = 'Assert the exact query count of every read endpoint against a throwaway test database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+            help='Comma separated row counts to seed before measuring (default: %(default)s).',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--sizes must be a comma separated list of integers')
+
+        with test_database():
+            rows = check_budgets(sizes)
+
+        failures = []
+        for size, name, queries, budget, error in rows:
+            line = '%8d rows  %-22s %3d / %d queries' % (size, name, queries, budget)
+            if error:
+                failures.append(error)
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+
+        if failures:
+            raise CommandError('%d endpoint(s) over budget:\n\n%s' % (len(failures), '\n\n'.join(failures)))
+        self.stdout.write(self.style.SUCCESS('All endpoints within query budget.'))
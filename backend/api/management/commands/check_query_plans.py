@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks import test_database
+from api.queryplans import check_plans
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN every query the read endpoints run against a seeded throwaway test database '
+        'and fail on full table scans and temporary sorts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help='Announcements to seed (default: %(default)s).')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan, not only failing ones.')
+
+    def handle(self, *args, **options):
+        with test_database():
+            rows = check_plans(announcements=options['rows'])
+
+        failures = []
+        for label, url, sql, plan, problems in rows:
+            line = '%-22s %s' % (label, url)
+            if problems:
+                failures.append('GET %s\n%s\nplan:\n  %s\nproblems:\n  %s' % (
+                    url, sql, '\n  '.join(plan), '\n  '.join('%s: %s' % (problem, text) for problem, _, text in problems),
+                ))
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+            if problems or options['verbose_plans']:
+                for text in plan:
+                    self.stdout.write('    %s' % text)
+
+        if failures:
+            raise CommandError('%d query plan(s) scan or sort:\n\n%s' % (len(failures), '\n\n'.join(failures)))
+        self.stdout.write(self.style.SUCCESS('No full table scans or temporary sorts.'))
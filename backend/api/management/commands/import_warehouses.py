@@ -0,0 +1,42 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.importers import (
+    DEFAULT_CHUNK_SIZE, FORMATS, ImportFileError, guess_format, import_warehouses, read_rows,
+)
+
+
+class Command(BaseCommand):
+    help = 'Stream warehouses from a CSV or NDJSON file of city,latitude,longitude rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' to read standard input.")
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension, else csv.')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+
+        def progress(report):
+            self.stdout.write('%d processed, %d created, %d errors' % (
+                report.processed, report.created, report.error_count
+            ))
+
+        try:
+            stream = sys.stdin.buffer if path == '-' else open(path, 'rb')
+        except OSError as exc:
+            raise CommandError(exc)
+        with stream:
+            try:
+                report = import_warehouses(read_rows(stream, fmt), options['chunk_size'], progress)
+            except ImportFileError as exc:
+                raise CommandError('%s: %s' % (path, exc))
+
+        for error in report.errors:
+            self.stderr.write('line %d: %s' % (error['line'], json.dumps(error['errors'])))
+        if report.error_count > len(report.errors):
+            self.stderr.write('... and %d more errors' % (report.error_count - len(report.errors)))
+        self.stdout.write(self.style.SUCCESS('Imported %d of %d warehouses.' % (report.created, report.processed)))
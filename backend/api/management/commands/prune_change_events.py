@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api import changefeed
+
+
+class Command(BaseCommand):
+    help = 'Delete change feed events older than CHANGE_FEED_RETENTION; run it hourly.'
+
+    def handle(self, *args, **options):
+        deleted = changefeed.prune_events()
+        self.stdout.write(self.style.SUCCESS('Deleted %d change events.' % deleted))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from api import sync
+
+
+class Command(BaseCommand):
+    help = 'Delete tombstones of deleted rows older than TOMBSTONE_RETENTION; run it daily.'
+
+    def handle(self, *args, **options):
+        deleted = sync.prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(
+            'Deleted %d tombstones older than %s.' % (deleted, sync.retention())
+        ))
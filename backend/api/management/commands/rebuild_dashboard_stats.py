@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api import dashboard
+
+
+class Command(BaseCommand):
+    help = 'Recount the dashboard statistics summary table from scratch, e.g. after writes that bypassed signals.'
+
+    def handle(self, *args, **options):
+        counters = dashboard.rebuild()
+        self.stdout.write(self.style.SUCCESS('Rebuilt %d dashboard counters.' % counters))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from api import search
+
+
+class Command(BaseCommand):
+    help = 'Recreate the announcement full-text index and its sync triggers, then reindex every row.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        search.rebuild(connection)
+        self.stdout.write(self.style.SUCCESS('Rebuilt the %s announcement search index.' % connection.vendor))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.seeding import DEFAULT_BATCH_SIZE, DEFAULT_SEED, SEED_PASSWORD, seed_dataset
+
+
+class Command(BaseCommand):
+    help = 'Insert a reproducible synthetic dataset of users, warehouses, categories and announcements.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--warehouses', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=12)
+        parser.add_argument('--subcategories', type=int, default=5, help='Per category (default: %(default)s).')
+        parser.add_argument('--announcements', type=int, default=10000)
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='Same seed, same rows.')
+
+    def handle(self, *args, **options):
+        counts = ('users', 'warehouses', 'categories', 'subcategories', 'announcements', 'batch_size')
+        if any(options[name] < 0 for name in counts) or options['batch_size'] == 0:
+            raise CommandError('Counts must be non-negative and --batch-size positive.')
+
+        def progress(model, created):
+            self.stdout.write('%s: %d' % (model._meta.verbose_name_plural, created))
+
+        created = seed_dataset(
+            users=options['users'], warehouses=options['warehouses'], categories=options['categories'],
+            subcategories=options['subcategories'], announcements=options['announcements'],
+            batch_size=options['batch_size'], seed=options['seed'], progress=progress,
+        )
+        summary = ', '.join('%s: %d' % (name, count) for name, count in created.items())
+        self.stdout.write(self.style.SUCCESS('Seeded %s. Password for every user: %s' % (summary, SEED_PASSWORD)))
@@ -0,0 +1,43 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the SQLite database into the SQLite read replicas of DATABASE_REPLICA_URLS, a local stand-in for '
+        'replication. With --interval, keep copying to simulate a replica that lags by up to that many seconds.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, help='Copy again every this many seconds until interrupted.')
+
+    def handle(self, *args, **options):
+        primary = connections['default']
+        if primary.vendor != 'sqlite':
+            raise CommandError('Only a SQLite database can be copied; real replicas use the server\'s replication.')
+        paths = [
+            settings.DATABASES[alias]['NAME'] for alias in settings.DATABASE_REPLICAS
+            if connections[alias].vendor == 'sqlite'
+        ]
+        if not paths:
+            raise CommandError('No SQLite replica in DATABASE_REPLICA_URLS.')
+
+        while True:
+            primary.ensure_connection()
+            for path in paths:
+                # The online backup API copies a consistent snapshot, and
+                # replica connections that are already open see the new pages.
+                replica = sqlite3.connect(path)
+                try:
+                    primary.connection.backup(replica)
+                finally:
+                    replica.close()
+            self.stdout.write('Copied the database to %s.' % ', '.join(paths))
+            if not options['interval']:
+                return
+            primary.close()
+            time.sleep(options['interval'])
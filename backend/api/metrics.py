@@ -0,0 +1,136 @@
+import ipaddress
+import os
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+)
+from prometheus_client import multiprocess
+from rest_framework.throttling import BaseThrottle
+
+from .instrumentation import current_timing
+
+# Under gunicorn every worker writes its samples to memory-mapped files in
+# PROMETHEUS_MULTIPROC_DIR (see gunicorn.conf.py) and the scrape endpoint
+# merges them, so whichever worker answers reports the whole server.
+MULTIPROCESS = bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+REQUEST_LABELS = ('view', 'method', 'status', 'role')
+
+REQUESTS = Counter('api_requests_total', 'HTTP requests handled.', REQUEST_LABELS)
+LATENCY = Histogram(
+    'api_request_duration_seconds', 'Wall time spent handling a request.', REQUEST_LABELS, buckets=LATENCY_BUCKETS,
+)
+IN_FLIGHT = Gauge('api_requests_in_flight', 'Requests currently being handled.', multiprocess_mode='livesum')
+DB_QUERIES = Histogram(
+    'api_db_queries_per_request', 'Database queries run by one request.', ('view',), buckets=QUERY_COUNT_BUCKETS,
+)
+DB_DURATION = Histogram(
+    'api_db_duration_seconds', 'Database time spent by one request.', ('view',), buckets=LATENCY_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    'api_cache_lookups_total', 'Payload cache lookups; hit ratio is hit / (hit + miss).', ('model', 'result'),
+)
+
+
+def view_label(request):
+    # URL names only: labelling by raw path would make one series per id.
+    match = request.resolver_match
+    if match is None:
+        return 'unmatched'
+    return match.url_name or match.view_name
+
+
+def role_label(request):
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return 'anonymous'
+    return getattr(user, 'role', '') or 'unknown'
+
+
+def record_cache_lookup(model, hit):
+    CACHE_LOOKUPS.labels(model._meta.model_name, 'hit' if hit else 'miss').inc()
+
+
+class MetricsMiddleware:
+    """
+    Count, time and label every request for the /metrics endpoint.
+
+    Place it right after TimingMiddleware: it reads the DB numbers that
+    middleware collects, and DRF has set request.user (hence the role)
+    by the time the response comes back through it.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            IN_FLIGHT.dec()
+        self.observe(request, response, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            IN_FLIGHT.dec()
+        self.observe(request, response, time.perf_counter() - started)
+        return response
+
+    def observe(self, request, response, elapsed):
+        view = view_label(request)
+        labels = (view, request.method, str(response.status_code), role_label(request))
+        REQUESTS.labels(*labels).inc()
+        LATENCY.labels(*labels).observe(elapsed)
+        timing = current_timing()
+        if timing is not None:
+            DB_QUERIES.labels(view).observe(timing.query_count)
+            DB_DURATION.labels(view).observe(timing.db_time)
+
+
+def is_loopback(request):
+    """Whether the client (see LoginRateThrottle for how proxies are handled) is this host."""
+    try:
+        return ipaddress.ip_address(BaseThrottle().get_ident(request)).is_loopback
+    except ValueError:
+        return False
+
+
+def metrics_view(request):
+    """
+    Prometheus text exposition of every worker's metrics. Requires
+    ``Authorization: Bearer <METRICS_TOKEN>`` when that setting is set, and
+    is only served to clients on this host when it is not.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token:
+        if not constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), 'Bearer %s' % token):
+            return HttpResponseForbidden()
+    elif not is_loopback(request):
+        return HttpResponseForbidden()
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-17 22:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_category_subcategory_announcement_category_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['created_at', 'id'], name='announcement_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['created_at', 'id'], name='category_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subcategory',
+            index=models.Index(fields=['created_at', 'id'], name='subcategory_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='warehouse',
+            index=models.Index(fields=['created_at', 'id'], name='warehouse_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2 on 2026-10-17 22:51
+
+import api.geo
+from django.db import migrations
+
+
+def backfill_geohash(apps, schema_editor):
+    Warehouse = apps.get_model('api', 'Warehouse')
+    batch = []
+    for warehouse in Warehouse.objects.only('id', 'latitude', 'longitude').iterator(chunk_size=2000):
+        warehouse.geohash = api.geo.encode(warehouse.latitude, warehouse.longitude)
+        batch.append(warehouse)
+        if len(batch) == 2000:
+            Warehouse.objects.bulk_update(batch, ['geohash'])
+            batch = []
+    if batch:
+        Warehouse.objects.bulk_update(batch, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='warehouse',
+            name='geohash',
+            field=api.geo.GeohashField(db_index=True, default='', editable=False, max_length=12),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
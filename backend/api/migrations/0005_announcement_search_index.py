@@ -0,0 +1,85 @@
+from django.db import migrations
+
+# A frozen copy of the statements in api/search.py as of this migration, so
+# later changes to that module do not change what the migration does.
+SQLITE_INSTALL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS api_announcement_fts USING fts5(
+        title, content, content='api_announcement', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_announcement_fts_ai AFTER INSERT ON api_announcement BEGIN
+        INSERT INTO api_announcement_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_announcement_fts_ad AFTER DELETE ON api_announcement BEGIN
+        INSERT INTO api_announcement_fts(api_announcement_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_announcement_fts_au AFTER UPDATE OF title, content ON api_announcement BEGIN
+        INSERT INTO api_announcement_fts(api_announcement_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO api_announcement_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    "INSERT INTO api_announcement_fts(api_announcement_fts) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS api_announcement_fts_ai',
+    'DROP TRIGGER IF EXISTS api_announcement_fts_ad',
+    'DROP TRIGGER IF EXISTS api_announcement_fts_au',
+    'DROP TABLE IF EXISTS api_announcement_fts',
+]
+
+POSTGRES_INSTALL = [
+    """
+    ALTER TABLE api_announcement ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'B')
+    ) STORED
+    """,
+    'CREATE INDEX IF NOT EXISTS api_announcement_search_vector_idx ON api_announcement USING GIN (search_vector)',
+]
+
+POSTGRES_UNINSTALL = [
+    'DROP INDEX IF EXISTS api_announcement_search_vector_idx',
+    'ALTER TABLE api_announcement DROP COLUMN IF EXISTS search_vector',
+]
+
+
+def _execute(schema_editor, statements):
+    with schema_editor.connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def install_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _execute(schema_editor, SQLITE_INSTALL)
+    elif vendor == 'postgresql':
+        _execute(schema_editor, POSTGRES_INSTALL)
+
+
+def uninstall_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _execute(schema_editor, SQLITE_UNINSTALL)
+    elif vendor == 'postgresql':
+        _execute(schema_editor, POSTGRES_UNINSTALL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_warehouse_geohash'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
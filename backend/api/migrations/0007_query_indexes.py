@@ -0,0 +1,49 @@
+# Generated by Django 4.2 on 2026-10-17 23:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_user_token_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['updated_at', 'id'], name='announcement_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['category', 'created_at', 'id'], name='announcement_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['subcategory', 'created_at', 'id'], name='announcement_subcategory_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['created_by', 'created_at', 'id'], name='announcement_author_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['updated_at', 'id'], name='category_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['name'], name='category_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subcategory',
+            index=models.Index(fields=['updated_at', 'id'], name='subcategory_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='warehouse',
+            index=models.Index(fields=['updated_at', 'id'], name='warehouse_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='warehouse',
+            index=models.Index(fields=['city'], name='warehouse_city_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2 on 2026-10-17 23:49
+
+from django.db import migrations, models
+from django.db.models import Count
+
+# The counters as defined in api/dashboard.py when this migration was
+# written: model -> (total bucket, {dimension: field}).
+COUNTED = {
+    'api.User': ('users', {'users_by_role': 'role'}),
+    'api.Warehouse': ('warehouses', {'warehouses_by_city': 'city'}),
+    'api.Category': ('categories', {}),
+    'api.SubCategory': ('subcategories', {}),
+    'api.Announcement': ('announcements', {
+        'announcements_by_category': 'category',
+        'announcements_by_subcategory': 'subcategory',
+        'announcements_by_author': 'created_by',
+    }),
+}
+
+
+def fill_dashboard_counters(apps, schema_editor):
+    DashboardCounter = apps.get_model('api', 'DashboardCounter')
+    counters = []
+    for label, (name, dimensions) in COUNTED.items():
+        model = apps.get_model(label)
+        counters.append(DashboardCounter(dimension='total', bucket=name, count=model._base_manager.count()))
+        for dimension, field in dimensions.items():
+            attname = model._meta.get_field(field).attname
+            rows = model._base_manager.values_list(attname).annotate(rows=Count('pk')).order_by()
+            counters.extend(
+                DashboardCounter(dimension=dimension, bucket='' if value is None else str(value), count=count)
+                for value, count in rows
+            )
+    DashboardCounter.objects.bulk_create(counters, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_change_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(max_length=50)),
+                ('bucket', models.CharField(max_length=255)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='dashboardcounter',
+            index=models.Index(fields=['dimension', '-count', 'bucket'], name='dashboard_counter_top_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dashboardcounter',
+            constraint=models.UniqueConstraint(fields=('dimension', 'bucket'), name='dashboard_counter_bucket_uniq'),
+        ),
+        migrations.RunPython(fill_dashboard_counters, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,30 @@
 
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.utils import timezone
 
-class UserManager(BaseUserManager):
+from . import geo
+from .geo import GeohashField
+
+class UserQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        """
+        Like save(), bump token_version when a TOKEN_VERSION_FIELDS column
+        changes, and drop the cached versions so the old tokens stop
+        authenticating now rather than after AUTH_CACHE_TTL.
+        """
+        if not any(field in kwargs for field in self.model.TOKEN_VERSION_FIELDS):
+            return super().update(**kwargs)
+        from .authentication import forget_users
+
+        kwargs.setdefault('token_version', models.F('token_version') + 1)
+        pks = list(self.values_list('pk', flat=True))
+        rows = super(UserQuerySet, self.filter(pk__in=pks)).update(**kwargs)
+        forget_users(pks)
+        return rows
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
     def create_user(self, email, password=None, **extra_fields):
         if not email:
             raise ValueError('Users must have an email address')
@@ -33,19 +55,112 @@ class User(AbstractUser):
     email = models.EmailField(unique=True)
     name = models.CharField(max_length=255)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default=SUPPORT_STAFF)
+    # Embedded in every access token; bumping it revokes all tokens issued
+    # before (see api.authentication.StatelessJWTAuthentication).
+    token_version = models.PositiveIntegerField(default=0)
+    # Part of the validators of the announcements that show the user's name
+    # (see api.conditional.EMBEDDED_RELATIONS).
+    updated_at = models.DateTimeField(auto_now=True)
     
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['name']
     
     objects = UserManager()
 
+    # Changing any of these invalidates the user's outstanding tokens.
+    TOKEN_VERSION_FIELDS = ('role', 'is_active', 'password')
+    # Copied into the payloads of other models (AnnouncementSerializer.created_by_name).
+    EMBEDDED_FIELDS = ('name',)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if all(field in field_names for field in cls.TOKEN_VERSION_FIELDS):
+            instance._token_state = instance.get_token_state()
+        if all(field in field_names for field in cls.EMBEDDED_FIELDS):
+            instance._embedded_state = instance.get_embedded_state()
+        return instance
+
+    def get_embedded_state(self):
+        return tuple(getattr(self, field) for field in self.EMBEDDED_FIELDS)
+
+    def embedded_state_changed(self):
+        """In post_save: whether this save changes what other payloads show of the user."""
+        state = getattr(self, '_embedded_state', None)
+        return state is not None and state != self.get_embedded_state()
+
+    def get_token_state(self):
+        return tuple(getattr(self, field) for field in self.TOKEN_VERSION_FIELDS)
+
+    def save(self, *args, **kwargs):
+        state = getattr(self, '_token_state', None)
+        if state is not None and state != self.get_token_state():
+            self.token_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'token_version'}
+        super().save(*args, **kwargs)
+        self._token_state = self.get_token_state()
+        self._embedded_state = self.get_embedded_state()
+
+class WarehouseQuerySet(models.QuerySet):
+    # Precision of the first neighbourhood searched by nearest(), ~1.2km cells.
+    NEAREST_START_PRECISION = 6
+
+    def within(self, min_lng, min_lat, max_lng, max_lat):
+        """Warehouses inside the box, found through the geohash index."""
+        cells = geo.bbox_cells(min_lng, min_lat, max_lng, max_lat)
+        return self.filter(geo.cells_q(cells), geo.bbox_q(min_lng, min_lat, max_lng, max_lat))
+
+    def nearest(self, latitude, longitude, k):
+        """
+        The ``k`` warehouses closest to the point, each with ``distance_km``.
+
+        Searches the 3x3 geohash neighbourhood of the point, widening it one
+        precision level at a time until it holds ``k`` candidates and the
+        k-th one is closer than the neighbourhood's edge. Haversine distance
+        is only computed for those candidates.
+        """
+        candidates = None
+        for precision in range(self.NEAREST_START_PRECISION, 0, -1):
+            cells = geo.neighbourhood(latitude, longitude, precision)
+            rows = self.filter(geo.cells_q(cells)).values_list('pk', 'latitude', 'longitude')
+            candidates = self._by_distance(rows, latitude, longitude)
+            if len(candidates) >= k and candidates[k - 1][0] <= geo.covered_radius_km(latitude, precision):
+                break
+        else:
+            candidates = self._by_distance(self.values_list('pk', 'latitude', 'longitude'), latitude, longitude)
+
+        nearest = candidates[:k]
+        warehouses = self.in_bulk([pk for _, pk in nearest])
+        result = []
+        for distance, pk in nearest:
+            warehouse = warehouses[pk]
+            warehouse.distance_km = distance
+            result.append(warehouse)
+        return result
+
+    @staticmethod
+    def _by_distance(rows, latitude, longitude):
+        return sorted((geo.haversine_km(latitude, longitude, lat, lng), pk) for pk, lat, lng in rows)
+
 class Warehouse(models.Model):
     city = models.CharField(max_length=100)
     latitude = models.FloatField()
     longitude = models.FloatField()
+    # Indexed spatial key kept in sync on save; see api/geo.py.
+    geohash = GeohashField(default='')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = WarehouseQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='warehouse_created_id_idx'),
+            models.Index(fields=['updated_at', 'id'], name='warehouse_updated_id_idx'),
+            models.Index(fields=['city'], name='warehouse_city_idx'),
+        ]
+
 class Category(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
@@ -57,6 +172,11 @@ class Category(models.Model):
 
     class Meta:
         verbose_name_plural = "Categories"
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='category_created_id_idx'),
+            models.Index(fields=['updated_at', 'id'], name='category_updated_id_idx'),
+            models.Index(fields=['name'], name='category_name_idx'),
+        ]
 
 class SubCategory(models.Model):
     name = models.CharField(max_length=100)
@@ -70,6 +190,10 @@ class SubCategory(models.Model):
 
     class Meta:
         verbose_name_plural = "Sub Categories"
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='subcategory_created_id_idx'),
+            models.Index(fields=['updated_at', 'id'], name='subcategory_updated_id_idx'),
+        ]
 
 class Announcement(models.Model):
     title = models.CharField(max_length=255)
@@ -79,3 +203,70 @@ class Announcement(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='announcement_created_id_idx'),
+            models.Index(fields=['updated_at', 'id'], name='announcement_updated_id_idx'),
+            # Newest-first pages filtered to one category, subcategory or author.
+            models.Index(fields=['category', 'created_at', 'id'], name='announcement_category_idx'),
+            models.Index(fields=['subcategory', 'created_at', 'id'], name='announcement_subcategory_idx'),
+            models.Index(fields=['created_by', 'created_at', 'id'], name='announcement_author_idx'),
+        ]
+
+class Tombstone(models.Model):
+    """
+    A deleted row, kept for TOMBSTONE_RETENTION so delta sync
+    (``?updated_since=``, see api/sync.py) can report the deletion.
+    """
+    # Indexed as the first column of tombstone_model_deleted_idx.
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, db_index=False)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['content_type', 'deleted_at', 'id'], name='tombstone_model_deleted_idx'),
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ]
+
+class ChangeEvent(models.Model):
+    """
+    One create, update or delete of a row the change feed publishes
+    (api/changefeed.py). The id is the SSE event id clients resume from;
+    rows are kept for CHANGE_FEED_RETENTION.
+    """
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+
+    ACTION_CHOICES = [
+        (CREATE, 'Create'),
+        (UPDATE, 'Update'),
+        (DELETE, 'Delete'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+class DashboardCounter(models.Model):
+    """
+    One number of the dashboard statistics (api/dashboard.py): how many rows
+    a model has (dimension 'total', bucket the model) or how many fall in
+    one group, e.g. dimension 'warehouses_by_city', bucket 'Seattle'.
+    """
+    dimension = models.CharField(max_length=50)
+    bucket = models.CharField(max_length=255)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'bucket'], name='dashboard_counter_bucket_uniq'),
+        ]
+        indexes = [
+            # Largest buckets of a dimension first.
+            models.Index(fields=['dimension', '-count', 'bucket'], name='dashboard_counter_top_idx'),
+        ]
@@ -0,0 +1,146 @@
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .authentication import issue_token
+from .caching import get_cache
+from .dashboard import rebuild
+from .models import User, Warehouse, Announcement, Category, SubCategory
+
+# Exact number of queries each read endpoint may run, including the validator
+# query of the conditional GET check. Authentication itself is free: the user
+# comes from the token claims and its token_version from the auth cache,
+# which saving the user warms; only the user endpoint loads the full row.
+# Budgets must not depend on the number of rows in the table: a list that
+# grows with N is an N+1.
+ENDPOINT_BUDGETS = [
+    ('user', False, 1),
+    ('warehouse-list', False, 2),
+    ('warehouse-detail', True, 2),
+    ('announcement-list', False, 2),
+    ('announcement-detail', True, 2),
+    ('category-list', False, 2),
+    ('category-detail', True, 2),
+    ('category-tree', False, 2),
+    ('subcategory-list', False, 2),
+    ('subcategory-detail', True, 2),
+    ('dashboard-stats', False, 9),
+]
+
+DEFAULT_SIZES = (1, 100, 10000)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryBudget(CaptureQueriesContext):
+    """
+    Context manager asserting that exactly ``budget`` queries run inside it.
+
+        with QueryBudget(2):
+            client.get('/api/announcements/')
+    """
+
+    def __init__(self, budget, using='default', label=None):
+        super().__init__(connections[using])
+        self.budget = budget
+        self.label = label
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return
+        if len(self) != self.budget:
+            sql = '\n'.join(
+                '%d. %s' % (i, query['sql']) for i, query in enumerate(self.captured_queries, start=1)
+            )
+            raise QueryBudgetExceeded('%s ran %d queries, budget is %d:\n%s' % (
+                self.label or 'Block', len(self), self.budget, sql
+            ))
+
+
+def seed(size):
+    """Create ``size`` rows of every model, spread across a few authors and categories."""
+    authors = User.objects.bulk_create([
+        User(email='budget-%d@example.com' % i, name='Author %d' % i, role=User.SUPPORT_STAFF)
+        for i in range(min(size, 100))
+    ])
+    categories = Category.objects.bulk_create([
+        Category(name='Category %d' % i) for i in range(size)
+    ])
+    subcategories = SubCategory.objects.bulk_create([
+        SubCategory(name='Sub %d' % i, category=categories[i % len(categories)]) for i in range(size)
+    ])
+    Warehouse.objects.bulk_create([
+        Warehouse(city='City %d' % i, latitude=i % 90, longitude=i % 180) for i in range(size)
+    ])
+    Announcement.objects.bulk_create([
+        Announcement(
+            title='Announcement %d' % i,
+            content='Body %d' % i,
+            created_by=authors[i % len(authors)],
+            category=categories[i % len(categories)],
+            subcategory=subcategories[i % len(subcategories)],
+        )
+        for i in range(size)
+    ])
+    # bulk_create() sends no post_save.
+    rebuild()
+
+
+def clear():
+    Announcement.objects.all().delete()
+    SubCategory.objects.all().delete()
+    Category.objects.all().delete()
+    Warehouse.objects.all().delete()
+    User.objects.all().delete()
+
+
+def authenticated_client():
+    user = User.objects.create_user('budget-admin@example.com', name='Budget Admin', role=User.PLATFORM_ADMIN)
+    token = issue_token(user).access_token
+    return Client(HTTP_AUTHORIZATION='Bearer %s' % token)
+
+
+def endpoint_url(name, detail):
+    if not detail:
+        return reverse(name)
+    model = {
+        'warehouse-detail': Warehouse,
+        'announcement-detail': Announcement,
+        'category-detail': Category,
+        'subcategory-detail': SubCategory,
+    }[name]
+    return reverse(name, kwargs={'pk': model.objects.only('pk').first().pk})
+
+
+def check_budgets(sizes=DEFAULT_SIZES, budgets=ENDPOINT_BUDGETS):
+    """
+    Seed each size in turn and hit every endpoint once under its budget.
+
+    Returns a list of (size, name, queries, budget, error) rows, where error
+    is None for endpoints that matched their budget exactly.
+    """
+    rows = []
+    for size in sizes:
+        clear()
+        seed(size)
+        # Measure the database path, not payloads cached by an earlier size.
+        get_cache().clear()
+        client = authenticated_client()
+        for name, detail, budget in budgets:
+            url = endpoint_url(name, detail)
+            context = QueryBudget(budget, label='GET %s' % url)
+            try:
+                with context:
+                    response = client.get(url)
+                if response.status_code != 200:
+                    raise QueryBudgetExceeded('GET %s returned %d' % (url, response.status_code))
+                error = None
+            except QueryBudgetExceeded as exc:
+                error = str(exc)
+            rows.append((size, name, len(context), budget, error))
+    clear()
+    return rows
@@ -0,0 +1,154 @@
+import re
+from datetime import timedelta
+from urllib import parse
+
+from django.db import connections, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .caching import get_cache
+from .models import Warehouse, Announcement, Category, SubCategory
+from .querybudget import authenticated_client
+from .seeding import seed_dataset
+
+FULL_SCAN = 'full scan'
+TEMP_SORT = 'temp sort'
+
+# Lookup tables read whole by design (the category tree, collection
+# validators); they hold tens to hundreds of rows, not millions.
+SMALL_TABLES = {'api_category', 'api_subcategory'}
+
+# Problems inherent to what an endpoint returns, by (check label, problem).
+EXPECTED_PROBLEMS = {
+    ('announcement-search', TEMP_SORT): 'bm25 ranks the matches at query time; FTS5 keeps no rank index to read in order.',
+    ('category-tree', TEMP_SORT): 'Orders the per-(sub)category count groups by name: one row per category, not per announcement.',
+}
+
+SQLITE_SCAN_RE = re.compile(r'^SCAN (\S+)(.*)$')
+SQLITE_TEMP_SORT_RE = re.compile(r'USE TEMP B-TREE')
+POSTGRES_SCAN_RE = re.compile(r'Seq Scan on (\S+)')
+POSTGRES_SORT_RE = re.compile(r'(?:^|->)\s*Sort\b')
+
+
+class QueryPlanProblem(AssertionError):
+    pass
+
+
+def explain(connection, sql):
+    """The plan of ``sql`` as a list of lines, in the vendor's own words."""
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # A small test table is cheaper to scan than to seek; make the
+            # planner show what it would do when the table is big, falling
+            # back to a scan or sort only when no index can avoid one.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_sort = off')
+            cursor.execute('EXPLAIN %s' % sql)
+            return [row[0] for row in cursor.fetchall()]
+        cursor.execute('EXPLAIN QUERY PLAN %s' % sql)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def plan_problems(vendor, plan, tables):
+    """
+    ``[(problem, table_or_None, line)]`` for every full table scan and
+    temporary sort in ``plan``.
+
+    Ordered index walks (``SCAN t USING INDEX``, which is how a keyset page
+    reads its LIMIT rows) and index-only scans are not table scans.
+    """
+    problems = []
+    for line in plan:
+        text = line.strip()
+        if vendor == 'postgresql':
+            scan = POSTGRES_SCAN_RE.search(text)
+            if scan and scan.group(1) in tables:
+                problems.append((FULL_SCAN, scan.group(1), line))
+            elif POSTGRES_SORT_RE.search(text):
+                problems.append((TEMP_SORT, None, line))
+            continue
+        scan = SQLITE_SCAN_RE.match(text)
+        if scan and scan.group(1) in tables and 'USING' not in scan.group(2) and 'VIRTUAL TABLE' not in scan.group(2):
+            problems.append((FULL_SCAN, scan.group(1), line))
+        elif SQLITE_TEMP_SORT_RE.search(text):
+            problems.append((TEMP_SORT, None, line))
+    return problems
+
+
+def plan_checks(client):
+    """``[(label, url)]`` of the read requests whose queries are explained, with ids from the seeded data."""
+    announcement = Announcement.objects.exclude(subcategory=None).first()
+    warehouse = Warehouse.objects.first()
+    category = Category.objects.first()
+    subcategory = SubCategory.objects.first()
+    since = (timezone.now() - timedelta(days=30)).date().isoformat()
+    checks = [
+        ('user', reverse('user')),
+        ('warehouse-list', reverse('warehouse-list')),
+        ('warehouse-detail', reverse('warehouse-detail', kwargs={'pk': warehouse.pk})),
+        ('warehouse-nearest', '%s?lat=%s&lng=%s' % (reverse('warehouse-nearest'), warehouse.latitude, warehouse.longitude)),
+        ('warehouse-within', '%s?bbox=-10,35,30,60' % reverse('warehouse-within')),
+        ('announcement-list', reverse('announcement-list')),
+        ('announcement-list', '%s?category=%d' % (reverse('announcement-list'), announcement.category_id)),
+        ('announcement-list', '%s?subcategory=%d' % (reverse('announcement-list'), announcement.subcategory_id)),
+        ('announcement-list', '%s?created_by=%d' % (reverse('announcement-list'), announcement.created_by_id)),
+        ('announcement-detail', reverse('announcement-detail', kwargs={'pk': announcement.pk})),
+        ('announcement-search', '%s?q=shipment' % reverse('announcement-search')),
+        ('announcement-export', '%s?format=ndjson' % reverse('announcement-export')),
+        ('announcement-export', '%s?format=ndjson&category=%d' % (reverse('announcement-export'), category.pk)),
+        ('announcement-export', '%s?format=ndjson&created_after=%s' % (reverse('announcement-export'), since)),
+        ('announcement-export', '%s?format=ndjson&category=%d&created_after=%s' % (
+            reverse('announcement-export'), category.pk, since,
+        )),
+        ('category-list', reverse('category-list')),
+        ('category-detail', reverse('category-detail', kwargs={'pk': category.pk})),
+        ('category-tree', reverse('category-tree')),
+        ('subcategory-list', reverse('subcategory-list')),
+        ('subcategory-detail', reverse('subcategory-detail', kwargs={'pk': subcategory.pk})),
+        ('dashboard-stats', reverse('dashboard-stats')),
+    ]
+    # Keyset pages after the first seek into the index instead of walking it from the top.
+    for label, url in list(checks):
+        if label == 'announcement-list':
+            next_url = client.get(url).json()['next']
+            checks.append((label, next_url[next_url.index('/api/'):]))
+    # Delta sync reads the (updated_at, id) and tombstone indexes.
+    changed = parse.quote((timezone.now() - timedelta(days=1)).isoformat())
+    for label in ('warehouse-list', 'announcement-list', 'category-list', 'subcategory-list'):
+        checks.append((label, '%s?updated_since=%s' % (reverse(label), changed)))
+    return checks
+
+
+def check_plans(using='default', announcements=5000):
+    """
+    Seed a dataset, request every read endpoint and EXPLAIN each SELECT it ran.
+
+    Returns ``[(label, url, sql, plan, problems)]`` where ``problems`` are the
+    ``(problem, table, line)`` found in ``plan`` that are not allowed by
+    SMALL_TABLES or EXPECTED_PROBLEMS.
+    """
+    connection = connections[using]
+    seed_dataset(users=50, warehouses=max(announcements // 10, 100), announcements=announcements)
+    tables = set(connection.introspection.table_names())
+    client = authenticated_client()
+    rows = []
+    for label, url in plan_checks(client):
+        get_cache().clear()
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        if response.status_code != 200:
+            raise QueryPlanProblem('GET %s returned %d' % (url, response.status_code))
+        for query in context.captured_queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            plan = explain(connection, sql)
+            problems = [
+                (problem, table, line) for problem, table, line in plan_problems(connection.vendor, plan, tables)
+                if table not in SMALL_TABLES and (label, problem) not in EXPECTED_PROBLEMS
+            ]
+            rows.append((label, url, sql, plan, problems))
+    return rows
@@ -0,0 +1,183 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+DEFAULT_CONFIG = {
+    'STORE': 'api.ratelimit.MemoryBucketStore',
+    'OPTIONS': {},
+    # Bucket name -> (capacity, seconds to refill an empty bucket).
+    'BUCKETS': {
+        'ip': (30, 60),
+        'email': (10, 300),
+    },
+}
+
+
+class MemoryBucketStore:
+    """
+    Token buckets held in this process. Past ``max_keys``, least recently
+    used buckets are dropped once they have refilled, which loses nothing.
+    A bucket that is still depleted is never dropped, so flooding the store
+    with new keys cannot reset anyone's limit; the IP bucket, checked
+    first, bounds how fast one client can add keys.
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        # key -> (tokens, updated_at, full_at), least recently used first.
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, rate, now):
+        with self._lock:
+            tokens, updated_at, _ = self._buckets.pop(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+            while len(self._buckets) > self.max_keys:
+                oldest = next(iter(self._buckets))
+                if self._buckets[oldest][2] > now:
+                    break
+                del self._buckets[oldest]
+            return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class SQLiteBucketStore:
+    """
+    Token buckets in a small local SQLite file shared by every worker on the
+    host, so the limits hold for the whole server rather than per process.
+    Full buckets carry no information and are pruned now and then.
+    """
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path, timeout=5):
+        self.path = str(path)
+        self.timeout = timeout
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS token_bucket ('
+                'key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, full_at REAL NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS token_bucket_full_at ON token_bucket (full_at)')
+            self._local.connection = connection
+        return connection
+
+    def consume(self, key, capacity, rate, now):
+        connection = self._connection()
+        # IMMEDIATE takes the write lock up front so concurrent workers
+        # serialize on the read-modify-write instead of losing updates.
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute('SELECT tokens, updated_at FROM token_bucket WHERE key = ?', (key,)).fetchone()
+            tokens, updated_at = row if row is not None else (capacity, now)
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / rate
+            connection.execute(
+                'INSERT OR REPLACE INTO token_bucket (key, tokens, updated_at, full_at) VALUES (?, ?, ?, ?)',
+                (key, tokens, now, now + (capacity - tokens) / rate),
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                connection.execute('DELETE FROM token_bucket WHERE full_at <= ?', (now,))
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return wait
+
+    def clear(self):
+        self._connection().execute('DELETE FROM token_bucket')
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_config():
+    return {**DEFAULT_CONFIG, **getattr(settings, 'LOGIN_RATE_LIMIT', {})}
+
+
+def get_bucket_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                config = get_config()
+                _store = import_string(config['STORE'])(**config['OPTIONS'])
+    return _store
+
+
+@receiver(setting_changed)
+def reset_bucket_store(setting, **kwargs):
+    global _store
+    if setting == 'LOGIN_RATE_LIMIT':
+        _store = None
+
+
+class LoginRateThrottle(BaseThrottle):
+    """
+    Token-bucket limits on login attempts per client IP and per email.
+
+    Runs in APIView.initial(), i.e. before the view body and therefore
+    before authenticate() spends any time hashing a password. The IP bucket
+    is checked first so a flood from one address cannot drain the buckets
+    of the accounts it targets.
+
+    The IP is REMOTE_ADDR, or with REST_FRAMEWORK['NUM_PROXIES'] above 0, the
+    X-Forwarded-For entry appended by the outermost trusted proxy; entries
+    the client wrote itself are never used.
+    """
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_keys(self, request):
+        keys = [('ip', self.get_ident(request))]
+        data = request.data
+        email = data.get('email') if hasattr(data, 'get') else None
+        if isinstance(email, str) and email.strip():
+            keys.append(('email', email.strip().lower()))
+        return keys
+
+    def allow_request(self, request, view):
+        config = get_config()
+        store = get_bucket_store()
+        now = time.time()
+        for bucket, ident in self.get_keys(request):
+            capacity, period = config['BUCKETS'][bucket]
+            wait = store.consume('login:%s:%s' % (bucket, ident), capacity, capacity / period, now)
+            if wait:
+                self.wait_seconds = wait
+                return False
+        return True
+
+    def wait(self):
+        return self.wait_seconds
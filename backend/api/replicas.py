@@ -0,0 +1,214 @@
+"""
+Read replicas: GET, HEAD and OPTIONS requests read from the aliases in
+DATABASE_REPLICAS (settings.py builds them from DATABASE_REPLICA_URLS),
+everything else uses the primary ('default').
+
+A user who has just written (POST, PUT, PATCH, DELETE) reads from the
+primary for the next REPLICA_STICKY_SECONDS, so their own change is never
+missing from the page that follows it while the replicas catch up. The pin
+lives in the 'api' cache, which settings.py requires to be shared
+(API_CACHE_URL) whenever replicas are configured.
+
+A replica whose connection fails is skipped for REPLICA_RETRY_SECONDS, and
+with none left reads fall back to the primary. All queries of one request
+go to the same database, so a page never mixes two replicas' lag. Delta
+sync (?updated_since=) always reads the primary.
+"""
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .sync import UPDATED_SINCE_PARAM
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = 'api'
+DEFAULT_STICKY_SECONDS = 5
+DEFAULT_RETRY_SECONDS = 30
+
+
+class ReplicaRead:
+    """The read routing of one safe request: which replica it settled on, once it has."""
+
+    __slots__ = ('alias',)
+
+    def __init__(self):
+        self.alias = None
+
+
+# The current request's ReplicaRead; None while reads must see the primary.
+_read = ContextVar('replica_read', default=None)
+# Replica alias -> time.monotonic() before which it is not tried again.
+_down_until = {}
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def sticky_seconds():
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', DEFAULT_STICKY_SECONDS)
+
+
+def _pin_key(user_id):
+    return 'replica:pin:%s' % user_id
+
+
+def _written_key(label):
+    return 'replica:written:%s' % label
+
+
+def pin(user_id):
+    """Send ``user_id``'s reads to the primary for the next sticky_seconds()."""
+    caches[CACHE_ALIAS].set(_pin_key(user_id), 1, timeout=sticky_seconds())
+
+
+def is_pinned(user_id):
+    return caches[CACHE_ALIAS].get(_pin_key(user_id)) is not None
+
+
+def note_write(label):
+    """Record that rows of model ``label`` just changed; see may_cache()."""
+    if replica_aliases():
+        caches[CACHE_ALIAS].set(_written_key(label), 1, timeout=sticky_seconds())
+
+
+def may_cache(label):
+    """
+    Whether a payload of model ``label`` read by this request may be
+    cached: not when it came from a replica that may still lack the
+    model's latest write, or the stale rows would outlive the lag.
+    """
+    read = _read.get()
+    if read is None or read.alias in (None, DEFAULT_DB_ALIAS):
+        return True
+    return caches[CACHE_ALIAS].get(_written_key(label)) is None
+
+
+def choose_replica():
+    """A replica that accepts connections, in random order; the primary if none does."""
+    now = time.monotonic()
+    candidates = [alias for alias in replica_aliases() if _down_until.get(alias, 0) <= now]
+    random.shuffle(candidates)
+    for alias in candidates:
+        try:
+            connections[alias].ensure_connection()
+        except DatabaseError as exc:
+            _down_until[alias] = now + getattr(settings, 'REPLICA_RETRY_SECONDS', DEFAULT_RETRY_SECONDS)
+            logger.warning('Replica %s is unavailable, reading from the primary: %s', alias, exc)
+            continue
+        return alias
+    return DEFAULT_DB_ALIAS
+
+
+class ReplicaRouter:
+    """
+    Routes reads of a safe request (see ReplicaMiddleware) to a replica,
+    and every other query, including reads inside a transaction on the
+    primary, to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        read = _read.get()
+        if read is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if read.alias is None:
+            read.alias = choose_replica()
+        return read.alias
+
+    def db_for_write(self, model, **hints):
+        # Explicit: without a router Django writes an instance back to the
+        # database it was read from, a replica here.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary.
+        return False if db in replica_aliases() else None
+
+
+def request_user_id(request):
+    """The user id of the request's bearer token, without touching the database; None without a valid one."""
+    authenticator = JWTAuthentication()
+    header = authenticator.get_header(request)
+    raw_token = authenticator.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        return None
+    try:
+        return authenticator.get_validated_token(raw_token).get(api_settings.USER_ID_CLAIM)
+    except InvalidToken:
+        return None
+
+
+class ReplicaMiddleware:
+    """
+    Lets the reads of safe requests go to a replica unless the user is
+    pinned to the primary, and pins users whose writes went through.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _read.set(self.route(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _read.reset(token)
+        self.pin_writer(request, response)
+        return response
+
+    async def __acall__(self, request):
+        # The pin lookup may be a Redis round trip; keep it off the event loop.
+        route = await sync_to_async(self.route)(request) if replica_aliases() else None
+        token = _read.set(route)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read.reset(token)
+        if replica_aliases() and request.method not in SAFE_METHODS:
+            await sync_to_async(self.pin_writer)(request, response)
+        return response
+
+    def route(self, request):
+        """A ReplicaRead for requests whose reads may go to a replica, else None."""
+        if not replica_aliases() or request.method not in SAFE_METHODS:
+            return None
+        # Delta sync's settle window assumes every commit is visible; replica
+        # lag would move the cursor past rows the client never got.
+        if UPDATED_SINCE_PARAM in request.GET:
+            return None
+        user_id = request_user_id(request)
+        if user_id is not None and is_pinned(user_id):
+            return None
+        return ReplicaRead()
+
+    def pin_writer(self, request, response):
+        if not replica_aliases() or request.method in SAFE_METHODS or response.status_code >= 400:
+            return
+        # DRF sets the authenticated user back on the Django request.
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            pin(user.pk)
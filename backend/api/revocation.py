@@ -0,0 +1,172 @@
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+DEFAULT_CAPACITY = 1000000
+DEFAULT_ERROR_RATE = 0.001
+# How stale a worker's view of revocations made by other workers may be.
+DEFAULT_SYNC_INTERVAL = 1.0
+# How often expired entries are pruned and the Bloom filter rebuilt.
+DEFAULT_REBUILD_INTERVAL = 3600.0
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS revoked_token (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        jti TEXT NOT NULL UNIQUE,
+        expires_at INTEGER NOT NULL
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS revoked_token_expires_at ON revoked_token (expires_at)',
+]
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings."""
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing (Kirsch-Mitzenmacher) from one 128-bit digest.
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    """
+    Revoked token ids in a SQLite file shared by the host's workers, with an
+    in-memory Bloom filter in front so most lookups never read the file.
+    """
+
+    def __init__(self, path, capacity=DEFAULT_CAPACITY, error_rate=DEFAULT_ERROR_RATE,
+                 sync_interval=DEFAULT_SYNC_INTERVAL, rebuild_interval=DEFAULT_REBUILD_INTERVAL):
+        self.path = str(path)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._last_id = 0
+        self._synced_at = 0.0
+        self._rebuilt_at = 0.0
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA:
+                connection.execute(statement)
+            self._local.connection = connection
+        return connection
+
+    def revoke(self, jti, expires_at):
+        self.revoke_many([(jti, expires_at)])
+
+    def revoke_many(self, tokens):
+        now = time.time()
+        tokens = [(jti, int(expires_at)) for jti, expires_at in tokens if expires_at > now]
+        if not tokens:
+            return
+        connection = self._connection()
+        connection.execute('BEGIN')
+        try:
+            connection.executemany('INSERT OR IGNORE INTO revoked_token (jti, expires_at) VALUES (?, ?)', tokens)
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        self._refresh()
+        with self._lock:
+            for jti, _ in tokens:
+                self._bloom.add(jti)
+
+    def is_revoked(self, jti):
+        self._refresh()
+        if jti not in self._bloom:
+            return False
+        row = self._connection().execute('SELECT expires_at FROM revoked_token WHERE jti = ?', (jti,)).fetchone()
+        return row is not None and row[0] > time.time()
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._bloom is not None and now - self._synced_at < self.sync_interval:
+            return
+        with self._lock:
+            if self._bloom is not None and now - self._synced_at < self.sync_interval:
+                return
+            if self._bloom is None or now - self._rebuilt_at >= self.rebuild_interval:
+                self._rebuild()
+                self._rebuilt_at = now
+            else:
+                self._sync()
+            self._synced_at = now
+
+    def _sync(self):
+        rows = self._connection().execute(
+            'SELECT id, jti FROM revoked_token WHERE id > ? ORDER BY id', (self._last_id,)
+        )
+        for pk, jti in rows:
+            self._bloom.add(jti)
+            self._last_id = pk
+
+    def _rebuild(self):
+        connection = self._connection()
+        connection.execute('DELETE FROM revoked_token WHERE expires_at <= ?', (int(time.time()),))
+        # Twice the live rows, so the filter keeps its error rate until the next rebuild.
+        live = connection.execute('SELECT COUNT(*) FROM revoked_token').fetchone()[0]
+        self._bloom = BloomFilter(max(self.capacity, live * 2), self.error_rate)
+        self._last_id = 0
+        self._sync()
+
+    def memory_bytes(self):
+        self._refresh()
+        return len(self._bloom.bits)
+
+
+_revocation_list = None
+_revocation_list_lock = threading.Lock()
+
+
+def get_revocation_list():
+    global _revocation_list
+    if _revocation_list is None:
+        with _revocation_list_lock:
+            if _revocation_list is None:
+                _revocation_list = RevocationList(
+                    settings.TOKEN_REVOCATION_DB,
+                    capacity=getattr(settings, 'TOKEN_REVOCATION_CAPACITY', DEFAULT_CAPACITY),
+                    error_rate=getattr(settings, 'TOKEN_REVOCATION_ERROR_RATE', DEFAULT_ERROR_RATE),
+                    sync_interval=getattr(settings, 'TOKEN_REVOCATION_SYNC_INTERVAL', DEFAULT_SYNC_INTERVAL),
+                )
+    return _revocation_list
+
+
+@receiver(setting_changed)
+def reset_revocation_list(setting, **kwargs):
+    global _revocation_list
+    if setting.startswith('TOKEN_REVOCATION_'):
+        _revocation_list = None
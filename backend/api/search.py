@@ -0,0 +1,163 @@
+import re
+
+from django.db.models import Q
+
+from .models import Announcement
+
+# SQLite keeps an external-content FTS5 table in sync through triggers on
+# api_announcement. Django's SQLite schema editor rebuilds a table (dropping
+# its triggers) for some ALTERs, so install() is idempotent and repair() runs
+# it again after every migrate (see ApiConfig.ready).
+SQLITE_INSTALL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS api_announcement_fts USING fts5(
+        title, content, content='api_announcement', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_announcement_fts_ai AFTER INSERT ON api_announcement BEGIN
+        INSERT INTO api_announcement_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_announcement_fts_ad AFTER DELETE ON api_announcement BEGIN
+        INSERT INTO api_announcement_fts(api_announcement_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_announcement_fts_au AFTER UPDATE OF title, content ON api_announcement BEGIN
+        INSERT INTO api_announcement_fts(api_announcement_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO api_announcement_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+]
+
+SQLITE_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS api_announcement_fts_ai',
+    'DROP TRIGGER IF EXISTS api_announcement_fts_ad',
+    'DROP TRIGGER IF EXISTS api_announcement_fts_au',
+    'DROP TABLE IF EXISTS api_announcement_fts',
+]
+
+SQLITE_REBUILD = "INSERT INTO api_announcement_fts(api_announcement_fts) VALUES ('rebuild')"
+
+# Postgres maintains the weighted tsvector itself as a generated column.
+POSTGRES_INSTALL = [
+    """
+    ALTER TABLE api_announcement ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'B')
+    ) STORED
+    """,
+    'CREATE INDEX IF NOT EXISTS api_announcement_search_vector_idx ON api_announcement USING GIN (search_vector)',
+]
+
+POSTGRES_UNINSTALL = [
+    'DROP INDEX IF EXISTS api_announcement_search_vector_idx',
+    'ALTER TABLE api_announcement DROP COLUMN IF EXISTS search_vector',
+]
+
+POSTGRES_REBUILD = 'REINDEX INDEX api_announcement_search_vector_idx'
+
+# Relative weight of a title match over a content match in bm25().
+SQLITE_TITLE_WEIGHT = 10.0
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _execute(connection, statements):
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def install(connection):
+    if connection.vendor == 'sqlite':
+        _execute(connection, SQLITE_INSTALL)
+    elif connection.vendor == 'postgresql':
+        _execute(connection, POSTGRES_INSTALL)
+
+
+def uninstall(connection):
+    if connection.vendor == 'sqlite':
+        _execute(connection, SQLITE_UNINSTALL)
+    elif connection.vendor == 'postgresql':
+        _execute(connection, POSTGRES_UNINSTALL)
+
+
+def repair(connection):
+    """Recreate dropped sync triggers if the SQLite index is installed."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'api_announcement_fts'")
+        installed = cursor.fetchone() is not None
+    if installed:
+        install(connection)
+
+
+def rebuild(connection):
+    install(connection)
+    if connection.vendor == 'sqlite':
+        _execute(connection, [SQLITE_REBUILD])
+    elif connection.vendor == 'postgresql':
+        _execute(connection, [POSTGRES_REBUILD])
+
+
+def fts5_query(text):
+    """
+    Turn free text into a safe FTS5 query: every word quoted (so operators
+    and stray quotes in user input are inert), all required, the last one
+    matched as a prefix for search-as-you-type.
+    """
+    tokens = TOKEN_RE.findall(text)
+    if not tokens:
+        return None
+    quoted = ['"%s"' % token for token in tokens]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def ranked_ids(connection, text, limit, offset=0):
+    """``[(announcement_id, score)]`` best match first; higher scores are better."""
+    if connection.vendor == 'sqlite':
+        query = fts5_query(text)
+        if query is None:
+            return []
+        sql = (
+            'SELECT rowid, -bm25(api_announcement_fts, %s, 1.0) AS score FROM api_announcement_fts '
+            'WHERE api_announcement_fts MATCH %s ORDER BY bm25(api_announcement_fts, %s, 1.0) LIMIT %s OFFSET %s'
+        )
+        params = [SQLITE_TITLE_WEIGHT, query, SQLITE_TITLE_WEIGHT, limit, offset]
+    elif connection.vendor == 'postgresql':
+        sql = (
+            "SELECT id, ts_rank_cd(search_vector, query) AS score "
+            "FROM api_announcement, websearch_to_tsquery('english', %s) query "
+            "WHERE search_vector @@ query ORDER BY score DESC, id DESC LIMIT %s OFFSET %s"
+        )
+        params = [text, limit, offset]
+    else:
+        # No full-text engine: unranked substring match, newest first.
+        ids = Announcement.objects.filter(
+            Q(title__icontains=text) | Q(content__icontains=text)
+        ).order_by('-created_at', '-id').values_list('id', flat=True)[offset:offset + limit]
+        return [(pk, 0.0) for pk in ids]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def search_announcements(connection, text, limit, offset=0):
+    """Matching announcements, best first, each with a ``rank`` attribute."""
+    ranked = ranked_ids(connection, text, limit, offset)
+    announcements = Announcement.objects.select_related('created_by').in_bulk([pk for pk, _ in ranked])
+    results = []
+    for pk, score in ranked:
+        announcement = announcements.get(pk)
+        if announcement is not None:
+            announcement.rank = score
+            results.append(announcement)
+    return results
@@ -0,0 +1,190 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from .caching import invalidate
+from .dashboard import count_created
+from .models import User, Warehouse, Category, SubCategory, Announcement
+
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_SEED = 2024
+# Every seeded user can log in with this password.
+SEED_PASSWORD = 'seeded-password'
+# Rows are spread over this much history so time-ordered pages look real.
+HISTORY = timedelta(days=365)
+
+FIRST_NAMES = [
+    'Aarav', 'Amelia', 'Chen', 'Diego', 'Fatima', 'Hana', 'Isabela', 'Jonas', 'Kwame', 'Leila',
+    'Mateo', 'Nadia', 'Olu', 'Priya', 'Rafael', 'Sofia', 'Tariq', 'Yuki', 'Zanele', 'Emil',
+]
+LAST_NAMES = [
+    'Adeyemi', 'Bauer', 'Costa', 'Dubois', 'Eriksen', 'Fernandes', 'Gupta', 'Haddad', 'Ivanova', 'Jensen',
+    'Kim', 'Lopez', 'Mensah', 'Nakamura', 'Okafor', 'Petrov', 'Rossi', 'Singh', 'Tanaka', 'Weber',
+]
+# (city, latitude, longitude); warehouses are scattered around these.
+CITIES = [
+    ('Amsterdam', 52.37, 4.90), ('Atlanta', 33.75, -84.39), ('Bangalore', 12.97, 77.59),
+    ('Berlin', 52.52, 13.40), ('Cairo', 30.04, 31.24), ('Chicago', 41.88, -87.63),
+    ('Dubai', 25.20, 55.27), ('Johannesburg', -26.20, 28.05), ('Lagos', 6.52, 3.38),
+    ('Lima', -12.05, -77.04), ('London', 51.51, -0.13), ('Madrid', 40.42, -3.70),
+    ('Mexico City', 19.43, -99.13), ('Mumbai', 19.08, 72.88), ('Nairobi', -1.29, 36.82),
+    ('Osaka', 34.69, 135.50), ('Paris', 48.86, 2.35), ('Rotterdam', 51.92, 4.48),
+    ('Santiago', -33.45, -70.67), ('Sao Paulo', -23.55, -46.63), ('Seoul', 37.57, 126.98),
+    ('Singapore', 1.35, 103.82), ('Sydney', -33.87, 151.21), ('Toronto', 43.65, -79.38),
+]
+CATEGORY_NAMES = [
+    'Operations', 'Safety', 'Logistics', 'Human Resources', 'IT', 'Finance', 'Facilities',
+    'Compliance', 'Procurement', 'Customer Service', 'Training', 'Maintenance',
+]
+SUBCATEGORY_NAMES = [
+    'Schedules', 'Incidents', 'Policies', 'Inbound', 'Outbound', 'Inventory', 'Audits',
+    'Onboarding', 'Outages', 'Budgets', 'Vendors', 'Equipment', 'Holidays', 'Shifts',
+]
+WORDS = (
+    'shipment delayed inventory count scheduled maintenance forklift dock door pallet carrier '
+    'route audit safety training shift rota overtime holiday warehouse aisle picking packing '
+    'barcode scanner outage network upgrade policy update reminder deadline quarterly review '
+    'temperature cold chain delivery window supplier invoice approval budget forecast staffing '
+    'incident report evacuation drill fire exit inspection compliance certificate renewal'
+).split()
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create() keep the created_at/updated_at values it is given."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _sentence(rng, low, high):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(low, high)))
+
+
+def _timestamps(rng, now, index, count):
+    # Roughly evenly spread, oldest first, so ids and created_at agree.
+    created_at = now - HISTORY + HISTORY * (index + rng.random()) / max(count, 1)
+    updated_at = created_at + timedelta(seconds=rng.randint(0, 3600)) if rng.random() < 0.2 else created_at
+    return created_at, min(updated_at, now)
+
+
+def _insert(model, objects, batch_size, progress):
+    created = 0
+    with explicit_timestamps(model):
+        for batch in _batches(objects, batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+                # bulk_create() sends no post_save.
+                count_created(model, batch)
+            created += len(batch)
+            if progress is not None:
+                progress(model, created)
+    return created
+
+
+def seed_dataset(users=100, warehouses=1000, categories=12, subcategories=5, announcements=10000,
+                 batch_size=DEFAULT_BATCH_SIZE, seed=DEFAULT_SEED, progress=None):
+    """
+    Insert a reproducible, realistic-looking dataset in batches.
+
+    ``subcategories`` is per category. The same ``seed`` always produces the
+    same rows. ``progress(model, created_so_far)`` is called after every
+    batch. Returns ``{model_name: rows_created}``.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    password = make_password(SEED_PASSWORD)
+    counts = {}
+    first_user = User.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    roles = [User.PLATFORM_ADMIN] + [User.WAREHOUSE_ADMIN] * 3 + [User.SUPPORT_STAFF] * 6
+
+    def user_rows():
+        for i in range(users):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            created_at, _ = _timestamps(rng, now, i, users)
+            yield User(
+                email='%s.%s.%d@example.com' % (first.lower(), last.lower(), first_user + i + 1),
+                name='%s %s' % (first, last), role=rng.choice(roles), password=password, date_joined=created_at,
+                updated_at=created_at,
+            )
+
+    def warehouse_rows():
+        for i in range(warehouses):
+            city, latitude, longitude = rng.choice(CITIES)
+            created_at, updated_at = _timestamps(rng, now, i, warehouses)
+            yield Warehouse(
+                city=city, latitude=latitude + rng.uniform(-0.5, 0.5), longitude=longitude + rng.uniform(-0.5, 0.5),
+                created_at=created_at, updated_at=updated_at,
+            )
+
+    def category_rows():
+        for i in range(categories):
+            base = CATEGORY_NAMES[i % len(CATEGORY_NAMES)]
+            name = base if i < len(CATEGORY_NAMES) else '%s %d' % (base, i // len(CATEGORY_NAMES) + 1)
+            created_at, updated_at = _timestamps(rng, now, i, categories)
+            yield Category(name=name, description=_sentence(rng, 5, 15), created_at=created_at, updated_at=updated_at)
+
+    counts['user'] = _insert(User, user_rows(), batch_size, progress)
+    counts['warehouse'] = _insert(Warehouse, warehouse_rows(), batch_size, progress)
+    counts['category'] = _insert(Category, category_rows(), batch_size, progress)
+
+    category_ids = list(Category.objects.order_by('id').values_list('id', flat=True))
+
+    def subcategory_rows():
+        total = len(category_ids) * subcategories
+        for i, category_id in enumerate(cid for cid in category_ids for _ in range(subcategories)):
+            created_at, updated_at = _timestamps(rng, now, i, total)
+            yield SubCategory(
+                name=rng.choice(SUBCATEGORY_NAMES), category_id=category_id, description=_sentence(rng, 5, 15),
+                created_at=created_at, updated_at=updated_at,
+            )
+
+    counts['subcategory'] = _insert(SubCategory, subcategory_rows(), batch_size, progress) if subcategories else 0
+
+    author_ids = list(User.objects.values_list('id', flat=True))
+    subcategory_pairs = list(SubCategory.objects.values_list('id', 'category_id'))
+
+    def announcement_rows():
+        for i in range(announcements):
+            created_at, updated_at = _timestamps(rng, now, i, announcements)
+            subcategory_id, category_id = rng.choice(subcategory_pairs) if subcategory_pairs else (None, None)
+            if category_id is None and category_ids:
+                category_id = rng.choice(category_ids)
+            paragraphs = [_sentence(rng, 20, 60).capitalize() + '.' for _ in range(rng.randint(1, 4))]
+            yield Announcement(
+                title=_sentence(rng, 3, 8).capitalize(), content='\n\n'.join(paragraphs),
+                created_by_id=rng.choice(author_ids), category_id=category_id,
+                # A third of announcements are filed under the category only.
+                subcategory_id=subcategory_id if rng.random() > 0.33 else None,
+                created_at=created_at, updated_at=updated_at,
+            )
+
+    counts['announcement'] = _insert(Announcement, announcement_rows(), batch_size, progress) if author_ids else 0
+
+    # bulk_create() sends no post_save.
+    for model in (Warehouse, Category, SubCategory):
+        invalidate(model)
+    return counts
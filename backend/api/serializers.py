@@ -1,11 +1,80 @@
 
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db.models.functions import Substr
+from .fieldsets import SparseFieldsetMixin
+from .geo import GeohashField
+from .instrumentation import TimedSerializerMixin
 from .models import Warehouse, Announcement, Category, SubCategory
 
 User = get_user_model()
 
-class UserSerializer(serializers.ModelSerializer):
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+class BulkListSerializer(TimedListSerializer):
+    """
+    ListSerializer writing through bulk_create/bulk_update.
+
+    Foreign keys declared with PreloadedPrimaryKeyRelatedField are resolved
+    with one in_bulk() query per field instead of one query per item.
+    """
+
+    def to_internal_value(self, data):
+        self.preloaded = {}
+        if isinstance(data, list):
+            for name, field in self.child.fields.items():
+                if isinstance(field, PreloadedPrimaryKeyRelatedField) and not field.read_only:
+                    pks = set()
+                    for item in data:
+                        try:
+                            pks.add(field.to_pk(item[name]))
+                        except (TypeError, ValueError, KeyError):
+                            pass
+                    self.preloaded[name] = field.get_queryset().in_bulk(pks)
+        return super().to_internal_value(data)
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        return model.objects.bulk_create([model(**attrs) for attrs in validated_data])
+
+    def update(self, instances, validated_data):
+        model = self.child.Meta.model
+        # bulk_update() skips Field.pre_save(), which is where auto_now and
+        # derived columns such as Warehouse.geohash get their values.
+        derived = [
+            field for field in model._meta.concrete_fields
+            if getattr(field, 'auto_now', False) or isinstance(field, GeohashField)
+        ]
+        fields = {field.name for field in derived}
+        for instance, attrs in zip(instances, validated_data):
+            for attr, value in attrs.items():
+                setattr(instance, attr, value)
+                fields.add(attr)
+            for field in derived:
+                field.pre_save(instance, add=False)
+        model.objects.bulk_update(instances, sorted(fields))
+        return instances
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    @staticmethod
+    def to_pk(data):
+        if isinstance(data, bool):
+            raise TypeError(data)
+        return int(data)
+
+    def to_internal_value(self, data):
+        preloaded = getattr(self.root, 'preloaded', {}).get(self.field_name)
+        if preloaded is None:
+            return super().to_internal_value(data)
+        try:
+            return preloaded[self.to_pk(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'email', 'name', 'role')
@@ -15,31 +84,131 @@ class LoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
     password = serializers.CharField(write_only=True)
 
-class WarehouseSerializer(serializers.ModelSerializer):
+class BulkDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+class WarehouseSerializer(TimedSerializerMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Warehouse
-        fields = '__all__'
+        # Not geohash: an index key derived from latitude/longitude.
+        fields = ['id', 'city', 'latitude', 'longitude', 'created_at', 'updated_at']
+        list_serializer_class = BulkListSerializer
+
+class NearbyWarehouseSerializer(WarehouseSerializer):
+    distance_km = serializers.FloatField(read_only=True)
+
+    class Meta(WarehouseSerializer.Meta):
+        fields = WarehouseSerializer.Meta.fields + ['distance_km']
+
+class NearestQuerySerializer(serializers.Serializer):
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lng = serializers.FloatField(min_value=-180, max_value=180)
+    k = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+class WithinQuerySerializer(serializers.Serializer):
+    bbox = serializers.CharField(help_text='min_lng,min_lat,max_lng,max_lat')
+    limit = serializers.IntegerField(min_value=1, max_value=1000, default=100)
 
-class CategorySerializer(serializers.ModelSerializer):
+    def validate_bbox(self, value):
+        try:
+            min_lng, min_lat, max_lng, max_lat = (float(part) for part in value.split(','))
+        except ValueError:
+            raise serializers.ValidationError('Expected min_lng,min_lat,max_lng,max_lat.')
+        if not (-180 <= min_lng <= 180 and -180 <= max_lng <= 180):
+            raise serializers.ValidationError('Longitudes must be between -180 and 180.')
+        if not (-90 <= min_lat <= max_lat <= 90):
+            raise serializers.ValidationError('Latitudes must be between -90 and 90, min first.')
+        return min_lng, min_lat, max_lng, max_lat
+
+class CategorySerializer(TimedSerializerMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ['id', 'name', 'description', 'created_at', 'updated_at']
+        list_serializer_class = BulkListSerializer
 
-class SubCategorySerializer(serializers.ModelSerializer):
+class SubCategorySerializer(TimedSerializerMixin, SparseFieldsetMixin, serializers.ModelSerializer):
+    serializer_related_field = PreloadedPrimaryKeyRelatedField
     category_name = serializers.CharField(source='category.name', read_only=True)
     
     class Meta:
         model = SubCategory
         fields = ['id', 'name', 'category', 'category_name', 'description', 'created_at', 'updated_at']
+        list_serializer_class = BulkListSerializer
 
-        model = Warehouse
-        fields = ['id', 'city', 'latitude', 'longitude', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'created_at', 'updated_at']
+class SubCategoryTreeSerializer(serializers.ModelSerializer):
+    announcement_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = SubCategory
+        fields = ['id', 'name', 'description', 'announcement_count', 'created_at', 'updated_at']
+
+class CategoryTreeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    announcement_count = serializers.IntegerField(read_only=True)
+    subcategories = SubCategoryTreeSerializer(many=True, read_only=True)
 
-class AnnouncementSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Category
+        fields = ['id', 'name', 'description', 'announcement_count', 'subcategories', 'created_at', 'updated_at']
+        list_serializer_class = TimedListSerializer
+
+class AnnouncementSerializer(TimedSerializerMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     created_by_name = serializers.CharField(source='created_by.name', read_only=True)
     
     class Meta:
         model = Announcement
         fields = ['id', 'title', 'content', 'created_by', 'created_by_name', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_by', 'created_at', 'updated_at']
+        list_serializer_class = TimedListSerializer
+
+class ContentPreviewField(serializers.CharField):
+    """Read-only text cut to ``max_length`` characters, with an ellipsis when cut."""
+
+    def to_representation(self, value):
+        value = super().to_representation(value)
+        if len(value) > self.max_length:
+            return value[:self.max_length].rstrip() + '\u2026'
+        return value
+
+class AnnouncementListSerializer(AnnouncementSerializer):
+    """
+    List rows carry a truncated ``content_preview`` instead of the full
+    content unless ``content`` is asked for with ``?fields=``.
+    """
+    PREVIEW_LENGTH = 200
+
+    content_preview = ContentPreviewField(source='content_head', max_length=PREVIEW_LENGTH, read_only=True)
+    default_fields = ['id', 'title', 'content_preview', 'created_by', 'created_by_name', 'created_at', 'updated_at']
+
+    class Meta(AnnouncementSerializer.Meta):
+        fields = AnnouncementSerializer.Meta.fields + ['content_preview']
+
+    @classmethod
+    def with_preview(cls, queryset, fields=None):
+        """Annotate the preview's source column when ``fields`` include it."""
+        if 'content_preview' not in (cls.default_fields if fields is None else fields):
+            return queryset
+        # One character past the limit tells the field whether it was cut,
+        # without reading the rest of the body out of the database.
+        return queryset.annotate(content_head=Substr('content', 1, cls.PREVIEW_LENGTH + 1))
+
+class AnnouncementSearchResultSerializer(AnnouncementSerializer):
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta(AnnouncementSerializer.Meta):
+        fields = AnnouncementSerializer.Meta.fields + ['rank']
+
+class AnnouncementFilterSerializer(serializers.Serializer):
+    category = serializers.IntegerField(min_value=1, required=False)
+    subcategory = serializers.IntegerField(min_value=1, required=False)
+    created_by = serializers.IntegerField(min_value=1, required=False)
+
+    def filter(self, queryset):
+        return queryset.filter(**{'%s_id' % name: value for name, value in self.validated_data.items()})
+
+class SearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+    offset = serializers.IntegerField(min_value=0, max_value=1000, default=0)
+
+class DashboardStatsQuerySerializer(serializers.Serializer):
+    top = serializers.IntegerField(min_value=1, max_value=100, default=10)
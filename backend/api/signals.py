@@ -0,0 +1,94 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .authentication import forget_user, remember_user
+from .caching import invalidate
+from .changefeed import record_change
+from .dashboard import count_deleted, count_saved, remember_buckets
+from .models import ChangeEvent, User, Warehouse, Announcement, Category, SubCategory
+from .sync import record_deletion, touch_embedding_rows
+
+
+@receiver(post_save, sender=Warehouse)
+@receiver(post_delete, sender=Warehouse)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=SubCategory)
+@receiver(post_delete, sender=SubCategory)
+def invalidate_cached_payloads(sender, using, **kwargs):
+    # Before commit a concurrent read would cache the old rows under the new generation.
+    transaction.on_commit(lambda: invalidate(sender), using=using)
+
+
+@receiver(post_delete, sender=Warehouse)
+@receiver(post_delete, sender=Announcement)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=SubCategory)
+def leave_tombstone(sender, instance, **kwargs):
+    # Also sent for queryset and cascade deletes, which collect the rows first.
+    record_deletion(instance)
+
+
+@receiver(post_save, sender=Warehouse)
+@receiver(post_save, sender=Announcement)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=SubCategory)
+def publish_save(sender, instance, created, **kwargs):
+    record_change(instance, ChangeEvent.CREATE if created else ChangeEvent.UPDATE)
+
+
+@receiver(post_delete, sender=Warehouse)
+@receiver(post_delete, sender=Announcement)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=SubCategory)
+def publish_delete(sender, instance, **kwargs):
+    record_change(instance, ChangeEvent.DELETE)
+
+
+@receiver(post_save, sender=Category)
+def touch_subcategories(sender, instance, created, **kwargs):
+    if not created:
+        touch_embedding_rows(sender, [instance.pk])
+
+
+@receiver(post_save, sender=User)
+def touch_announcements(sender, instance, created, **kwargs):
+    if not created and instance.embedded_state_changed():
+        touch_embedding_rows(sender, [instance.pk])
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=Warehouse)
+@receiver(pre_save, sender=Announcement)
+def remember_dashboard_buckets(sender, instance, update_fields=None, **kwargs):
+    remember_buckets(instance, update_fields)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Warehouse)
+@receiver(post_save, sender=Announcement)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=SubCategory)
+def count_dashboard_save(sender, instance, created, **kwargs):
+    count_saved(instance, created)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Warehouse)
+@receiver(post_delete, sender=Announcement)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=SubCategory)
+def count_dashboard_delete(sender, instance, **kwargs):
+    # Cascades delete the dependent rows, and send their signals, first.
+    count_deleted(instance)
+
+
+@receiver(post_save, sender=User)
+def refresh_token_version(sender, instance, **kwargs):
+    remember_user(instance)
+
+
+@receiver(post_delete, sender=User)
+def forget_token_version(sender, instance, **kwargs):
+    forget_user(instance.pk)
@@ -0,0 +1,169 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, timedelta
+from urllib import parse
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from .changefeed import record_changes
+from .conditional import EMBEDDED_RELATIONS
+from .fieldsets import sparse_queryset
+from .models import ChangeEvent, Tombstone
+
+UPDATED_SINCE_PARAM = 'updated_since'
+DEFAULT_RETENTION = timedelta(days=30)
+# Cursors stay this far behind now: a transaction may commit after a later
+# one with an earlier updated_at, so recent rows are sent again, not skipped.
+DEFAULT_SETTLE = timedelta(seconds=5)
+DEFAULT_PAGE_SIZE = 500
+SYNC_FIELDS = ('updated_at', 'id')
+MAX_DELETED_PER_PAGE = 5000
+TOUCH_BATCH_SIZE = 1000
+
+
+class SyncCursorExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = 'Deletions this old are no longer kept; reload the whole collection.'
+    default_code = 'sync_cursor_expired'
+
+
+def retention():
+    return getattr(settings, 'TOMBSTONE_RETENTION', DEFAULT_RETENTION)
+
+
+def record_deletion(instance):
+    Tombstone.objects.create(
+        content_type=ContentType.objects.get_for_model(type(instance)), object_id=instance.pk,
+    )
+
+
+def touch_embedding_rows(model, pks):
+    """Bump updated_at of the rows whose payload embeds the ``model`` rows ``pks``."""
+    now = timezone.now()
+    for dependent, relations in EMBEDDED_RELATIONS.items():
+        for relation in relations:
+            if dependent._meta.get_field(relation).related_model is model:
+                rows = dependent.objects.filter(**{'%s__in' % relation: pks}).order_by('pk')
+                last_pk = 0
+                while True:
+                    touched = list(rows.filter(pk__gt=last_pk).values_list('pk', flat=True)[:TOUCH_BATCH_SIZE])
+                    if not touched:
+                        break
+                    dependent.objects.filter(pk__in=touched).update(updated_at=now)
+                    record_changes(dependent, touched, ChangeEvent.UPDATE)
+                    last_pk = touched[-1]
+
+
+def prune_tombstones(now=None):
+    cutoff = (now or timezone.now()) - retention()
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
+
+
+class SyncCursor:
+    """The last (updated_at, id) row and (deleted_at, id) tombstone a client has seen."""
+
+    def __init__(self, updated_at, pk, deleted_at, tombstone_pk):
+        self.updated_at = updated_at
+        self.pk = pk
+        self.deleted_at = deleted_at
+        self.tombstone_pk = tombstone_pk
+
+    @classmethod
+    def decode(cls, value):
+        moment = parse_datetime(value)
+        if moment is not None:
+            if timezone.is_naive(moment):
+                moment = timezone.make_aware(moment)
+            return cls(moment, 0, moment, 0)
+        try:
+            tokens = parse.parse_qs(urlsafe_b64decode(value.encode('ascii')).decode('ascii'))
+            return cls(
+                datetime.fromisoformat(tokens['u'][0]), int(tokens['i'][0]),
+                datetime.fromisoformat(tokens['d'][0]), int(tokens['t'][0]),
+            )
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise serializers.ValidationError({
+                UPDATED_SINCE_PARAM: ['Expected a cursor from a previous response or an ISO 8601 datetime.'],
+            })
+
+    def encode(self):
+        querystring = parse.urlencode({
+            'u': self.updated_at.isoformat(), 'i': self.pk, 'd': self.deleted_at.isoformat(), 't': self.tombstone_pk,
+        })
+        return urlsafe_b64encode(querystring.encode('ascii')).decode('ascii')
+
+
+def _after(queryset, field, moment, pk):
+    # The redundant inclusive bound gives an index range, as in KeysetPagination.
+    return queryset.filter(
+        Q(**{'%s__gte' % field: moment}),
+        Q(**{'%s__gt' % field: moment}) | Q(id__gt=pk),
+    ).order_by(field, 'id')
+
+
+def _page_size(request):
+    try:
+        requested = int(request.query_params['page_size'])
+    except (KeyError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return min(max(requested, 1), DEFAULT_PAGE_SIZE)
+
+
+def is_delta_request(request):
+    return UPDATED_SINCE_PARAM in request.query_params
+
+
+def delta_response(request, queryset, serializer_class):
+    """
+    Rows changed and ids deleted after the ``?updated_since=`` cursor::
+
+        {"results": [...], "deleted": [ids], "cursor": "...", "has_more": false}
+    """
+    now = timezone.now()
+    settled = now - DEFAULT_SETTLE
+    value = request.query_params[UPDATED_SINCE_PARAM]
+    if value:
+        cursor = SyncCursor.decode(value)
+        if cursor.deleted_at < now - retention():
+            raise SyncCursorExpired()
+    else:
+        # First sync: every row, and no deletions the client cannot have seen.
+        cursor = SyncCursor(datetime.min.replace(tzinfo=timezone.utc), 0, settled, 0)
+    page_size = _page_size(request)
+    queryset, fields = sparse_queryset(request, queryset, serializer_class, SYNC_FIELDS)
+
+    rows = list(_after(queryset, 'updated_at', cursor.updated_at, cursor.pk)[:page_size + 1])
+    more_rows = len(rows) > page_size
+    rows = rows[:page_size]
+    tombstones = list(
+        _after(
+            Tombstone.objects.filter(content_type=ContentType.objects.get_for_model(queryset.model)),
+            'deleted_at', cursor.deleted_at, cursor.tombstone_pk,
+        ).values_list('deleted_at', 'id', 'object_id')[:MAX_DELETED_PER_PAGE + 1]
+    )
+    more_tombstones = len(tombstones) > MAX_DELETED_PER_PAGE
+    tombstones = tombstones[:MAX_DELETED_PER_PAGE]
+
+    # Caught up: move to the settle point, never back.
+    if more_rows:
+        updated_at, pk = rows[-1].updated_at, rows[-1].pk
+    else:
+        updated_at, pk = max((cursor.updated_at, cursor.pk), (settled, 0))
+    if more_tombstones:
+        deleted_at, tombstone_pk = tombstones[-1][:2]
+    else:
+        deleted_at, tombstone_pk = max((cursor.deleted_at, cursor.tombstone_pk), (settled, 0))
+
+    return Response({
+        'results': serializer_class(rows, many=True, fields=fields).data,
+        'deleted': [object_id for _, _, object_id in tombstones],
+        'cursor': SyncCursor(updated_at, pk, deleted_at, tombstone_pk).encode(),
+        'has_more': more_rows or more_tombstones,
+    })
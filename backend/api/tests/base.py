@@ -0,0 +1,38 @@
+import os
+import tempfile
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from ..authentication import issue_token
+from ..models import User
+from ..ratelimit import get_bucket_store
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class APITestCase(TestCase):
+    """
+    TestCase whose ``self.client`` is signed in as a platform admin, with
+    empty caches and login buckets, and a revocation list of its own.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        directory = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(directory.cleanup)
+        revocation = override_settings(TOKEN_REVOCATION_DB=os.path.join(directory.name, 'revoked.sqlite3'))
+        revocation.enable()
+        cls.addClassCleanup(revocation.disable)
+        super().setUpClass()
+
+    def setUp(self):
+        for alias in ('default', 'api'):
+            caches[alias].clear()
+        get_bucket_store().clear()
+        self.user = User.objects.create_user(
+            'admin@example.com', password='secret', name='Admin', role=User.PLATFORM_ADMIN,
+        )
+        self.client = self.client_for(self.user)
+
+    def client_for(self, user):
+        return self.client_class(HTTP_AUTHORIZATION='Bearer %s' % issue_token(user).access_token)
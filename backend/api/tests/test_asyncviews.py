@@ -0,0 +1,90 @@
+import json
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.core.cache import caches
+from django.test import AsyncRequestFactory, RequestFactory
+
+from .. import asyncviews, views
+from ..authentication import issue_token
+from ..models import Announcement, Category, SubCategory, Warehouse
+from .base import APITestCase
+
+
+class AsyncViewTests(APITestCase):
+    """The async views answer exactly as the sync ones they replace."""
+
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(name='News')
+        self.subcategory = SubCategory.objects.create(name='Local', category=self.category)
+        self.warehouse = Warehouse.objects.create(city='Pune', latitude=18.5, longitude=73.8)
+        for i in range(3):
+            Announcement.objects.create(
+                title='Title %d' % i, content='Body %d' % i, category=self.category, created_by=self.user,
+            )
+        self.headers = {'Authorization': 'Bearer %s' % issue_token(self.user).access_token}
+
+    def sync_call(self, name, path, data=None, **kwargs):
+        request = RequestFactory().get(path, data, headers=self.headers)
+        response = getattr(views, name).as_view()(request, **kwargs)
+        return response.status_code, json.loads(response.render().content or 'null')
+
+    async def async_call(self, name, path, data=None, method='get', auth=True, **kwargs):
+        extra = {'headers': self.headers} if auth else {}
+        if method != 'get':
+            extra['content_type'] = 'application/json'
+        request = getattr(AsyncRequestFactory(), method)(path, data, **extra)
+        response = await getattr(asyncviews, name).as_view()(request, **kwargs)
+        content = await sync_to_async(lambda: response.render().content)()
+        return response.status_code, json.loads(content or 'null')
+
+    async def assert_same(self, name, path, data=None, **kwargs):
+        expected = await sync_to_async(self.sync_call)(name, path, data, **kwargs)
+        # Not from the payload cache the sync view just filled.
+        caches['api'].clear()
+        self.assertEqual(await self.async_call(name, path, data, **kwargs), expected)
+
+    def test_views_are_coroutines(self):
+        for name in ('WarehouseAPIView', 'AnnouncementAPIView', 'CategoryDetailAPIView'):
+            with self.subTest(name=name):
+                self.assertTrue(iscoroutinefunction(getattr(asyncviews, name).as_view()))
+
+    async def test_lists_match_the_sync_views(self):
+        cases = [
+            ('WarehouseAPIView', '/api/warehouses/', None),
+            ('AnnouncementAPIView', '/api/announcements/', {'page_size': 2}),
+            ('AnnouncementAPIView', '/api/announcements/', {'fields': 'id,title', 'category': self.category.pk}),
+            ('CategoryAPIView', '/api/categories/', None),
+            ('SubCategoryAPIView', '/api/subcategories/', None),
+        ]
+        for name, path, data in cases:
+            with self.subTest(name=name, data=data):
+                await self.assert_same(name, path, data)
+
+    async def test_details_match_the_sync_views(self):
+        cases = [
+            ('WarehouseDetailAPIView', '/api/warehouses/%d/', self.warehouse.pk),
+            ('CategoryDetailAPIView', '/api/categories/%d/', self.category.pk),
+            ('SubCategoryDetailAPIView', '/api/subcategories/%d/', self.subcategory.pk),
+            ('CategoryDetailAPIView', '/api/categories/%d/', 0),
+        ]
+        for name, path, pk in cases:
+            with self.subTest(name=name, pk=pk):
+                await self.assert_same(name, path % pk, pk=pk)
+
+    async def test_invalid_filter(self):
+        status, body = await self.async_call('AnnouncementAPIView', '/api/announcements/', {'category': 'x'})
+        self.assertEqual(status, 400)
+        self.assertIn('category', body)
+
+    async def test_authentication_is_required(self):
+        status, _ = await self.async_call('CategoryAPIView', '/api/categories/', auth=False)
+        self.assertEqual(status, 401)
+
+    async def test_writes_use_the_sync_handlers(self):
+        status, body = await self.async_call(
+            'CategoryAPIView', '/api/categories/', {'name': 'Events'}, method='post',
+        )
+        self.assertEqual(status, 201)
+        self.assertEqual(body['name'], 'Events')
+        self.assertTrue(await Category.objects.filter(name='Events').aexists())
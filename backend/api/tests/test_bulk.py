@@ -0,0 +1,44 @@
+from django.urls import reverse
+
+from ..models import Category
+from .base import APITestCase
+
+
+class BulkUpdateTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.categories = [Category.objects.create(name='Category %d' % i) for i in range(2)]
+
+    def put(self, items):
+        return self.client.put(reverse('category-bulk'), items, content_type='application/json')
+
+    def test_updates_every_item(self):
+        response = self.put([{'id': c.pk, 'name': 'New %d' % c.pk} for c in self.categories])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(Category.objects.values_list('name', flat=True)), sorted('New %d' % c.pk for c in self.categories)
+        )
+
+    def test_boolean_id_is_not_a_row(self):
+        # true == 1, so make sure there is a row 1 it could be taken for.
+        Category.objects.filter(pk=1).delete()
+        Category.objects.create(pk=1, name='First')
+        response = self.put([{'id': True, 'name': 'Changed'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'], [{'id': ['A valid integer is required.']}])
+        self.assertEqual(Category.objects.get(pk=1).name, 'First')
+
+    def test_list_and_object_ids_are_rejected(self):
+        response = self.put([{'id': [1], 'name': 'A'}, {'id': {}, 'name': 'B'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'], [
+            {'id': ['A valid integer is required.']}, {'id': ['A valid integer is required.']},
+        ])
+
+    def test_duplicate_and_missing_ids(self):
+        pk = self.categories[0].pk
+        response = self.put([{'id': pk, 'name': 'A'}, {'id': pk, 'name': 'B'}, {'name': 'C'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'], [
+            {}, {'id': ['Duplicate id.']}, {'id': ['This field is required.']},
+        ])
@@ -0,0 +1,50 @@
+from django.db import transaction
+from django.urls import reverse
+
+from ..caching import get_generation
+from ..models import Category
+from .base import APITestCase
+
+
+class CachedPayloadTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(name='Before')
+
+    def names(self, response):
+        return [row['name'] for row in response.json()['results']]
+
+    def test_hit_after_miss(self):
+        first = self.client.get(reverse('category-list'))
+        second = self.client.get(reverse('category-list'))
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.json(), first.json())
+
+    def test_write_invalidates_list(self):
+        self.client.get(reverse('category-list'))
+        url = reverse('category-detail', kwargs={'pk': self.category.pk})
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(url, {'name': 'After'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(reverse('category-list'))
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(self.names(response), ['After'])
+
+    def test_renaming_category_invalidates_subcategories(self):
+        generation = get_generation('subcategory')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'After'
+            self.category.save()
+        self.assertNotEqual(get_generation('subcategory'), generation)
+
+    def test_invalidated_only_after_commit(self):
+        generation = get_generation('category')
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                Category.objects.filter(pk=self.category.pk).get().delete()
+            self.assertEqual(get_generation('category'), generation)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_generation('category'), generation)
@@ -0,0 +1,83 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Category, SubCategory
+from .base import APITestCase
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.categories = [Category.objects.create(name='Category %d' % i) for i in range(3)]
+
+    def test_list_revalidates_with_etag(self):
+        url = reverse('category-list')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_list_etag_changes_after_delete(self):
+        url = reverse('category-list')
+        etag = self.client.get(url)['ETag']
+        deleted = self.categories[0]
+        deleted.delete()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(deleted.pk, [row['id'] for row in response.json()['results']])
+
+    def test_detail_revalidates_with_last_modified(self):
+        url = reverse('category-detail', kwargs={'pk': self.categories[0].pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_renaming_category_changes_subcategory_etag(self):
+        subcategory = SubCategory.objects.create(name='Sub', category=self.categories[0])
+        url = reverse('subcategory-detail', kwargs={'pk': subcategory.pk})
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.categories[0].name = 'Renamed'
+            self.categories[0].save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['category_name'], 'Renamed')
+
+    def test_put_with_stale_if_match_is_rejected(self):
+        category = self.categories[0]
+        url = reverse('category-detail', kwargs={'pk': category.pk})
+        response = self.client.put(
+            url, {'name': 'Changed'}, content_type='application/json', HTTP_IF_MATCH='"stale"',
+        )
+        self.assertEqual(response.status_code, 412)
+        category.refresh_from_db()
+        self.assertEqual(category.name, 'Category 0')
+
+        etag = self.client.get(url)['ETag']
+        response = self.client.put(url, {'name': 'Changed'}, content_type='application/json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_if_match_is_checked_under_the_write_lock(self):
+        url = reverse('category-detail', kwargs={'pk': self.categories[0].pk})
+        etag = self.client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.put(url, {'name': 'Changed'}, content_type='application/json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        queries = [query['sql'] for query in context.captured_queries]
+        # The validator is read inside the transaction that saves the row.
+        self.assertTrue(queries[0].startswith('SAVEPOINT'), queries[0])
+        self.assertIn('updated_at', queries[1])
+        if connection.features.has_select_for_update:
+            self.assertIn('FOR UPDATE', queries[1])
+
+        response = self.client.put(url, {'name': 'Again'}, content_type='application/json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
@@ -0,0 +1,103 @@
+from django.urls import reverse
+
+from .. import dashboard
+from ..models import Announcement, Category, DashboardCounter, SubCategory, User, Warehouse
+from .base import APITestCase
+
+
+class DashboardCounterTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.news = Category.objects.create(name='News')
+        self.events = Category.objects.create(name='Events')
+        self.local = SubCategory.objects.create(name='Local', category=self.news)
+
+    def counters(self):
+        return dict(
+            ((dimension, bucket), count)
+            for dimension, bucket, count in DashboardCounter.objects.values_list('dimension', 'bucket', 'count')
+            if count
+        )
+
+    def assert_counters_match_a_recount(self):
+        kept = self.counters()
+        dashboard.rebuild()
+        self.assertEqual(kept, self.counters())
+
+    def create_author(self):
+        return User.objects.create_user('author@example.com', password='secret', name='Author', role=User.SUPPORT_STAFF)
+
+    def announce(self, category=None, subcategory=None, user=None):
+        return Announcement.objects.create(
+            title='Title', content='Body', category=category, subcategory=subcategory, created_by=user or self.user,
+        )
+
+    def test_saves_and_deletes_keep_the_counters_exact(self):
+        first = self.announce(self.news, self.local)
+        second = self.announce(self.news)
+        self.announce(self.events)
+        first.category = self.events
+        first.save()
+        second.delete()
+        Warehouse.objects.create(city='Pune', latitude=18.5, longitude=73.8)
+        author = self.create_author()
+        self.announce(self.news, user=author)
+        self.assertEqual(self.counters()[dashboard.TOTAL, 'announcements'], 3)
+        self.assertEqual(self.counters()['announcements_by_category', str(self.events.pk)], 2)
+        self.assert_counters_match_a_recount()
+
+    def test_unrelated_updates_leave_the_counters_alone(self):
+        announcement = self.announce(self.news)
+        before = self.counters()
+        announcement.title = 'New title'
+        announcement.save(update_fields=['title'])
+        self.assertEqual(self.counters(), before)
+
+    def test_deleting_a_category_moves_its_announcements_to_none(self):
+        self.announce(self.news, self.local)
+        self.announce(self.news)
+        self.news.delete()
+        self.assertEqual(self.counters()['announcements_by_category', ''], 2)
+        self.assertNotIn(('announcements_by_category', str(self.news.pk)), self.counters())
+        self.assert_counters_match_a_recount()
+
+    def test_deleting_an_author_drops_their_announcements(self):
+        author = self.create_author()
+        self.announce(self.news, user=author)
+        author.delete()
+        self.assertNotIn(('announcements_by_author', str(author.pk)), self.counters())
+        self.assert_counters_match_a_recount()
+
+    def test_bulk_endpoints_are_counted(self):
+        response = self.client.post(reverse('warehouse-bulk'), [
+            {'city': 'Pune', 'latitude': 18.5, 'longitude': 73.8},
+            {'city': 'Goa', 'latitude': 15.4, 'longitude': 74.0},
+        ], content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        pk = response.json()['results'][0]['id']
+        response = self.client.put(
+            reverse('warehouse-bulk'), [{'id': pk, 'city': 'Goa', 'latitude': 18.5, 'longitude': 73.8}],
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.counters()['warehouses_by_city', 'Goa'], 2)
+        self.announce(self.events)
+        response = self.client.delete(
+            reverse('category-bulk'), {'ids': [self.events.pk]}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.counters()['announcements_by_category', ''], 1)
+        self.assert_counters_match_a_recount()
+
+    def test_stats_endpoint(self):
+        for _ in range(3):
+            self.announce(self.news)
+        self.announce(self.events)
+        response = self.client.get(reverse('dashboard-stats'), {'top': 1})
+        self.assertEqual(response.status_code, 200)
+        stats = response.json()
+        self.assertEqual(stats['totals']['announcements'], 4)
+        self.assertEqual(stats['totals']['categories'], 2)
+        self.assertEqual(stats['announcements_by_category'], [{'id': self.news.pk, 'name': 'News', 'count': 3}])
+        self.assertEqual(stats['users_by_role'], [{'role': User.PLATFORM_ADMIN, 'count': 1}])
+        self.assertEqual(self.client.get(reverse('dashboard-stats'), {'top': 0}).status_code, 400)
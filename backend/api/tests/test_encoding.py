@@ -0,0 +1,111 @@
+import datetime
+import decimal
+import gzip
+import json
+import uuid
+from unittest import mock, skipIf
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+
+from .. import compression, renderers
+from ..compression import choose_encoding
+from ..models import Announcement
+from ..renderers import FastJSONRenderer
+from .base import APITestCase
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_matches_drf_output(self):
+        data = {
+            'id': 1, 'title': 'Café   line', 'rank': 1.5, 'none': None, 'nested': [True, {'a': []}],
+            'created_at': datetime.datetime(2026, 1, 2, 3, 4, 5, 123456, tzinfo=datetime.timezone.utc),
+            'day': datetime.date(2026, 1, 2), 'price': decimal.Decimal('1.10'), 'uuid': uuid.UUID(int=1),
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indented_output_falls_back(self):
+        context = {'indent': 2}
+        self.assertEqual(
+            FastJSONRenderer().render({'a': 1}, renderer_context=context),
+            JSONRenderer().render({'a': 1}, renderer_context=context),
+        )
+
+    def test_without_orjson(self):
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(FastJSONRenderer().render({'a': [1]}), b'{"a":[1]}')
+
+
+class ChooseEncodingTests(SimpleTestCase):
+    def test_negotiation(self):
+        preferred = 'br' if brotli is not None else 'gzip'
+        cases = [
+            ('', None),
+            ('identity', None),
+            ('gzip', 'gzip'),
+            ('gzip, br', preferred),
+            ('br;q=0.5, gzip', 'gzip'),
+            ('gzip;q=0, br;q=0', None),
+            ('*', preferred),
+            ('*;q=0.1, gzip;q=0', 'br' if brotli is not None else None),
+            ('GZIP;q=bogus, gzip', 'gzip'),
+        ]
+        for header, expected in cases:
+            with self.subTest(header=header):
+                self.assertEqual(choose_encoding(header), expected)
+
+    def test_gzip_only_without_brotli(self):
+        with mock.patch.object(compression, 'brotli', None):
+            self.assertEqual(choose_encoding('br, gzip'), 'gzip')
+            self.assertIsNone(choose_encoding('br'))
+
+
+class CompressionMiddlewareTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(20):
+            Announcement.objects.create(title='Title %d' % i, content='Lorem ipsum ' * 20, created_by=self.user)
+
+    def get(self, url, encoding, **params):
+        return self.client.get(url, params, HTTP_ACCEPT_ENCODING=encoding)
+
+    def test_gzip(self):
+        response = self.get(reverse('announcement-list'), 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))['results']), 20)
+
+    @skipIf(brotli is None, 'brotli is not installed')
+    def test_brotli(self):
+        response = self.get(reverse('announcement-list'), 'gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(len(json.loads(brotli.decompress(response.content))['results']), 20)
+
+    def test_small_responses_are_left_alone(self):
+        response = self.get(reverse('announcement-list'), 'gzip', fields='id', page_size=1)
+        self.assertLess(len(response.content), compression.DEFAULT_MIN_SIZE)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(len(response.json()['results']), 1)
+
+    def test_etag_is_unchanged(self):
+        plain = self.get(reverse('announcement-list'), '')
+        compressed = self.get(reverse('announcement-list'), 'gzip')
+        self.assertEqual(compressed['ETag'], plain['ETag'])
+        response = self.client.get(
+            reverse('announcement-list'), HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=plain['ETag'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_streaming_export(self):
+        response = self.get(reverse('announcement-export'), 'gzip', format='ndjson')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        body = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(len(body.splitlines()), 20)
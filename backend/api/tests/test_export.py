@@ -0,0 +1,72 @@
+import csv
+import io
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import exporters
+from ..models import Announcement, Category
+from .base import APITestCase
+
+
+class AnnouncementExportTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(name='News, "local"')
+        self.announcements = [
+            Announcement.objects.create(
+                title='Title %d' % i, content='Line one\nline two', created_by=self.user,
+                category=self.category if i % 2 else None,
+            )
+            for i in range(5)
+        ]
+        # Oldest first: announcement i was created i days ago, reversed.
+        now = timezone.now()
+        for i, announcement in enumerate(self.announcements):
+            Announcement.objects.filter(pk=announcement.pk).update(created_at=now - timedelta(days=5 - i))
+
+    def export(self, **params):
+        response = self.client.get(reverse('announcement-export'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv_is_the_default(self):
+        response, body = self.export()
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('announcements.csv', response['Content-Disposition'])
+        rows = list(csv.reader(io.StringIO(body)))
+        self.assertEqual(rows[0], [name for name, _ in exporters.ANNOUNCEMENT_EXPORT_FIELDS])
+        self.assertEqual([int(row[0]) for row in rows[1:]], [a.pk for a in self.announcements])
+        self.assertEqual(rows[2][2], 'Line one\nline two')
+        self.assertEqual(rows[2][6], 'News, "local"')
+        self.assertEqual(rows[1][6], '')
+
+    def test_ndjson(self):
+        response, body = self.export(format='ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['id'] for row in rows], [a.pk for a in self.announcements])
+        self.assertEqual(rows[1]['created_by_name'], self.user.name)
+        self.assertEqual(rows[1]['category'], self.category.pk)
+        self.assertIsNone(rows[0]['category_name'])
+
+    def test_filters(self):
+        since = (timezone.now() - timedelta(days=3, hours=12)).isoformat()
+        _, body = self.export(format='ndjson', created_after=since, category=self.category.pk)
+        ids = [json.loads(line)['id'] for line in body.splitlines()]
+        self.assertEqual(ids, [self.announcements[3].pk])
+
+    def test_invalid_filters(self):
+        response = self.client.get(reverse('announcement-export'), {'created_before': 'soon', 'category': 'x'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(json.loads(response.content)), {'created_before', 'category'})
+
+    def test_rows_are_written_in_batches(self):
+        with mock.patch.object(exporters, 'ROWS_PER_WRITE', 2):
+            response = self.client.get(reverse('announcement-export'), {'format': 'ndjson'})
+            chunks = list(response.streaming_content)
+        self.assertEqual([chunk.count(b'\n') for chunk in chunks], [2, 2, 1])
@@ -0,0 +1,61 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Announcement, Category
+from ..serializers import AnnouncementListSerializer
+from .base import APITestCase
+
+CONTENT_COLUMN = '"api_announcement"."content"'
+
+
+class SparseFieldsetTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.long = Announcement.objects.create(
+            title='Long', content='word ' * 100, created_by=self.user,
+        )
+        self.short = Announcement.objects.create(title='Short', content='Brief.', created_by=self.user)
+
+    def list_announcements(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('announcement-list'), params)
+        self.assertEqual(response.status_code, 200)
+        sql = [query['sql'] for query in queries if 'FROM "api_announcement"' in query['sql']]
+        return response.json()['results'], sql
+
+    def test_list_has_a_preview_instead_of_the_content(self):
+        results, sql = self.list_announcements()
+        by_title = {row['title']: row for row in results}
+        self.assertNotIn('content', by_title['Long'])
+        self.assertEqual(len(by_title['Long']['content_preview']), AnnouncementListSerializer.PREVIEW_LENGTH)
+        self.assertTrue(by_title['Long']['content_preview'].endswith('…'))
+        self.assertEqual(by_title['Short']['content_preview'], 'Brief.')
+        # Only the head of the body is read, through SUBSTR().
+        self.assertTrue(sql)
+        self.assertFalse(any(CONTENT_COLUMN in query.replace('SUBSTR(' + CONTENT_COLUMN, '') for query in sql))
+
+    def test_fields_selects_columns(self):
+        results, sql = self.list_announcements(fields='id,title')
+        self.assertEqual(results[0].keys(), {'id', 'title'})
+        self.assertTrue(sql)
+        self.assertFalse(any('content' in query for query in sql))
+        self.assertFalse(any('api_user' in query for query in sql))
+
+    def test_full_content_on_request(self):
+        results, _ = self.list_announcements(fields='id,content,created_by_name')
+        by_id = {row['id']: row for row in results}
+        self.assertEqual(by_id[self.long.pk]['content'], self.long.content)
+        self.assertEqual(by_id[self.long.pk]['created_by_name'], self.user.name)
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(reverse('announcement-list'), {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', response.json()['fields'][0])
+
+    def test_detail_and_other_models(self):
+        response = self.client.get(reverse('announcement-detail', args=[self.short.pk]), {'fields': 'title'})
+        self.assertEqual(response.json(), {'title': 'Short'})
+        Category.objects.create(name='News')
+        response = self.client.get(reverse('category-list'), {'fields': 'name'})
+        self.assertEqual(response.json()['results'], [{'name': 'News'}])
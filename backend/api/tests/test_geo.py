@@ -0,0 +1,79 @@
+import random
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from .. import geo
+from ..models import Warehouse
+from .base import APITestCase
+
+
+class GeohashTests(SimpleTestCase):
+    def test_encode(self):
+        self.assertEqual(geo.encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+
+    def test_haversine(self):
+        # Paris to London.
+        self.assertAlmostEqual(geo.haversine_km(48.8566, 2.3522, 51.5074, -0.1278), 343.5, delta=1)
+
+    def test_bbox_cells_stay_under_the_limit(self):
+        for box in ((-10, 40, 10, 60), (170, -10, -170, 10), (73.7, 18.4, 73.9, 18.6)):
+            with self.subTest(box=box):
+                self.assertLessEqual(len(geo.bbox_cells(*box)), geo.MAX_CELLS)
+
+
+class WarehouseGeoTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        rng = random.Random(7)
+        points = [(rng.uniform(-60, 60), rng.uniform(-180, 180)) for _ in range(300)]
+        # A dense cluster, and points either side of the antimeridian.
+        points += [(18.5 + rng.uniform(-0.05, 0.05), 73.8 + rng.uniform(-0.05, 0.05)) for _ in range(30)]
+        points += [(0.5, 179.9), (-0.5, -179.9), (0.0, 178.0)]
+        Warehouse.objects.bulk_create(
+            Warehouse(city='City %d' % i, latitude=lat, longitude=lng) for i, (lat, lng) in enumerate(points)
+        )
+        self.points = {pk: (lat, lng) for pk, lat, lng in Warehouse.objects.values_list('pk', 'latitude', 'longitude')}
+
+    def brute_nearest(self, lat, lng, k):
+        return sorted(self.points, key=lambda pk: geo.haversine_km(lat, lng, *self.points[pk]))[:k]
+
+    def brute_within(self, min_lng, min_lat, max_lng, max_lat):
+        def inside(lat, lng):
+            in_lng = min_lng <= lng <= max_lng if min_lng <= max_lng else lng >= min_lng or lng <= max_lng
+            return min_lat <= lat <= max_lat and in_lng
+        return sorted(pk for pk, point in self.points.items() if inside(*point))
+
+    def test_nearest_matches_a_full_scan(self):
+        for lat, lng, k in ((18.5, 73.8, 5), (18.5, 73.8, 40), (0.0, 180.0, 3), (-45.0, 20.0, 10), (80.0, 0.0, 2)):
+            with self.subTest(lat=lat, lng=lng, k=k):
+                found = Warehouse.objects.nearest(lat, lng, k)
+                self.assertEqual([w.pk for w in found], self.brute_nearest(lat, lng, k))
+                distances = [w.distance_km for w in found]
+                self.assertEqual(distances, sorted(distances))
+
+    def test_within_matches_a_full_scan(self):
+        for box in ((73.7, 18.4, 73.9, 18.6), (-30, -30, 30, 30), (179.0, -1.0, -179.0, 1.0), (-180, -90, 180, 90)):
+            with self.subTest(box=box):
+                self.assertEqual(sorted(w.pk for w in Warehouse.objects.within(*box)), self.brute_within(*box))
+
+    def test_geohash_follows_moves(self):
+        warehouse = Warehouse.objects.first()
+        warehouse.latitude, warehouse.longitude = 51.5, -0.12
+        warehouse.save()
+        warehouse.refresh_from_db()
+        self.assertEqual(warehouse.geohash, geo.encode(51.5, -0.12))
+
+    def test_nearest_endpoint(self):
+        response = self.client.get(reverse('warehouse-nearest'), {'lat': 18.5, 'lng': 73.8, 'k': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in response.json()], self.brute_nearest(18.5, 73.8, 3))
+        self.assertIn('distance_km', response.json()[0])
+        self.assertEqual(self.client.get(reverse('warehouse-nearest'), {'lat': 91, 'lng': 0}).status_code, 400)
+
+    def test_within_endpoint_reports_truncation(self):
+        response = self.client.get(reverse('warehouse-within'), {'bbox': '73.7,18.4,73.9,18.6', 'limit': 10})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['truncated'])
+        self.assertEqual(len(response.json()['results']), 10)
+        self.assertEqual(self.client.get(reverse('warehouse-within'), {'bbox': '1,2,3'}).status_code, 400)
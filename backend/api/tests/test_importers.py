@@ -0,0 +1,87 @@
+import io
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from .. import importers
+from ..importers import ImportFileError, read_rows
+from ..models import Warehouse
+from .base import APITestCase
+
+
+class ReadRowsTests(SimpleTestCase):
+    def rows(self, data, fmt):
+        return list(read_rows(io.BytesIO(data), fmt))
+
+    def test_csv_rows_are_numbered_from_the_header(self):
+        rows = self.rows(b'\xef\xbb\xbfcity,latitude,longitude,extra\nPune,18.5,73.8,x\nGoa,15.4,74\n', 'csv')
+        self.assertEqual(rows, [
+            (2, {'city': 'Pune', 'latitude': '18.5', 'longitude': '73.8'}),
+            (3, {'city': 'Goa', 'latitude': '15.4', 'longitude': '74'}),
+        ])
+
+    def test_ndjson_reports_bad_lines_and_skips_blank_ones(self):
+        rows = self.rows(b'{"city": "Pune"}\n\n[1]\n{oops\n', 'ndjson')
+        self.assertEqual(rows[0], (1, {'city': 'Pune', 'latitude': None, 'longitude': None}))
+        self.assertEqual([line for line, _ in rows[1:]], [3, 4])
+        self.assertTrue(all(isinstance(row, ValueError) for _, row in rows[1:]))
+
+    def test_line_that_is_not_utf8_is_an_error_for_that_line(self):
+        rows = self.rows(b'city,latitude,longitude\nK\xf6ln,50.9,6.9\nBonn,50.7,7.1\n', 'csv')
+        self.assertEqual(rows[0][0], 2)
+        self.assertIn('byte 0xf6 at column 2', str(rows[0][1]))
+        self.assertEqual(rows[1], (3, {'city': 'Bonn', 'latitude': '50.7', 'longitude': '7.1'}))
+
+    def test_file_that_is_not_utf8_is_rejected(self):
+        with self.assertRaisesMessage(ImportFileError, 'not UTF-8 text'):
+            self.rows(b'\xff\xfec\x00i\x00t\x00y\x00\n', 'csv')
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            read_rows(io.BytesIO(b''), 'xml')
+
+
+class WarehouseImportTests(APITestCase):
+    def upload(self, name, data, **extra):
+        return self.client.post(reverse('warehouse-import'), {'file': SimpleUploadedFile(name, data), **extra})
+
+    def test_imports_valid_rows_and_reports_the_rest_by_line(self):
+        data = b'city,latitude,longitude\nPune,18.5,73.8\n,1,2\nGoa,north,74\nDelhi,28.6,77.2\n'
+        response = self.upload('warehouses.csv', data)
+        self.assertEqual(response.status_code, 201)
+        report = response.json()
+        self.assertEqual((report['processed'], report['created'], report['error_count']), (4, 2, 2))
+        self.assertEqual([error['line'] for error in report['errors']], [3, 4])
+        self.assertIn('city', report['errors'][0]['errors'])
+        self.assertIn('latitude', report['errors'][1]['errors'])
+        self.assertEqual(sorted(Warehouse.objects.values_list('city', flat=True)), ['Delhi', 'Pune'])
+
+    def test_format_comes_from_the_file_name_or_the_request(self):
+        data = b'{"city": "Pune", "latitude": 18.5, "longitude": 73.8}\n'
+        self.assertEqual(self.upload('warehouses.ndjson', data).status_code, 201)
+        self.assertEqual(self.upload('upload.bin', data, format='ndjson').status_code, 201)
+        self.assertEqual(self.upload('upload.bin', data, format='xml').status_code, 400)
+
+    def test_unreadable_file_imports_nothing(self):
+        response = self.upload('warehouses.csv', b'\xff\xfe\x00\x00')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('warehouses.csv', response.json()['file'][0])
+        self.assertFalse(Warehouse.objects.exists())
+
+    def test_only_the_first_errors_are_kept(self):
+        data = b'city,latitude,longitude\n' + b',1,2\n' * 5
+        with mock.patch.object(importers, 'MAX_REPORTED_ERRORS', 3):
+            report = self.upload('warehouses.csv', data).json()
+        self.assertEqual(report['error_count'], 5)
+        self.assertEqual([error['line'] for error in report['errors']], [2, 3, 4])
+
+    def test_rows_are_inserted_in_chunks(self):
+        data = b'city,latitude,longitude\n' + b'Pune,18.5,73.8\n' * 5
+        created = []
+        report = importers.import_warehouses(
+            read_rows(io.BytesIO(data), 'csv'), chunk_size=2, progress=lambda report: created.append(report.created),
+        )
+        self.assertEqual(report.created, 5)
+        self.assertEqual(created, [2, 4, 5])
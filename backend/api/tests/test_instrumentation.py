@@ -0,0 +1,70 @@
+import json
+import os
+import re
+import tempfile
+
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+
+from ..instrumentation import TimingMiddleware, measure
+from ..models import Category
+from .base import APITestCase
+
+SERVER_TIMING_RE = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+def querying_view(request):
+    list(Category.objects.all())
+    list(Category.objects.filter(name='x'))
+    with measure('serialize'):
+        body = b'x' * 10
+    return HttpResponse(body)
+
+
+class TimingMiddlewareTests(APITestCase):
+    def run_middleware(self):
+        return TimingMiddleware(querying_view)(RequestFactory().get('/api/categories/?page_size=1'))
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('category-list'))
+        header = response['Server-Timing']
+        self.assertRegex(header, SERVER_TIMING_RE)
+        self.assertIn('serialize;dur=', header)
+        self.assertIn('size;desc="%d bytes"' % len(response.content), header)
+        self.assertRegex(header, r'total;dur=[\d.]+$')
+
+    def test_counts_queries_and_phases(self):
+        header = self.run_middleware()['Server-Timing']
+        self.assertEqual(SERVER_TIMING_RE.search(header).group(1), '2')
+        self.assertIn('serialize;dur=', header)
+        self.assertIn('size;desc="10 bytes"', header)
+
+    def test_header_can_be_turned_off(self):
+        with override_settings(API_SERVER_TIMING=False):
+            self.assertFalse(self.run_middleware().has_header('Server-Timing'))
+
+    def test_slow_requests_are_logged_with_their_sql(self):
+        with override_settings(API_SLOW_REQUEST_MS=0), self.assertLogs('api.slow_requests', 'WARNING') as logs:
+            self.run_middleware()
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], '/api/categories/?page_size=1')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['queries'], 2)
+        self.assertEqual(record['response_bytes'], 10)
+        self.assertEqual(len(record['sql']), 2)
+        self.assertIn('api_category', record['sql'][0]['sql'])
+
+    def test_fast_requests_are_not_logged(self):
+        with override_settings(API_SLOW_REQUEST_MS=60000), self.assertNoLogs('api.slow_requests'):
+            self.run_middleware()
+
+    def test_sampled_views_are_profiled(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(API_PROFILE_SAMPLE_RATES={'category-list': 1.0}, API_PROFILE_DIR=directory):
+                with self.assertLogs('api.slow_requests', 'INFO'):
+                    self.client.get(reverse('category-list'))
+                    self.client.get(reverse('warehouse-list'))
+            profiles = os.listdir(directory)
+        self.assertEqual(len(profiles), 1)
+        self.assertTrue(profiles[0].startswith('category-list-'))
@@ -0,0 +1,21 @@
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+
+class MetricsAccessTests(SimpleTestCase):
+    def test_open_to_this_host_without_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='::1').status_code, 200)
+
+    def test_closed_to_other_hosts_without_token(self):
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='203.0.113.7')
+        self.assertEqual(response.status_code, 403)
+        # A forwarded address is not trusted without REST_FRAMEWORK['NUM_PROXIES'].
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='203.0.113.7', HTTP_X_FORWARDED_FOR='127.0.0.1')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(METRICS_TOKEN='scrape-me')
+    def test_token_required_when_set(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='203.0.113.7', HTTP_AUTHORIZATION='Bearer scrape-me')
+        self.assertEqual(response.status_code, 200)
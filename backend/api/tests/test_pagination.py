@@ -0,0 +1,61 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Category
+from ..pagination import KeysetPagination
+from .base import APITestCase
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        # Pairs of rows share a timestamp, so pages have to break ties on id.
+        now = timezone.now()
+        self.categories = Category.objects.bulk_create(Category(name='Category %d' % i) for i in range(7))
+        for i, category in enumerate(self.categories):
+            Category.objects.filter(pk=category.pk).update(created_at=now - timedelta(minutes=i // 2))
+        self.newest_first = list(Category.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def ids(self, page):
+        return [item['id'] for item in page['results']]
+
+    def test_next_links_walk_every_row_once(self):
+        page = self.get(reverse('category-list') + '?page_size=3')
+        self.assertIsNone(page['previous'])
+        seen = self.ids(page)
+        while page['next']:
+            page = self.get(page['next'])
+            self.assertIsNotNone(page['previous'])
+            seen += self.ids(page)
+        self.assertEqual(seen, self.newest_first)
+
+    def test_previous_link_returns_the_same_page(self):
+        first = self.get(reverse('category-list') + '?page_size=3')
+        second = self.get(first['next'])
+        third = self.get(second['next'])
+        self.assertEqual(self.ids(self.get(third['previous'])), self.ids(second))
+        self.assertEqual(self.ids(self.get(second['previous'])), self.ids(first))
+
+    def test_rows_inserted_before_the_cursor_do_not_shift_the_next_page(self):
+        first = self.get(reverse('category-list') + '?page_size=3')
+        Category.objects.create(name='Newest')
+        self.assertEqual(self.ids(self.get(first['next'])), self.newest_first[3:6])
+
+    def test_page_size_is_capped(self):
+        with mock.patch.object(KeysetPagination, 'max_page_size', 2):
+            page = self.get(reverse('category-list') + '?page_size=100000')
+        self.assertEqual(self.ids(page), self.newest_first[:2])
+
+    def test_invalid_cursor_is_not_found(self):
+        for cursor in ('garbage', 'Yz14', '%%%'):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(reverse('category-list'), {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
@@ -0,0 +1,12 @@
+from django.test import override_settings
+
+from ..querybudget import check_budgets
+from .base import APITestCase
+
+
+# The 10k-row category tree takes seconds to serialize; only its query count matters here.
+@override_settings(API_SLOW_REQUEST_MS=60000)
+class QueryBudgetTests(APITestCase):
+    def test_endpoints_within_budget(self):
+        errors = [error for _, _, _, _, error in check_budgets() if error]
+        self.assertEqual(errors, [], '\n\n'.join(errors))
@@ -0,0 +1,11 @@
+from ..queryplans import check_plans
+from .base import APITestCase
+
+
+class QueryPlanTests(APITestCase):
+    def test_no_full_scans_or_temp_sorts(self):
+        problems = [
+            'GET %s: %s on %s\n%s' % (url, problem, table, line)
+            for _, url, _, _, found in check_plans() for problem, table, line in found
+        ]
+        self.assertEqual(problems, [], '\n\n'.join(problems))
@@ -0,0 +1,44 @@
+from unittest import mock
+
+from django.test import override_settings
+from django.urls import reverse
+
+from .base import APITestCase
+
+
+@override_settings(LOGIN_RATE_LIMIT={'BUCKETS': {'ip': (3, 60), 'email': (2, 300)}})
+class LoginRateLimitTests(APITestCase):
+    def login(self, email, **extra):
+        return self.client_class().post(
+            reverse('login'), {'email': email, 'password': 'wrong'}, content_type='application/json', **extra
+        )
+
+    def test_email_bucket(self):
+        self.assertEqual(self.login('admin@example.com').status_code, 401)
+        self.assertEqual(self.login('Admin@Example.com ').status_code, 401)
+
+        response = self.login('admin@example.com')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+
+    def test_ip_bucket_ignores_forwarded_for(self):
+        for i in range(3):
+            response = self.login('user-%d@example.com' % i, HTTP_X_FORWARDED_FOR='10.0.0.%d' % i)
+            self.assertEqual(response.status_code, 401)
+
+        response = self.login('other@example.com', HTTP_X_FORWARDED_FOR='10.0.0.99')
+        self.assertEqual(response.status_code, 429)
+
+    def test_rejected_before_hashing(self):
+        for _ in range(2):
+            self.login('admin@example.com')
+        with mock.patch('api.views.authenticate') as authenticate:
+            self.assertEqual(self.login('admin@example.com').status_code, 429)
+        authenticate.assert_not_called()
+
+    def test_successful_login(self):
+        response = self.client_class().post(
+            reverse('login'), {'email': 'admin@example.com', 'password': 'secret'}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('token', response.json())
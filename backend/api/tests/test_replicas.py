@@ -0,0 +1,119 @@
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from django.db import DEFAULT_DB_ALIAS, OperationalError
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from .. import replicas
+from ..authentication import issue_token
+from ..models import Category, User
+from ..replicas import ReplicaMiddleware, ReplicaRouter
+from .base import APITestCase
+
+
+class FakeConnections:
+    """Stands in for django.db.connections: replicas that connect unless listed in ``down``."""
+
+    def __init__(self, down=()):
+        self.down = set(down)
+        self.primary = SimpleNamespace(in_atomic_block=False)
+
+    def __getitem__(self, alias):
+        if alias == DEFAULT_DB_ALIAS:
+            return self.primary
+        return SimpleNamespace(ensure_connection=lambda: self.connect(alias))
+
+    def connect(self, alias):
+        if alias in self.down:
+            raise OperationalError('connection refused')
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1', 'replica_2'])
+class ReplicaRoutingTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.connections = FakeConnections()
+        patcher = mock.patch.object(replicas, 'connections', self.connections)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        replicas._down_until.clear()
+        self.addCleanup(replicas._down_until.clear)
+        self.other = User.objects.create_user('other@example.com', password='secret', name='Other')
+
+    def request(self, method='get', user=None, status=200, path='/api/categories/', reads=3):
+        """Run ``method`` through the middleware; returns the databases its reads went to."""
+        user = user or self.user
+        used = []
+
+        def view(request):
+            router = ReplicaRouter()
+            used.extend(router.db_for_read(Category) for _ in range(reads))
+            request.user = user
+            return HttpResponse(status=status)
+
+        headers = {'Authorization': 'Bearer %s' % issue_token(user).access_token}
+        request = getattr(RequestFactory(), method)(path, headers=headers)
+        ReplicaMiddleware(view)(request)
+        return used
+
+    def test_reads_go_to_one_replica_per_request(self):
+        for _ in range(10):
+            used = self.request()
+            self.assertIn(used[0], ['replica_1', 'replica_2'])
+            self.assertEqual(len(set(used)), 1)
+
+    def test_writes_and_transactions_use_the_primary(self):
+        self.assertEqual(self.request('post'), [DEFAULT_DB_ALIAS] * 3)
+        self.assertEqual(ReplicaRouter().db_for_write(Category), DEFAULT_DB_ALIAS)
+        self.connections.primary.in_atomic_block = True
+        self.assertEqual(self.request(user=self.other), [DEFAULT_DB_ALIAS] * 3)
+
+    def test_writer_is_pinned_to_the_primary(self):
+        self.request('post')
+        self.assertEqual(self.request(), [DEFAULT_DB_ALIAS] * 3)
+        self.assertNotEqual(self.request(user=self.other)[0], DEFAULT_DB_ALIAS)
+
+    def test_failed_writes_do_not_pin(self):
+        self.request('post', status=400)
+        self.assertNotEqual(self.request()[0], DEFAULT_DB_ALIAS)
+
+    def test_pin_expires(self):
+        self.request('post')
+        later = time.time() + replicas.DEFAULT_STICKY_SECONDS + 1
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=later):
+            self.assertNotEqual(self.request()[0], DEFAULT_DB_ALIAS)
+
+    def test_delta_sync_reads_the_primary(self):
+        used = self.request(path='/api/categories/?updated_since=2026-01-01T00:00:00Z')
+        self.assertEqual(used, [DEFAULT_DB_ALIAS] * 3)
+
+    def test_unreachable_replicas_are_skipped(self):
+        self.connections.down = {'replica_1'}
+        with self.assertLogs('api.replicas', 'WARNING'):
+            self.assertEqual(set(self.request() + self.request() + self.request()), {'replica_2'})
+        self.connections.down = {'replica_1', 'replica_2'}
+        with self.assertLogs('api.replicas', 'WARNING'):
+            self.assertEqual(self.request(), [DEFAULT_DB_ALIAS] * 3)
+        # replica_1 stays skipped for REPLICA_RETRY_SECONDS even once it is back.
+        self.connections.down = set()
+        self.assertNotIn('replica_1', self.request())
+
+    def test_payloads_read_from_a_replica_after_a_write_are_not_cached(self):
+        results = []
+
+        def view(request):
+            ReplicaRouter().db_for_read(Category)
+            results.append(replicas.may_cache('category'))
+            return HttpResponse()
+
+        request = RequestFactory().get('/api/categories/')
+        ReplicaMiddleware(view)(request)
+        replicas.note_write('category')
+        ReplicaMiddleware(view)(request)
+        self.assertEqual(results, [True, False])
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_uses_the_primary(self):
+        self.assertEqual(self.request(), [DEFAULT_DB_ALIAS] * 3)
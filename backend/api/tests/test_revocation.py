@@ -0,0 +1,70 @@
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from ..models import User
+from ..revocation import DEFAULT_ERROR_RATE, BloomFilter, RevocationList
+from .base import APITestCase
+
+
+class RevocationTests(APITestCase):
+    def test_logout_revokes_only_that_token(self):
+        other = self.client_for(self.user)
+        self.assertEqual(self.client.post(reverse('logout')).status_code, 204)
+
+        self.assertEqual(self.client.get(reverse('user')).status_code, 401)
+        self.assertEqual(other.get(reverse('user')).status_code, 200)
+
+    def test_role_change_revokes_tokens(self):
+        self.user.role = User.SUPPORT_STAFF
+        self.user.save()
+
+        self.assertEqual(self.client.get(reverse('user')).status_code, 401)
+        response = self.client_for(self.user).get(reverse('user'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['role'], User.SUPPORT_STAFF)
+
+    def test_deactivation_revokes_tokens(self):
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.client.get(reverse('user')).status_code, 401)
+
+    def test_queryset_deactivation_revokes_tokens(self):
+        self.assertEqual(self.client.get(reverse('user')).status_code, 200)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get(reverse('user')).status_code, 401)
+
+        # Reactivating does not bring the old tokens back.
+        User.objects.filter(pk=self.user.pk).update(is_active=True)
+        self.assertEqual(self.client.get(reverse('user')).status_code, 401)
+
+    def test_queryset_update_of_other_fields_keeps_tokens(self):
+        User.objects.filter(pk=self.user.pk).update(name='Renamed')
+        self.assertEqual(self.client.get(reverse('user')).status_code, 200)
+
+
+class RevocationListTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'revoked.sqlite3')
+
+    def test_more_revocations_than_capacity(self):
+        expires_at = time.time() + 3600
+        RevocationList(self.path).revoke_many([('jti-%d' % i, expires_at) for i in range(500)])
+
+        revocations = RevocationList(self.path, capacity=100, sync_interval=0)
+        with mock.patch.object(revocations, '_rebuild', wraps=revocations._rebuild) as rebuild:
+            self.assertTrue(all(revocations.is_revoked('jti-%d' % i) for i in range(500)))
+            revocations.revoke('jti-new', expires_at)
+            self.assertTrue(revocations.is_revoked('jti-new'))
+        # Sized for the live rows, and not rebuilt again on every sync.
+        self.assertEqual(rebuild.call_count, 1)
+        self.assertEqual(revocations._bloom.size, BloomFilter(1000, DEFAULT_ERROR_RATE).size)
+        false_positives = sum('other-%d' % i in revocations._bloom for i in range(10000))
+        self.assertLess(false_positives, 50)
@@ -0,0 +1,69 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from ..models import Announcement
+from ..search import fts5_query
+from .base import APITestCase
+
+
+class FTS5QueryTests(SimpleTestCase):
+    def test_words_are_quoted_and_the_last_is_a_prefix(self):
+        self.assertEqual(fts5_query('water main'), '"water" "main"*')
+
+    def test_operators_and_quotes_are_inert(self):
+        self.assertEqual(fts5_query('a" OR b* NEAR(c'), '"a" "OR" "b" "NEAR" "c"*')
+
+    def test_no_words(self):
+        self.assertIsNone(fts5_query(' "*()" '))
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Ranks and stemming checked against the SQLite FTS5 index.')
+class AnnouncementSearchTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.create('Parking update', 'The lot is closed for a water main repair.')
+        self.create('Water outage', 'Expect no supply on Friday.')
+        self.create('Holiday hours', 'The office closes early.')
+
+    def create(self, title, content):
+        return Announcement.objects.create(title=title, content=content, created_by=self.user)
+
+    def search(self, q, **params):
+        response = self.client.get(reverse('announcement-search'), {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def titles(self, q, **params):
+        return [result['title'] for result in self.search(q, **params)]
+
+    def test_title_matches_rank_first(self):
+        results = self.search('water')
+        self.assertEqual([result['title'] for result in results], ['Water outage', 'Parking update'])
+        self.assertGreater(results[0]['rank'], results[1]['rank'])
+
+    def test_stemming_and_prefix(self):
+        self.assertEqual(self.titles('closing office'), ['Holiday hours'])
+        self.assertEqual(set(self.titles('clos')), {'Holiday hours', 'Parking update'})
+        self.assertEqual(self.titles('holi'), ['Holiday hours'])
+
+    def test_every_word_is_required(self):
+        self.assertEqual(self.titles('water supply'), ['Water outage'])
+
+    def test_index_follows_updates_and_deletes(self):
+        announcement = Announcement.objects.get(title='Holiday hours')
+        announcement.title = 'Snow day'
+        announcement.save()
+        self.assertEqual(self.titles('holiday'), [])
+        self.assertEqual(self.titles('snow'), ['Snow day'])
+        announcement.delete()
+        self.assertEqual(self.titles('snow'), [])
+
+    def test_limit_and_offset(self):
+        self.assertEqual(self.titles('water', limit=1), ['Water outage'])
+        self.assertEqual(self.titles('water', limit=1, offset=1), ['Parking update'])
+
+    def test_query_is_required(self):
+        self.assertEqual(self.client.get(reverse('announcement-search')).status_code, 400)
@@ -0,0 +1,82 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.urls import reverse
+from django.utils import timezone
+
+from ..changefeed import record_changes
+from ..models import Announcement, Category, ChangeEvent
+from .base import APITestCase
+
+
+class DeltaSyncTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.categories = [Category.objects.create(name='Category %d' % i) for i in range(3)]
+
+    def sync(self, cursor=''):
+        return self.client.get(reverse('category-list'), {'updated_since': cursor})
+
+    def test_first_sync_returns_every_row(self):
+        body = self.sync().json()
+        self.assertEqual(sorted(row['id'] for row in body['results']), sorted(c.pk for c in self.categories))
+        self.assertEqual(body['deleted'], [])
+        self.assertFalse(body['has_more'])
+        self.assertTrue(body['cursor'])
+
+    def test_sync_reports_changes_and_deletions(self):
+        cursor = self.sync().json()['cursor']
+        changed, deleted = self.categories[0], self.categories[1]
+        changed.name = 'Changed'
+        changed.save()
+        deleted_pk = deleted.pk
+        deleted.delete()
+
+        body = self.sync(cursor).json()
+        self.assertIn((changed.pk, 'Changed'), [(row['id'], row['name']) for row in body['results']])
+        self.assertNotIn(deleted_pk, [row['id'] for row in body['results']])
+        self.assertEqual(body['deleted'], [deleted_pk])
+
+    def test_pages_follow_the_cursor(self):
+        seen = []
+        cursor = ''
+        while True:
+            response = self.client.get(reverse('category-list'), {'updated_since': cursor, 'page_size': 2})
+            body = response.json()
+            seen.extend(row['id'] for row in body['results'])
+            cursor = body['cursor']
+            if not body['has_more']:
+                break
+        self.assertEqual(sorted(seen), sorted(c.pk for c in self.categories))
+
+    def test_expired_cursor_is_gone(self):
+        response = self.sync((timezone.now() - timedelta(days=365)).isoformat())
+        self.assertEqual(response.status_code, 410)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.sync('not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('updated_since', response.json())
+
+    def test_renaming_author_resends_announcements_in_batches(self):
+        announcements = Announcement.objects.bulk_create([
+            Announcement(title='A %d' % i, content='Body', created_by=self.user) for i in range(5)
+        ])
+        url = reverse('announcement-list')
+        cursor = self.client.get(url, {'updated_since': ''}).json()['cursor']
+
+        with mock.patch('api.sync.TOUCH_BATCH_SIZE', 2), \
+                mock.patch('api.sync.record_changes', wraps=record_changes) as recorded, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.user.name = 'Renamed'
+            self.user.save()
+        self.assertEqual([len(call.args[1]) for call in recorded.call_args_list], [2, 2, 1])
+
+        body = self.client.get(url, {'updated_since': cursor}).json()
+        self.assertEqual(
+            {row['id']: row['created_by_name'] for row in body['results']},
+            {announcement.pk: 'Renamed' for announcement in announcements},
+        )
+        self.assertEqual(
+            ChangeEvent.objects.filter(model='announcement', action=ChangeEvent.UPDATE).count(), len(announcements)
+        )
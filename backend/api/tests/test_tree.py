@@ -0,0 +1,46 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Announcement, Category, SubCategory
+from .base import APITestCase
+
+
+class CategoryTreeTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.news = Category.objects.create(name='News')
+        self.events = Category.objects.create(name='Events')
+        self.local = SubCategory.objects.create(name='Local', category=self.news)
+        self.world = SubCategory.objects.create(name='World', category=self.news)
+        for subcategory in (self.local, self.local, self.world, None):
+            Announcement.objects.create(
+                title='Title', content='Content', category=self.news, subcategory=subcategory, created_by=self.user,
+            )
+
+    def get_tree(self):
+        response = self.client.get(reverse('category-tree'))
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_counts_announcements_per_category_and_subcategory(self):
+        tree = self.get_tree()
+        self.assertEqual([node['name'] for node in tree], ['Events', 'News'])
+        events, news = tree
+        self.assertEqual(events['announcement_count'], 0)
+        self.assertEqual(events['subcategories'], [])
+        self.assertEqual(news['announcement_count'], 4)
+        self.assertEqual(
+            [(node['name'], node['announcement_count']) for node in news['subcategories']],
+            [('Local', 2), ('World', 1)],
+        )
+
+    def test_query_count_does_not_grow_with_the_tree(self):
+        with CaptureQueriesContext(connection) as small:
+            self.get_tree()
+        for i in range(5):
+            category = Category.objects.create(name='Extra %d' % i)
+            SubCategory.objects.create(name='Sub %d' % i, category=category)
+        with CaptureQueriesContext(connection) as large:
+            self.get_tree()
+        self.assertEqual(len(large), len(small))
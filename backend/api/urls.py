@@ -1,25 +1,45 @@
 
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# The ASGI deployment reads through async list/detail views (api/asyncviews.py).
+if getattr(settings, 'API_ASYNC_VIEWS', False):
+    from . import asyncviews as read_views
+else:
+    read_views = views
+
 urlpatterns = [
     path('auth/login/', views.login_view, name='login'),
     path('auth/user/', views.user_view, name='user'),
     path('auth/logout/', views.logout_view, name='logout'),
+    # The change feed itself is served by asgi.py (api/changefeed.py).
+    path('events/ticket/', views.stream_ticket_view, name='stream-ticket'),
     
     # Warehouse URLs
-    path('warehouses/', views.WarehouseAPIView.as_view(), name='warehouse-list'),
-    path('warehouses/<int:pk>/', views.WarehouseDetailAPIView.as_view(), name='warehouse-detail'),
+    path('warehouses/', read_views.WarehouseAPIView.as_view(), name='warehouse-list'),
+    path('warehouses/bulk/', views.WarehouseBulkAPIView.as_view(), name='warehouse-bulk'),
+    path('warehouses/import/', views.WarehouseImportAPIView.as_view(), name='warehouse-import'),
+    path('warehouses/nearest/', views.WarehouseNearestAPIView.as_view(), name='warehouse-nearest'),
+    path('warehouses/within/', views.WarehouseWithinAPIView.as_view(), name='warehouse-within'),
+    path('warehouses/<int:pk>/', read_views.WarehouseDetailAPIView.as_view(), name='warehouse-detail'),
     
     # Announcement URLs
-    path('announcements/', views.AnnouncementAPIView.as_view(), name='announcement-list'),
-    path('announcements/<int:pk>/', views.AnnouncementDetailAPIView.as_view(), name='announcement-detail'),
+    path('announcements/', read_views.AnnouncementAPIView.as_view(), name='announcement-list'),
+    path('announcements/export/', views.AnnouncementExportAPIView.as_view(), name='announcement-export'),
+    path('announcements/search/', views.AnnouncementSearchAPIView.as_view(), name='announcement-search'),
+    path('announcements/<int:pk>/', read_views.AnnouncementDetailAPIView.as_view(), name='announcement-detail'),
     
     # Category URLs
-    path('categories/', views.CategoryAPIView.as_view(), name='category-list'),
-    path('categories/<int:pk>/', views.CategoryDetailAPIView.as_view(), name='category-detail'),
+    path('categories/', read_views.CategoryAPIView.as_view(), name='category-list'),
+    path('categories/bulk/', views.CategoryBulkAPIView.as_view(), name='category-bulk'),
+    path('categories/tree/', views.CategoryTreeAPIView.as_view(), name='category-tree'),
+    path('categories/<int:pk>/', read_views.CategoryDetailAPIView.as_view(), name='category-detail'),
     
     # SubCategory URLs
-    path('subcategories/', views.SubCategoryAPIView.as_view(), name='subcategory-list'),
-    path('subcategories/<int:pk>/', views.SubCategoryDetailAPIView.as_view(), name='subcategory-detail'),
+    path('subcategories/', read_views.SubCategoryAPIView.as_view(), name='subcategory-list'),
+    path('subcategories/bulk/', views.SubCategoryBulkAPIView.as_view(), name='subcategory-bulk'),
+    path('subcategories/<int:pk>/', read_views.SubCategoryDetailAPIView.as_view(), name='subcategory-detail'),
+
+    path('dashboard/stats/', views.DashboardStatsAPIView.as_view(), name='dashboard-stats'),
 ]
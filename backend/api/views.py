@@ -1,18 +1,42 @@
+from datetime import datetime, time
+
 from rest_framework import status, permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from django.contrib.auth import authenticate
-from .models import User, Warehouse, Announcement, Category, SubCategory
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connection, transaction
+from django.db.models import Count, Prefetch
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from .models import ChangeEvent, User, Warehouse, Announcement, Category, SubCategory
 from .serializers import (
     UserSerializer, LoginSerializer, WarehouseSerializer, AnnouncementSerializer,
-    CategorySerializer, SubCategorySerializer
+    CategorySerializer, SubCategorySerializer, CategoryTreeSerializer, BulkDeleteSerializer,
+    NearbyWarehouseSerializer, NearestQuerySerializer, WithinQuerySerializer,
+    AnnouncementSearchResultSerializer, SearchQuerySerializer, AnnouncementListSerializer,
+    AnnouncementFilterSerializer, DashboardStatsQuerySerializer,
 )
 from .permissions import IsPlatformAdmin, IsAdminUser
+from .pagination import KeysetPagination
+from .fieldsets import requested_fields, sparse_queryset
+from .caching import cached_payload, invalidate
+from .importers import FORMATS, ImportFileError, guess_format, import_warehouses, read_rows
+from .exporters import export_rows, iterate_in_thread, stream_csv, stream_ndjson
+from .renderers import CSVStreamRenderer, NDJSONStreamRenderer
+from .search import search_announcements
+from .conditional import conditional
+from .authentication import full_user, issue_stream_ticket, issue_token, revoke_token
+from .ratelimit import LoginRateThrottle
+from .changefeed import record_changes
+from .dashboard import count_created, count_updated, snapshot, stats
+from .sync import delta_response, is_delta_request, touch_embedding_rows
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([LoginRateThrottle])
 def login_view(request):
     serializer = LoginSerializer(data=request.data)
     if serializer.is_valid():
@@ -21,7 +45,7 @@ def login_view(request):
         user = authenticate(email=email, password=password)
 
         if user:
-            refresh = RefreshToken.for_user(user)
+            refresh = issue_token(user)
             return Response({
                 'token': str(refresh.access_token),
                 'user': UserSerializer(user).data
@@ -32,22 +56,122 @@ def login_view(request):
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def user_view(request):
-    serializer = UserSerializer(request.user)
+    serializer = UserSerializer(full_user(request.user))
     return Response(serializer.data)
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def logout_view(request):
-    # Blacklist token logic could be added here
+    revoke_token(request.auth)
     return Response(status=status.HTTP_204_NO_CONTENT)
 
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def stream_ticket_view(request):
+    return Response({'ticket': str(issue_stream_ticket(request.auth))})
+
+class BulkAPIView(APIView):
+    """
+    Create (POST), update (PUT) or delete (DELETE) many rows in one request.
+
+    POST and PUT take a list of objects, PUT items carrying their ``id``;
+    DELETE takes ``{"ids": [...]}``. Every item is validated first and the
+    whole batch is written in one transaction, or nothing is written and the
+    response lists the errors of each item by position.
+    """
+    permission_classes = [IsAdminUser]
+    model = None
+    serializer_class = None
+    max_items = 1000
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data, many=True, max_length=self.max_items)
+        if not serializer.is_valid():
+            return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            instances = serializer.save()
+            record_changes(self.model, [instance.pk for instance in instances], ChangeEvent.CREATE)
+            count_created(self.model, instances)
+        # bulk_create() sends no post_save, so invalidate cached payloads here.
+        invalidate(self.model)
+        return Response({'results': serializer.data}, status=status.HTTP_201_CREATED)
+
+    def put(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            serializer = self.serializer_class(data=items, many=True, max_length=self.max_items)
+            serializer.is_valid()
+            return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        ids = [item.get('id') if isinstance(item, dict) else None for item in items]
+        # type() rather than isinstance(): JSON true is a bool, an int that equals 1.
+        instances = self.model.objects.in_bulk([pk for pk in ids if type(pk) is int])
+        id_errors = []
+        seen = set()
+        for pk in ids:
+            if pk is None:
+                id_errors.append({'id': ['This field is required.']})
+            elif type(pk) is not int:
+                id_errors.append({'id': ['A valid integer is required.']})
+            elif pk not in instances:
+                id_errors.append({'id': ['Not found.']})
+            elif pk in seen:
+                id_errors.append({'id': ['Duplicate id.']})
+            else:
+                id_errors.append({})
+                seen.add(pk)
+
+        serializer = self.serializer_class(
+            [instances.get(pk) if type(pk) is int else None for pk in ids], data=items, many=True, max_length=self.max_items
+        )
+        valid = serializer.is_valid()
+        if not valid and isinstance(serializer.errors, dict):
+            return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        if not valid or any(id_errors):
+            item_errors = serializer.errors if not valid else [{} for _ in items]
+            errors = [{**field_errors, **id_error} for field_errors, id_error in zip(item_errors, id_errors)]
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        before = snapshot(self.model, instances.values())
+        with transaction.atomic():
+            serializer.save()
+            # bulk_update() sends no post_save either.
+            record_changes(self.model, list(instances), ChangeEvent.UPDATE)
+            touch_embedding_rows(self.model, list(instances))
+            count_updated(self.model, before, instances.values())
+        invalidate(self.model)
+        return Response({'results': serializer.data})
+
+    def delete(self, request):
+        serializer = BulkDeleteSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        ids = serializer.validated_data['ids']
+        if len(ids) > self.max_items:
+            return Response(
+                {'errors': {'ids': ['Ensure this field has no more than %d elements.' % self.max_items]}},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        with transaction.atomic():
+            existing = set(self.model.objects.filter(pk__in=ids).values_list('pk', flat=True))
+            self.model.objects.filter(pk__in=existing).delete()
+        return Response({'results': [{'id': pk, 'deleted': pk in existing} for pk in ids]})
+
 class WarehouseAPIView(APIView):
     permission_classes = [IsAdminUser]
 
+    @conditional(Warehouse)
+    @cached_payload(Warehouse)
     def get(self, request):
-        warehouses = Warehouse.objects.all()
-        serializer = WarehouseSerializer(warehouses, many=True)
-        return Response(serializer.data)
+        if is_delta_request(request):
+            return delta_response(request, Warehouse.objects.all(), WarehouseSerializer)
+        paginator = KeysetPagination()
+        queryset, fields = sparse_queryset(
+            request, Warehouse.objects.all(), WarehouseSerializer, paginator.cursor_fields
+        )
+        warehouses = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = WarehouseSerializer(warehouses, many=True, fields=fields)
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request):
         serializer = WarehouseSerializer(data=request.data)
@@ -56,22 +180,78 @@ class WarehouseAPIView(APIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class WarehouseNearestAPIView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        params = NearestQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        warehouses = Warehouse.objects.nearest(
+            params.validated_data['lat'], params.validated_data['lng'], params.validated_data['k']
+        )
+        serializer = NearbyWarehouseSerializer(warehouses, many=True)
+        return Response(serializer.data)
+
+class WarehouseWithinAPIView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        params = WithinQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        limit = params.validated_data['limit']
+        warehouses = list(Warehouse.objects.within(*params.validated_data['bbox'])[:limit + 1])
+        serializer = WarehouseSerializer(warehouses[:limit], many=True)
+        return Response({'truncated': len(warehouses) > limit, 'results': serializer.data})
+
+class WarehouseImportAPIView(APIView):
+    """
+    Import warehouses from an uploaded CSV or NDJSON file of
+    city,latitude,longitude rows, streamed and inserted in chunks.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'file': ['No file was submitted.']}, status=status.HTTP_400_BAD_REQUEST)
+        fmt = request.data.get('format') or guess_format(upload.name)
+        if fmt not in FORMATS:
+            return Response(
+                {'format': ['Expected one of: %s.' % ', '.join(FORMATS)]}, status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            report = import_warehouses(read_rows(upload.file, fmt))
+        except ImportFileError as exc:
+            return Response({'file': ['%s: %s' % (upload.name, exc)]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report.as_dict(), status=status.HTTP_201_CREATED if report.created else status.HTTP_200_OK)
+
 class WarehouseDetailAPIView(APIView):
     permission_classes = [IsAdminUser]
 
-    def get_object(self, pk):
+    def get_queryset(self):
+        return Warehouse.objects.all()
+
+    def get_object(self, pk, queryset=None):
+        if queryset is None:
+            queryset = self.get_queryset()
         try:
-            return Warehouse.objects.get(pk=pk)
+            return queryset.get(pk=pk)
         except Warehouse.DoesNotExist:
             return None
 
+    @conditional(Warehouse)
+    @cached_payload(Warehouse)
     def get(self, request, pk):
-        warehouse = self.get_object(pk)
+        queryset, fields = sparse_queryset(request, self.get_queryset(), WarehouseSerializer)
+        warehouse = self.get_object(pk, queryset)
         if not warehouse:
             return Response(status=status.HTTP_404_NOT_FOUND)
-        serializer = WarehouseSerializer(warehouse)
+        serializer = WarehouseSerializer(warehouse, fields=fields)
         return Response(serializer.data)
 
+    @conditional(Warehouse)
     def put(self, request, pk):
         warehouse = self.get_object(pk)
         if not warehouse:
@@ -92,34 +272,121 @@ class WarehouseDetailAPIView(APIView):
 class AnnouncementAPIView(APIView):
     permission_classes = [IsAdminUser]
 
+    @conditional(Announcement)
     def get(self, request):
-        announcements = Announcement.objects.all().order_by('-created_at')
-        serializer = AnnouncementSerializer(announcements, many=True)
-        return Response(serializer.data)
+        filters = AnnouncementFilterSerializer(data=request.query_params)
+        if not filters.is_valid():
+            return Response(filters.errors, status=status.HTTP_400_BAD_REQUEST)
+        queryset = AnnouncementListSerializer.with_preview(
+            filters.filter(Announcement.objects.select_related('created_by')), requested_fields(request)
+        )
+        if is_delta_request(request):
+            return delta_response(request, queryset, AnnouncementListSerializer)
+        paginator = KeysetPagination()
+        queryset, fields = sparse_queryset(request, queryset, AnnouncementListSerializer, paginator.cursor_fields)
+        announcements = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = AnnouncementListSerializer(announcements, many=True, fields=fields)
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request):
         serializer = AnnouncementSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(created_by=request.user)
+            serializer.save(created_by=full_user(request.user))
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class AnnouncementSearchAPIView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        params = SearchQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        announcements = search_announcements(
+            connection, params.validated_data['q'], params.validated_data['limit'], params.validated_data['offset']
+        )
+        serializer = AnnouncementSearchResultSerializer(announcements, many=True)
+        return Response({'results': serializer.data})
+
+class AnnouncementExportAPIView(APIView):
+    """
+    Stream every announcement as CSV (default) or NDJSON, oldest first,
+    optionally filtered by ``created_after``/``created_before`` (ISO date or
+    datetime) and ``category``. Pick the encoding with ``?format=`` or
+    ``Accept``.
+    """
+    permission_classes = [IsPlatformAdmin]
+    renderer_classes = [CSVStreamRenderer, NDJSONStreamRenderer]
+
+    def parse_bound(self, value):
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError(value)
+            parsed = datetime.combine(day, time.min)
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+    def get(self, request):
+        # Creation order reads the (category, created_at, id) and (created_at, id)
+        # indexes as ranges for every filter combination, without a sort.
+        announcements = Announcement.objects.order_by('created_at', 'id')
+        errors = {}
+        for param, lookup in (('created_after', 'created_at__gte'), ('created_before', 'created_at__lt')):
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            try:
+                announcements = announcements.filter(**{lookup: self.parse_bound(value)})
+            except ValueError:
+                errors[param] = ['Expected an ISO 8601 date or datetime.']
+        category = request.query_params.get('category')
+        if category:
+            if not category.isdigit():
+                errors['category'] = ['Expected a category id.']
+            else:
+                announcements = announcements.filter(category_id=int(category))
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        fmt = request.accepted_renderer.format
+        stream = stream_ndjson if fmt == 'ndjson' else stream_csv
+        content = stream(export_rows(announcements))
+        if isinstance(request._request, ASGIRequest):
+            content = iterate_in_thread(content)
+        response = StreamingHttpResponse(
+            content,
+            content_type='%s; charset=utf-8' % request.accepted_renderer.media_type,
+        )
+        response['Content-Disposition'] = 'attachment; filename="announcements.%s"' % fmt
+        return response
+
 class AnnouncementDetailAPIView(APIView):
     permission_classes = [IsAdminUser]
 
-    def get_object(self, pk):
+    def get_queryset(self):
+        return Announcement.objects.select_related('created_by')
+
+    def get_object(self, pk, queryset=None):
+        if queryset is None:
+            queryset = self.get_queryset()
         try:
-            return Announcement.objects.get(pk=pk)
+            return queryset.get(pk=pk)
         except Announcement.DoesNotExist:
             return None
 
+    @conditional(Announcement)
     def get(self, request, pk):
-        announcement = self.get_object(pk)
+        queryset, fields = sparse_queryset(request, self.get_queryset(), AnnouncementSerializer)
+        announcement = self.get_object(pk, queryset)
         if not announcement:
             return Response(status=status.HTTP_404_NOT_FOUND)
-        serializer = AnnouncementSerializer(announcement)
+        serializer = AnnouncementSerializer(announcement, fields=fields)
         return Response(serializer.data)
 
+    @conditional(Announcement)
     def put(self, request, pk):
         announcement = self.get_object(pk)
         if not announcement:
@@ -141,10 +408,18 @@ class AnnouncementDetailAPIView(APIView):
 class CategoryAPIView(APIView):
     permission_classes = [IsAdminUser]
 
+    @conditional(Category)
+    @cached_payload(Category)
     def get(self, request):
-        categories = Category.objects.all()
-        serializer = CategorySerializer(categories, many=True)
-        return Response(serializer.data)
+        if is_delta_request(request):
+            return delta_response(request, Category.objects.all(), CategorySerializer)
+        paginator = KeysetPagination()
+        queryset, fields = sparse_queryset(
+            request, Category.objects.all(), CategorySerializer, paginator.cursor_fields
+        )
+        categories = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = CategorySerializer(categories, many=True, fields=fields)
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request):
         serializer = CategorySerializer(data=request.data)
@@ -153,22 +428,48 @@ class CategoryAPIView(APIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class CategoryTreeAPIView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        # One query for the categories and one for all of their subcategories,
+        # each with its announcement count aggregated in SQL.
+        subcategories = SubCategory.objects.annotate(
+            announcement_count=Count('announcement')
+        ).order_by('name', 'id')
+        categories = Category.objects.annotate(
+            announcement_count=Count('announcement')
+        ).prefetch_related(
+            Prefetch('subcategories', queryset=subcategories)
+        ).order_by('name', 'id')
+        serializer = CategoryTreeSerializer(categories, many=True)
+        return Response(serializer.data)
+
 class CategoryDetailAPIView(APIView):
     permission_classes = [IsAdminUser]
 
-    def get_object(self, pk):
+    def get_queryset(self):
+        return Category.objects.all()
+
+    def get_object(self, pk, queryset=None):
+        if queryset is None:
+            queryset = self.get_queryset()
         try:
-            return Category.objects.get(pk=pk)
+            return queryset.get(pk=pk)
         except Category.DoesNotExist:
             return None
 
+    @conditional(Category)
+    @cached_payload(Category)
     def get(self, request, pk):
-        category = self.get_object(pk)
+        queryset, fields = sparse_queryset(request, self.get_queryset(), CategorySerializer)
+        category = self.get_object(pk, queryset)
         if not category:
             return Response(status=status.HTTP_404_NOT_FOUND)
-        serializer = CategorySerializer(category)
+        serializer = CategorySerializer(category, fields=fields)
         return Response(serializer.data)
 
+    @conditional(Category)
     def put(self, request, pk):
         category = self.get_object(pk)
         if not category:
@@ -190,10 +491,18 @@ class CategoryDetailAPIView(APIView):
 class SubCategoryAPIView(APIView):
     permission_classes = [IsAdminUser]
 
+    @conditional(SubCategory)
+    @cached_payload(SubCategory)
     def get(self, request):
-        subcategories = SubCategory.objects.all()
-        serializer = SubCategorySerializer(subcategories, many=True)
-        return Response(serializer.data)
+        if is_delta_request(request):
+            return delta_response(request, SubCategory.objects.select_related('category'), SubCategorySerializer)
+        paginator = KeysetPagination()
+        queryset, fields = sparse_queryset(
+            request, SubCategory.objects.select_related('category'), SubCategorySerializer, paginator.cursor_fields
+        )
+        subcategories = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = SubCategorySerializer(subcategories, many=True, fields=fields)
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request):
         serializer = SubCategorySerializer(data=request.data)
@@ -205,19 +514,28 @@ class SubCategoryAPIView(APIView):
 class SubCategoryDetailAPIView(APIView):
     permission_classes = [IsAdminUser]
 
-    def get_object(self, pk):
+    def get_queryset(self):
+        return SubCategory.objects.select_related('category')
+
+    def get_object(self, pk, queryset=None):
+        if queryset is None:
+            queryset = self.get_queryset()
         try:
-            return SubCategory.objects.get(pk=pk)
+            return queryset.get(pk=pk)
         except SubCategory.DoesNotExist:
             return None
 
+    @conditional(SubCategory)
+    @cached_payload(SubCategory)
     def get(self, request, pk):
-        subcategory = self.get_object(pk)
+        queryset, fields = sparse_queryset(request, self.get_queryset(), SubCategorySerializer)
+        subcategory = self.get_object(pk, queryset)
         if not subcategory:
             return Response(status=status.HTTP_404_NOT_FOUND)
-        serializer = SubCategorySerializer(subcategory)
+        serializer = SubCategorySerializer(subcategory, fields=fields)
         return Response(serializer.data)
 
+    @conditional(SubCategory)
     def put(self, request, pk):
         subcategory = self.get_object(pk)
         if not subcategory:
@@ -233,4 +551,31 @@ class SubCategoryDetailAPIView(APIView):
         if not subcategory:
             return Response(status=status.HTTP_404_NOT_FOUND)
         subcategory.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class WarehouseBulkAPIView(BulkAPIView):
+    model = Warehouse
+    serializer_class = WarehouseSerializer
+
+class CategoryBulkAPIView(BulkAPIView):
+    model = Category
+    serializer_class = CategorySerializer
+
+class SubCategoryBulkAPIView(BulkAPIView):
+    model = SubCategory
+    serializer_class = SubCategorySerializer
+
+class DashboardStatsAPIView(APIView):
+    """
+    Overview numbers for the dashboard, read from the summary table kept by
+    api/dashboard.py: totals per model and the ``?top=`` (default 10)
+    largest groups of announcements per category, subcategory and author,
+    warehouses per city and users per role.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        params = DashboardStatsQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(stats(params.validated_data['top']))
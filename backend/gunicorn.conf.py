@@ -0,0 +1,23 @@
+import os
+import shutil
+import tempfile
+
+# Prometheus multiprocess mode (api.metrics): each worker keeps its samples in
+# memory-mapped files under this directory and /metrics merges them. It is
+# wiped on start so samples of a previous run do not leak into this one.
+prometheus_multiproc_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'admin-panel-prometheus')
+)
+
+# Imported here, after the variable is set, not in child_exit: importing
+# inside the SIGCHLD handler can re-enter a half-finished import at shutdown.
+from prometheus_client import multiprocess  # noqa: E402
+
+
+def on_starting(server):
+    shutil.rmtree(prometheus_multiproc_dir, ignore_errors=True)
+    os.makedirs(prometheus_multiproc_dir)
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
@@ -32,6 +32,48 @@ export interface Announcement {
   updatedAt: string;
 }
 
+// List rows carry a server-truncated preview instead of the full content.
+export type AnnouncementSummary = Omit<Announcement, 'content'> & {
+  contentPreview: string;
+};
+
+export interface Paginated<T> {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
+
+// One page of ?updated_since= delta sync: pass `cursor` back next time
+// ('' the first time) and fetch again right away while `has_more`.
+export interface Changes<T> {
+  results: T[];
+  deleted: number[];
+  cursor: string;
+  has_more: boolean;
+}
+
+// GET /dashboard/stats/: every total, and the largest groups (?top=, default 10) of each breakdown.
+export interface GroupCount {
+  id: number | null;
+  name: string | null;
+  count: number;
+}
+
+export interface DashboardStats {
+  totals: {
+    users: number;
+    warehouses: number;
+    categories: number;
+    subcategories: number;
+    announcements: number;
+  };
+  users_by_role: { role: UserRole; count: number }[];
+  warehouses_by_city: { city: string; count: number }[];
+  announcements_by_category: GroupCount[];
+  announcements_by_subcategory: GroupCount[];
+  announcements_by_author: GroupCount[];
+}
+
 export interface AuthState {
   user: User | null;
   token: string | null;
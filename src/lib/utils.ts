@@ -1,6 +1,24 @@
 import { clsx, type ClassValue } from "clsx"
 import { twMerge } from "tailwind-merge"
+import type { Paginated } from "@/lib/types"
 
 export function cn(...inputs: ClassValue[]) {
   return twMerge(clsx(inputs))
 }
+
+// Every row of a keyset-paginated list: follows `next` until the last page.
+// Only the query string of `next` is reused, so each request keeps the
+// caller's base URL and auth header.
+export async function fetchAllPages<T>(
+  getPage: (params: Record<string, string>) => Promise<Paginated<T>>,
+  pageSize = 500
+): Promise<T[]> {
+  const rows: T[] = []
+  let params: Record<string, string> = { page_size: String(pageSize) }
+  for (;;) {
+    const page = await getPage(params)
+    rows.push(...page.results)
+    if (!page.next) return rows
+    params = Object.fromEntries(new URL(page.next).searchParams)
+  }
+}
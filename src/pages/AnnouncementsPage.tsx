@@ -115,6 +115,12 @@ export default function AnnouncementsPage() {
     deleteMutation.mutate(id);
   };
 
+  // List rows only carry a preview; load the full announcement before opening a dialog.
+  const openAnnouncement = async (id: string, openDialog: (open: boolean) => void) => {
+    setCurrentAnnouncement(await announcementApi.getById(id));
+    openDialog(true);
+  };
+
   if (isLoading) {
     return <div>Loading...</div>;
   }
@@ -204,7 +210,7 @@ export default function AnnouncementsPage() {
               {announcements.map((announcement) => (
                 <TableRow key={announcement.id}>
                   <TableCell className="font-medium">{announcement.title}</TableCell>
-                  <TableCell>{truncateText(announcement.content, 50)}</TableCell>
+                  <TableCell>{truncateText(announcement.contentPreview, 50)}</TableCell>
                   <TableCell>{announcement.createdBy}</TableCell>
                   <TableCell>{new Date(announcement.createdAt).toLocaleDateString()}</TableCell>
                   <TableCell>{new Date(announcement.updatedAt).toLocaleDateString()}</TableCell>
@@ -220,19 +226,13 @@ export default function AnnouncementsPage() {
                         <DropdownMenuLabel>Actions</DropdownMenuLabel>
                         <DropdownMenuSeparator />
                         <DropdownMenuItem
-                          onClick={() => {
-                            setCurrentAnnouncement(announcement);
-                            setIsViewAnnouncementDialogOpen(true);
-                          }}
+                          onClick={() => openAnnouncement(announcement.id, setIsViewAnnouncementDialogOpen)}
                         >
                           <Eye className="mr-2 h-4 w-4" />
                           View
                         </DropdownMenuItem>
                         <DropdownMenuItem
-                          onClick={() => {
-                            setCurrentAnnouncement(announcement);
-                            setIsEditAnnouncementDialogOpen(true);
-                          }}
+                          onClick={() => openAnnouncement(announcement.id, setIsEditAnnouncementDialogOpen)}
                         >
                           <Edit className="mr-2 h-4 w-4" />
                           Edit
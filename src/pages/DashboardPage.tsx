@@ -1,12 +1,22 @@
 
+import { useQuery } from "@tanstack/react-query";
 import { useAuth } from "@/contexts/AuthContext";
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/components/ui/card";
 import { UserRole } from "@/lib/types";
-import { Activity, Users, Warehouse, Bell } from "lucide-react";
+import { dashboardApi } from "@/services/dashboard";
+import { Activity, Users, Warehouse, Bell, FolderTree } from "lucide-react";
 
 export default function DashboardPage() {
   const { user } = useAuth();
 
+  const { data: stats } = useQuery({
+    queryKey: ['dashboard-stats'],
+    queryFn: () => dashboardApi.getStats(),
+  });
+  const adminCount = stats?.users_by_role.find((group) => group.role === UserRole.PLATFORM_ADMIN)?.count ?? 0;
+  const topCity = stats?.warehouses_by_city[0];
+  const topCategory = stats?.announcements_by_category.find((group) => group.id !== null);
+
   const roleName = {
     [UserRole.PLATFORM_ADMIN]: "Platform Admin",
     [UserRole.SUPPORT_STAFF]: "Support Staff",
@@ -29,9 +39,9 @@ export default function DashboardPage() {
             <Users className="h-4 w-4 text-muted-foreground" />
           </CardHeader>
           <CardContent>
-            <div className="text-2xl font-bold">120</div>
+            <div className="text-2xl font-bold">{stats?.totals.users ?? "–"}</div>
             <p className="text-xs text-muted-foreground">
-              +10% from last month
+              {adminCount} platform admins
             </p>
           </CardContent>
         </Card>
@@ -41,9 +51,9 @@ export default function DashboardPage() {
             <Warehouse className="h-4 w-4 text-muted-foreground" />
           </CardHeader>
           <CardContent>
-            <div className="text-2xl font-bold">15</div>
+            <div className="text-2xl font-bold">{stats?.totals.warehouses ?? "–"}</div>
             <p className="text-xs text-muted-foreground">
-              +2 new this month
+              {topCity ? `Most in ${topCity.city} (${topCity.count})` : "No warehouses yet"}
             </p>
           </CardContent>
         </Card>
@@ -53,21 +63,21 @@ export default function DashboardPage() {
             <Bell className="h-4 w-4 text-muted-foreground" />
           </CardHeader>
           <CardContent>
-            <div className="text-2xl font-bold">8</div>
+            <div className="text-2xl font-bold">{stats?.totals.announcements ?? "–"}</div>
             <p className="text-xs text-muted-foreground">
-              3 active announcements
+              {topCategory ? `Most in ${topCategory.name} (${topCategory.count})` : "No announcements yet"}
             </p>
           </CardContent>
         </Card>
         <Card>
           <CardHeader className="flex flex-row items-center justify-between space-y-0 pb-2">
-            <CardTitle className="text-sm font-medium">Activity</CardTitle>
-            <Activity className="h-4 w-4 text-muted-foreground" />
+            <CardTitle className="text-sm font-medium">Categories</CardTitle>
+            <FolderTree className="h-4 w-4 text-muted-foreground" />
           </CardHeader>
           <CardContent>
-            <div className="text-2xl font-bold">42</div>
+            <div className="text-2xl font-bold">{stats?.totals.categories ?? "–"}</div>
             <p className="text-xs text-muted-foreground">
-              +19% from last week
+              {stats?.totals.subcategories ?? 0} subcategories
             </p>
           </CardContent>
         </Card>
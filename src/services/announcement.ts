@@ -1,6 +1,7 @@
 
 import axios from 'axios';
-import { Announcement } from '@/lib/types';
+import { Announcement, AnnouncementSummary, Paginated, Changes } from '@/lib/types';
+import { fetchAllPages } from '@/lib/utils';
 
 // Create axios instance with authentication header
 const api = axios.create({
@@ -17,8 +18,12 @@ api.interceptors.request.use((config) => {
 });
 
 export const announcementApi = {
-  getAll: async (): Promise<Announcement[]> => {
-    const response = await api.get('/announcements/');
+  getAll: async (): Promise<AnnouncementSummary[]> => {
+    return fetchAllPages(async (params) => (await api.get<Paginated<AnnouncementSummary>>('/announcements/', { params })).data);
+  },
+
+  getChanges: async (cursor = ''): Promise<Changes<AnnouncementSummary>> => {
+    const response = await api.get<Changes<AnnouncementSummary>>('/announcements/', { params: { updated_since: cursor } });
     return response.data;
   },
 
@@ -1,5 +1,7 @@
 
 import axios from 'axios';
+import { Paginated, Changes } from '@/lib/types';
+import { fetchAllPages } from '@/lib/utils';
 
 const BASE_URL = '/api';
 
@@ -21,9 +23,32 @@ export interface SubCategory {
   updated_at: string;
 }
 
+export interface SubCategoryNode {
+  id: number;
+  name: string;
+  description: string;
+  announcement_count: number;
+  created_at: string;
+  updated_at: string;
+}
+
+export interface CategoryNode extends Category {
+  announcement_count: number;
+  subcategories: SubCategoryNode[];
+}
+
 export const categoryApi = {
   getAll: async () => {
-    const response = await axios.get<Category[]>(`${BASE_URL}/categories/`);
+    return fetchAllPages(async (params) => (await axios.get<Paginated<Category>>(`${BASE_URL}/categories/`, { params })).data);
+  },
+
+  getChanges: async (cursor = '') => {
+    const response = await axios.get<Changes<Category>>(`${BASE_URL}/categories/`, { params: { updated_since: cursor } });
+    return response.data;
+  },
+
+  getTree: async () => {
+    const response = await axios.get<CategoryNode[]>(`${BASE_URL}/categories/tree/`);
     return response.data;
   },
 
@@ -49,7 +74,11 @@ export const categoryApi = {
 
 export const subcategoryApi = {
   getAll: async () => {
-    const response = await axios.get<SubCategory[]>(`${BASE_URL}/subcategories/`);
+    return fetchAllPages(async (params) => (await axios.get<Paginated<SubCategory>>(`${BASE_URL}/subcategories/`, { params })).data);
+  },
+
+  getChanges: async (cursor = '') => {
+    const response = await axios.get<Changes<SubCategory>>(`${BASE_URL}/subcategories/`, { params: { updated_since: cursor } });
     return response.data;
   },
 
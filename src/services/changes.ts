@@ -0,0 +1,79 @@
+
+import axios from 'axios';
+
+// Server-Sent Events change feed (backend/api/changefeed.py), served by the
+// ASGI deployment only.
+const API_URL = 'https://role-based-dashboard-admin.onrender.com/api';
+const EVENTS_URL = `${API_URL}/events/`;
+const RETRY_MS = 3000;
+
+export type ChangeModel = 'announcement' | 'category' | 'subcategory' | 'warehouse';
+
+export interface ChangeEvent<T = unknown> {
+  model: ChangeModel;
+  action: 'create' | 'update' | 'delete';
+  id: number;
+  // The row as its list endpoint returns it; null for deletes.
+  data: T | null;
+}
+
+interface Handlers {
+  onChange: (event: ChangeEvent) => void;
+  // Events were missed for good: resync, e.g. with the services' getChanges().
+  onReset: () => void;
+}
+
+// EventSource cannot send the Authorization header, so each connection opens
+// with a short-lived ticket. A ticket cannot be reused once it expires, so
+// instead of EventSource's own retry every reconnect fetches a new ticket and
+// resumes after the last event seen.
+// Returns a function that closes the stream.
+export const subscribeToChanges = (handlers: Handlers, models?: ChangeModel[]): (() => void) => {
+  let source: EventSource | null = null;
+  let retry: ReturnType<typeof setTimeout> | undefined;
+  let lastEventId = '';
+  let closed = false;
+
+  const connect = async () => {
+    let ticket: string;
+    try {
+      const response = await axios.post<{ ticket: string }>(`${API_URL}/events/ticket/`, null, {
+        headers: { Authorization: `Bearer ${localStorage.getItem('token') ?? ''}` },
+      });
+      ticket = response.data.ticket;
+    } catch {
+      retry = setTimeout(connect, RETRY_MS);
+      return;
+    }
+    if (closed) {
+      return;
+    }
+    const params = new URLSearchParams({ ticket });
+    if (models) {
+      params.set('models', models.join(','));
+    }
+    if (lastEventId) {
+      params.set('last_event_id', lastEventId);
+    }
+    source = new EventSource(`${EVENTS_URL}?${params}`);
+    source.addEventListener('change', (event) => {
+      const message = event as MessageEvent;
+      lastEventId = message.lastEventId;
+      handlers.onChange(JSON.parse(message.data));
+    });
+    source.addEventListener('reset', handlers.onReset);
+    source.onerror = () => {
+      source?.close();
+      if (!closed) {
+        retry = setTimeout(connect, RETRY_MS);
+      }
+    };
+  };
+
+  connect();
+  return () => {
+    closed = true;
+    clearTimeout(retry);
+    source?.close();
+  };
+};
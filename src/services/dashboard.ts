@@ -0,0 +1,24 @@
+import axios from 'axios';
+import { DashboardStats } from '@/lib/types';
+
+// Create axios instance with authentication header
+const api = axios.create({
+  baseURL: 'https://role-based-dashboard-admin.onrender.com/api',
+});
+
+// Request interceptor to add auth token to all requests
+api.interceptors.request.use((config) => {
+  const token = localStorage.getItem('token');
+  if (token) {
+    config.headers.Authorization = `Bearer ${token}`;
+  }
+  return config;
+});
+
+export const dashboardApi = {
+  // Precomputed on the server, so this costs the same however much data there is.
+  getStats: async (top = 5): Promise<DashboardStats> => {
+    const response = await api.get<DashboardStats>('/dashboard/stats/', { params: { top } });
+    return response.data;
+  },
+};
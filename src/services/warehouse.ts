@@ -1,6 +1,7 @@
 
 import axios from 'axios';
-import { Warehouse } from '@/lib/types';
+import { Warehouse, Paginated, Changes } from '@/lib/types';
+import { fetchAllPages } from '@/lib/utils';
 
 // Create axios instance with authentication header
 const api = axios.create({
@@ -18,7 +19,11 @@ api.interceptors.request.use((config) => {
 
 export const warehouseApi = {
   getAll: async (): Promise<Warehouse[]> => {
-    const response = await api.get('/warehouses/');
+    return fetchAllPages(async (params) => (await api.get<Paginated<Warehouse>>('/warehouses/', { params })).data);
+  },
+
+  getChanges: async (cursor = ''): Promise<Changes<Warehouse>> => {
+    const response = await api.get<Changes<Warehouse>>('/warehouses/', { params: { updated_since: cursor } });
     return response.data;
   },
 